@@ -7,17 +7,37 @@ Aplicación web para WiFi Analyzer
 
 import os
 import json
+import queue
+import threading
 import pytz
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, send_file
 from flask_pymongo import PyMongo
+from pymongo import uri_parser
 from bson.json_util import dumps
 from bson.objectid import ObjectId
 
 # Importar módulos propios
 import wifi_scanner
+import wifi_cache
+import wifi_db
+import wifi_export
+import wifi_indexes
+import wifi_jobs
+import wifi_pagination
+import wifi_retention
+import wifi_rollups
+import wifi_smoothing
+import wifi_stream
 from config import Config
 
+# El módulo de tendencias necesita matplotlib; sin él no se sirven imágenes de tendencias
+try:
+    import wifi_trends
+    TRENDS_AVAILABLE = True
+except ImportError:
+    TRENDS_AVAILABLE = False
+
 # Inicializar la aplicación Flask
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -25,6 +45,76 @@ app.config.from_object(Config)
 # Configurar MongoDB
 mongo = PyMongo(app)
 
+# Índices que necesitan las consultas de los endpoints
+try:
+    wifi_indexes.ensure_indexes(mongo.db.wifi_scans)
+except Exception as e:
+    print(f"Advertencia: No se pudieron verificar los índices: {e}")
+
+# Rollups por minuto/hora/día que se actualizan con cada escaneo
+try:
+    wifi_rollups.ensure_rollup_collections(mongo.db)
+except Exception as e:
+    print(f"Advertencia: No se pudieron preparar los rollups: {e}")
+
+# Colección de muestras por BSSID (solo si se almacenan)
+samples_collection = None
+if app.config['SAMPLE_STORAGE'] == 'both':
+    samples_collection = wifi_db.ensure_samples_collection(mongo.db, wifi_db.MONGO_SAMPLES_COLLECTION)
+
+# Retención: los escaneos completos expiran y lo anterior al corte se lee de los rollups
+try:
+    wifi_retention.apply_ttl(mongo.db, mongo.db.wifi_scans, app.config['RAW_RETENTION_DAYS'])
+except Exception as e:
+    print(f"Advertencia: No se pudo aplicar la retención de escaneos: {e}")
+
+compaction_scheduler = wifi_retention.CompactionScheduler(
+    lambda: wifi_retention.compact(mongo.db, mongo.db.wifi_scans, app.config['RAW_RETENTION_DAYS'],
+                                   samples_name=samples_collection.name if samples_collection is not None else None),
+    app.config['RETENTION_COMPACTION_INTERVAL']
+)
+compaction_scheduler.start()
+
+# Filtros de señal por BSSID (solo los usa el hilo de trabajos de escaneo)
+signal_smoother = wifi_smoothing.SignalSmoother(mongo.db[wifi_smoothing.SMOOTHING_COLLECTION])
+
+# Difusor de escaneos nuevos para /api/stream (una consulta compartida por todos los clientes)
+broadcaster = wifi_stream.ScanBroadcaster(
+    latest_id=lambda: (mongo.db.wifi_scans.find_one({}, {'_id': 1}, sort=[('_id', -1)]) or {}).get('_id'),
+    load_scan=lambda scan_id: mongo.db.wifi_scans.find_one({'_id': scan_id}, {'timestamp': 1, 'networks': 1}),
+    poll_interval=app.config['STREAM_POLL_INTERVAL']
+)
+
+# Paginación del historial por rangos de _id (sin skip ni count_documents por petición)
+scan_pager = wifi_pagination.ScanPager(mongo.db.wifi_scans, app.config['ITEMS_PER_PAGE'],
+                                       app.config['HISTORY_SHALLOW_PAGES'], app.config['SCAN_COUNT_TTL'])
+
+# Campos de cada escaneo que muestran las listas del historial
+SCAN_LIST_FIELDS = {'name': 1, 'timestamp': 1, 'total_networks': 1}
+
+# Caché de imágenes de tendencias, indexada por gráfico, parámetros y último escaneo
+trend_cache = wifi_cache.RenderCache(app.config['RENDER_CACHE_DIR'], app.config['RENDER_CACHE_MAX_BYTES'])
+
+# Imágenes de tendencias disponibles: nombre en la URL -> (gráfico, banda)
+TREND_IMAGES = {
+    'channels_2g': ('band_occupancy', '2g'),
+    'channels_5g': ('band_occupancy', '5g'),
+    'network_count': ('network_count', None),
+    'signal': ('signal_strength', None),
+}
+
+_trend_db = None
+_trend_db_lock = threading.Lock()
+
+def get_trend_db():
+    """WiFiDB compartida para renderizar tendencias (se conecta en el primer uso)."""
+    global _trend_db
+    with _trend_db_lock:
+        if _trend_db is None:
+            host, port = uri_parser.parse_uri(app.config['MONGO_URI'])['nodelist'][0]
+            _trend_db = wifi_db.WiFiDB(host=host, port=port, db_name=mongo.db.name)
+        return _trend_db
+
 # Rutas de la aplicación
 @app.route('/')
 def index():
@@ -40,96 +130,165 @@ def scan_page():
 def history_page():
     """Página para ver el historial de escaneos"""
     page = request.args.get('page', 1, type=int)
-    limit = app.config['ITEMS_PER_PAGE']
-    skip = (page - 1) * limit
-
-    # Obtener el total de escaneos
-    total = mongo.db.wifi_scans.count_documents({})
+    cursor = request.args.get('cursor')
 
-    # Obtener los escaneos paginados ordenados por _id (que contiene timestamp de creación)
-    scans = list(mongo.db.wifi_scans.find().sort('_id', -1).skip(skip).limit(limit))
-
-    # Calcular el número total de páginas
-    total_pages = (total + limit - 1) // limit
+    # Las primeras páginas se enlazan por número; las demás se recorren con tokens next/prev
+    try:
+        result = scan_pager.page(page, cursor, projection=SCAN_LIST_FIELDS)
+    except ValueError:
+        return redirect(url_for('history_page'))
 
     return render_template('history.html',
-                          scans=scans,
-                          page=page,
-                          total_pages=total_pages,
-                          total_scans=total)
+                          scans=result['scans'],
+                          page=result['page'],
+                          total_pages=result['total_pages'],
+                          shallow_pages=min(result['total_pages'], scan_pager.shallow_pages),
+                          next_cursor=result['next'],
+                          prev_cursor=result['prev'],
+                          total_scans=result['total'])
+
+def run_scan_job(job):
+    """
+    Realiza un escaneo y lo guarda (se ejecuta en el hilo de trabajos de escaneo).
+
+    Args:
+        job (dict): Trabajo con el nombre y los metadatos del escaneo
+
+    Returns:
+        dict: Resultado del escaneo
+    """
+    # Usar datetime.now() sin zona horaria para guardar en MongoDB
+    now = datetime.now()
+
+    # Realizar escaneo con el backend configurado
+    networks = wifi_scanner.scan_wifi(app.config['SCAN_BACKEND'])
+
+    if not networks:
+        return {
+            'success': False,
+            'message': 'No se encontraron redes WiFi o hubo un error en el escaneo'
+        }
+
+    # Señal suavizada por BSSID (signal_smoothed/distance_smoothed en cada red)
+    signal_smoother.smooth(networks, now)
+
+    # Guardar en MongoDB
+    document = {
+        'name': job['name'],
+        'timestamp': now,
+        'networks': networks,
+        'total_networks': len(networks),
+        'metadata': job['metadata']
+    }
+    wifi_db.mark_pending(document, samples=samples_collection is not None)
+    result = mongo.db.wifi_scans.insert_one(document)
+
+    # Guardar también las muestras por BSSID si están habilitadas
+    if samples_collection is not None:
+        wifi_db.save_samples(samples_collection, mongo.db.wifi_scans, [document])
+
+    # Sumar el escaneo a los rollups de tendencias; si falla, el escaneo queda pendiente
+    # y no puede expirar hasta que --rebuild-rollups lo incluya
+    try:
+        wifi_rollups.apply_rollups(mongo.db, mongo.db.wifi_scans, [document])
+    except Exception as e:
+        print(f"Error al actualizar los rollups: {e}")
+        try:
+            wifi_retention.suspend_expiry(mongo.db, mongo.db.wifi_scans, [result.inserted_id])
+        except Exception as state_error:
+            print(f"Error al suspender la expiración de escaneos: {state_error}")
+    signal_smoother.save()
+
+    # Actualizar el resumen precalculado que usa el dashboard
+    wifi_db.save_scan_summary(mongo.db, document)
+
+    # Avisar a los clientes de /api/stream sin esperar al próximo sondeo
+    broadcaster.notify()
+
+    return {
+        'success': True,
+        'message': 'Escaneo completado con éxito',
+        'scan_id': str(result.inserted_id),
+        'networks_found': len(networks)
+    }
+
+# Trabajos de escaneo: un solo hilo usa la radio y las peticiones simultáneas se unen
+scan_jobs = wifi_jobs.ScanJobManager(run_scan_job)
+
+def job_response(job, coalesced=False):
+    """Serializa un trabajo de escaneo para la API."""
+    response = {
+        'success': job['status'] != wifi_jobs.JOB_ERROR,
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'name': job['name'],
+        'requests': job['requests'],
+        'status_url': url_for('api_scan_job', job_id=job['job_id']),
+        'message': job['message']
+    }
+    if coalesced:
+        response['coalesced'] = True
+    if job['result']:
+        response['scan_id'] = job['result'].get('scan_id')
+        response['networks_found'] = job['result'].get('networks_found')
+    return response
 
 @app.route('/api/scan', methods=['POST'])
 def api_scan():
-    """API para realizar un escaneo"""
-    try:
-        # Obtener parámetros
-        # Usar datetime.now() sin zona horaria para guardar en MongoDB
-        now = datetime.now()
-
-        scan_name = request.form.get('scan_name', f"Escaneo {now.strftime('%Y-%m-%d %H:%M:%S')}")
-
-        # Realizar escaneo
-        networks = wifi_scanner.scan_wifi()
-
-        if networks:
-            # Guardar en MongoDB
-            result = mongo.db.wifi_scans.insert_one({
-                'name': scan_name,
-                'timestamp': now,
-                'networks': networks,
-                'total_networks': len(networks),
-                'metadata': {
-                    'source': 'web_interface'
-                }
-            })
+    """API para pedir un escaneo; responde de inmediato con el identificador del trabajo"""
+    now = datetime.now()
+    scan_name = request.form.get('scan_name', f"Escaneo {now.strftime('%Y-%m-%d %H:%M:%S')}")
 
-            return jsonify({
-                'success': True,
-                'message': 'Escaneo completado con éxito',
-                'scan_id': str(result.inserted_id),
-                'networks_found': len(networks)
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': 'No se encontraron redes WiFi o hubo un error en el escaneo'
-            }), 400
+    job, coalesced = scan_jobs.submit(scan_name, {'source': 'web_interface'})
+    return jsonify(job_response(job, coalesced)), 202
 
-    except Exception as e:
+@app.route('/api/scan/jobs/<job_id>', methods=['GET'])
+def api_scan_job(job_id):
+    """API para consultar un trabajo de escaneo (con ?wait=N espera hasta N segundos a que termine)"""
+    wait = min(max(request.args.get('wait', 0, type=float), 0), app.config['SCAN_JOB_MAX_WAIT'])
+    job = scan_jobs.get(job_id, wait=wait)
+
+    if not job:
         return jsonify({
             'success': False,
-            'message': f'Error al realizar el escaneo: {str(e)}'
-        }), 500
+            'message': 'Trabajo de escaneo no encontrado'
+        }), 404
+
+    return jsonify(job_response(job))
 
 @app.route('/api/scans', methods=['GET'])
 def api_get_scans():
-    """API para obtener la lista de escaneos"""
+    """API para obtener la lista de escaneos (por ?page=N o por los tokens next/prev con ?cursor=<token>)"""
     try:
         # Obtener parámetros de paginación
         page = request.args.get('page', 1, type=int)
-        limit = request.args.get('limit', app.config['ITEMS_PER_PAGE'], type=int)
-        skip = (page - 1) * limit
-
-        # Obtener el total de escaneos
-        total = mongo.db.wifi_scans.count_documents({})
-
-        # Obtener los escaneos paginados ordenados por _id (que contiene timestamp de creación)
-        scans = list(mongo.db.wifi_scans.find({}, {
-            'name': 1,
-            'timestamp': 1,
-            'total_networks': 1
-        }).sort('_id', -1).skip(skip).limit(limit))
+        cursor = request.args.get('cursor')
+        limit = min(max(request.args.get('limit', app.config['ITEMS_PER_PAGE'], type=int), 1),
+                    app.config['API_MAX_PAGE_SIZE'])
+
+        # Página por rango de _id (con token) o por número, ordenada por _id descendente
+        try:
+            result = scan_pager.page(page, cursor, limit, SCAN_LIST_FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
 
         # Convertir ObjectId a string para serialización JSON
+        scans = result['scans']
         for scan in scans:
             scan['_id'] = str(scan['_id'])
 
         return jsonify({
             'success': True,
-            'total': total,
-            'page': page,
+            'total': result['total'],
+            'page': result['page'],
             'limit': limit,
-            'scans': scans
+            'scans': scans,
+            'total_pages': result['total_pages'],
+            'next': result['next'],
+            'prev': result['prev']
         })
 
     except Exception as e:
@@ -170,72 +329,157 @@ def api_get_scan(scan_id):
             'message': f'Error al obtener el escaneo: {str(e)}'
         }), 500
 
+# Caché en proceso del resumen del último escaneo, indexada por su _id
+_summary_cache = {'scan_id': None, 'summary': None}
+_summary_lock = threading.Lock()
+
+def get_latest_summary():
+    """
+    Devuelve el resumen precalculado del último escaneo.
+
+    Solo consulta el _id del último escaneo (cubierto por el índice _id); si
+    coincide con el de la caché no se lee nada más. Si el resumen guardado no
+    corresponde al último escaneo (p. ej. escaneos importados), se recalcula.
+
+    Returns:
+        dict: Resumen del último escaneo o None si no hay escaneos
+    """
+    latest = mongo.db.wifi_scans.find_one({}, {'_id': 1}, sort=[('_id', -1)])
+    if not latest:
+        return None
+
+    with _summary_lock:
+        if _summary_cache['scan_id'] == latest['_id']:
+            return _summary_cache['summary']
+
+    summary = mongo.db[wifi_db.MONGO_SUMMARY_COLLECTION].find_one({'_id': 'latest', 'scan_id': latest['_id']})
+    if not summary:
+        last_scan = mongo.db.wifi_scans.find_one({'_id': latest['_id']})
+        if not last_scan:
+            return None
+        summary = wifi_db.save_scan_summary(mongo.db, last_scan)
+
+    with _summary_lock:
+        _summary_cache['scan_id'] = latest['_id']
+        _summary_cache['summary'] = summary
+    return summary
+
+def summary_response(summary, endpoint, payload):
+    """
+    Crea una respuesta JSON con ETag derivado del _id del escaneo.
+
+    Si el cliente ya tiene esa versión (If-None-Match) se responde 304 sin cuerpo.
+    """
+    response = jsonify(payload)
+    response.set_etag(f"{summary['scan_id']}-{endpoint}")
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @app.route('/api/networks/channels', methods=['GET'])
 def api_networks_by_channel():
     """API para obtener estadísticas de redes por canal"""
     try:
-        # Obtener el último escaneo ordenando por _id (que contiene timestamp de creación)
-        last_scan = mongo.db.wifi_scans.find_one(sort=[('_id', -1)])
+        # Resumen precalculado del último escaneo (ordenado por _id)
+        summary = get_latest_summary()
 
-        if not last_scan:
+        if not summary:
             return jsonify({
                 'success': False,
                 'message': 'No hay escaneos disponibles'
             }), 404
 
-        # Contar redes por canal
-        channels_2g = {}
-        channels_5g = {}
+        return summary_response(summary, 'channels', {
+            'success': True,
+            'timestamp': summary['timestamp'].isoformat(),
+            'channels_2g': summary['channels_2g'],
+            'channels_5g': summary['channels_5g']
+        })
 
-        for network in last_scan['networks']:
-            channel = network.get('channel')
-            if channel:
-                if channel <= 14:  # 2.4GHz
-                    channels_2g[channel] = channels_2g.get(channel, 0) + 1
-                else:  # 5GHz
-                    channels_5g[channel] = channels_5g.get(channel, 0) + 1
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener estadísticas de canales: {str(e)}'
+        }), 500
 
-        # Convertir timestamp a formato ISO para que sea serializable
-        timestamp_iso = last_scan['timestamp'].isoformat()
+@app.route('/api/networks/channels/history', methods=['GET'])
+def api_channels_history():
+    """API para obtener la ocupación de canales y redes por banda en un período"""
+    try:
+        # Obtener parámetros
+        days = request.args.get('days', 1, type=int)
+        end_time = datetime.now()
+        start_time = end_time - timedelta(days=days)
+        granularity = wifi_rollups.choose_granularity(start_time, end_time)
+        rollup_range, raw_range = wifi_retention.read_ranges(mongo.db, start_time, end_time,
+                                                             app.config['RAW_RETENTION_DAYS'])
+        bucket = request.args.get('bucket', type=int)
+        if bucket is None or rollup_range:
+            # Con escaneos expirados los buckets son los de los rollups
+            bucket = wifi_rollups.granularity_seconds(granularity)
+
+        # La parte anterior al corte de retención solo existe en los rollups
+        channels, bands = [], []
+        if rollup_range:
+            series = wifi_rollups.get_band_series(mongo.db, *rollup_range, granularity=granularity)
+            if raw_range:
+                series = [point for point in series if point['timestamp'] < raw_range[0]]
+            channels.extend(series)
+            bands.extend(series)
+
+        # MongoDB agrupa y cuenta; solo se transfieren las series resultantes
+        if raw_range:
+            channels.extend(wifi_db.channel_histogram(mongo.db.wifi_scans, *raw_range, bucket))
+            bands.extend(wifi_db.band_counts(mongo.db.wifi_scans, *raw_range, bucket))
+
+        if not bands:
+            return jsonify({
+                'success': False,
+                'message': 'No hay escaneos en el período especificado'
+            }), 404
 
         return jsonify({
             'success': True,
-            'timestamp': timestamp_iso,
-            'channels_2g': channels_2g,
-            'channels_5g': channels_5g
+            'bucket': bucket,
+            'channels': [{
+                'timestamp': point['timestamp'].isoformat(),
+                'scans': point['scans'],
+                'channels_2g': {str(ch): count for ch, count in point['channels_2g'].items()},
+                'channels_5g': {str(ch): count for ch, count in point['channels_5g'].items()}
+            } for point in channels],
+            'bands': [{
+                'timestamp': point['timestamp'].isoformat(),
+                'scans': point['scans'],
+                'total': point['total'],
+                'count_2g': point['count_2g'],
+                'count_5g': point['count_5g']
+            } for point in bands]
         })
 
     except Exception as e:
         return jsonify({
             'success': False,
-            'message': f'Error al obtener estadísticas de canales: {str(e)}'
+            'message': f'Error al obtener el historial de canales: {str(e)}'
         }), 500
 
 @app.route('/api/networks/signal', methods=['GET'])
 def api_networks_by_signal():
     """API para obtener las redes con mejor señal"""
     try:
-        # Obtener el último escaneo ordenando por _id (que contiene timestamp de creación)
-        last_scan = mongo.db.wifi_scans.find_one(sort=[('_id', -1)])
+        # Resumen precalculado del último escaneo (ordenado por _id)
+        summary = get_latest_summary()
 
-        if not last_scan:
+        if not summary:
             return jsonify({
                 'success': False,
                 'message': 'No hay escaneos disponibles'
             }), 404
 
-        # Ordenar redes por intensidad de señal
-        networks = sorted(last_scan['networks'], key=lambda x: x.get('signal', -100), reverse=True)
-
-        # Limitar a las mejores redes
-        top_networks = networks[:app.config['MAX_NETWORKS_IN_CHART']]
+        # Limitar a las mejores redes (el resumen ya está ordenado por señal)
+        top_networks = summary['top_networks'][:app.config['MAX_NETWORKS_IN_CHART']]
 
-        # Convertir timestamp a formato ISO para que sea serializable
-        timestamp_iso = last_scan['timestamp'].isoformat()
-
-        return jsonify({
+        return summary_response(summary, 'signal', {
             'success': True,
-            'timestamp': timestamp_iso,
+            'timestamp': summary['timestamp'].isoformat(),
             'networks': top_networks
         })
 
@@ -256,21 +500,47 @@ def api_network_trend(essid):
         end_time = datetime.now()
         start_time = end_time - timedelta(days=days)
 
-        # Buscar la red en los escaneos
-        pipeline = [
-            {'$match': {'timestamp': {'$gte': start_time, '$lte': end_time}}},
-            {'$unwind': '$networks'},
-            {'$match': {'networks.essid': essid}},
-            {'$project': {
-                '_id': 0,
-                'timestamp': 1,
-                'signal': '$networks.signal',
-                'channel': '$networks.channel'
-            }},
-            {'$sort': {'timestamp': 1}}
-        ]
-
-        results = list(mongo.db.wifi_scans.aggregate(pipeline))
+        # La parte anterior al corte de retención se lee de los rollups por BSSID
+        rollup_range, raw_range = wifi_retention.read_ranges(mongo.db, start_time, end_time,
+                                                             app.config['RAW_RETENTION_DAYS'])
+        results = []
+        if rollup_range:
+            for point in wifi_rollups.get_bssid_series(mongo.db, *rollup_range, essid=essid):
+                if raw_range and point['timestamp'] >= raw_range[0]:
+                    continue
+                network = point['network']
+                results.append({
+                    'timestamp': point['timestamp'],
+                    'signal': network['signal'],
+                    'signal_min': network['signal_min'],
+                    'signal_max': network['signal_max'],
+                    'channel': network['channel']
+                })
+
+        if raw_range and samples_collection is not None:
+            # Muestras por BSSID: consulta por índice (meta.essid, timestamp) sin $unwind
+            results.extend(samples_collection.find(
+                wifi_db.samples_query(essid=essid, start_time=raw_range[0], end_time=raw_range[1]),
+                {'_id': 0, 'timestamp': 1, 'signal': 1, 'signal_smoothed': 1, 'channel': 1}
+            ).sort('timestamp', 1))
+        elif raw_range:
+            # Buscar la red en los escaneos
+            pipeline = [
+                # El ESSID en el primer $match permite usar el índice (networks.essid, timestamp)
+                {'$match': {'timestamp': {'$gte': raw_range[0], '$lte': raw_range[1]}, 'networks.essid': essid}},
+                {'$unwind': '$networks'},
+                {'$match': {'networks.essid': essid}},
+                {'$project': {
+                    '_id': 0,
+                    'timestamp': 1,
+                    'signal': '$networks.signal',
+                    'signal_smoothed': '$networks.signal_smoothed',
+                    'channel': '$networks.channel'
+                }},
+                {'$sort': {'timestamp': 1}}
+            ]
+
+            results.extend(mongo.db.wifi_scans.aggregate(pipeline))
 
         if not results:
             return jsonify({
@@ -290,6 +560,157 @@ def api_network_trend(essid):
             'message': f'Error al obtener tendencia de red: {str(e)}'
         }), 500
 
+@app.route('/api/trends/<name>.png', methods=['GET'])
+def api_trend_image(name):
+    """Imagen PNG de un gráfico de tendencias, servida desde la caché de renders"""
+    if not TRENDS_AVAILABLE:
+        return jsonify({
+            'success': False,
+            'message': 'El módulo de tendencias no está disponible (requiere matplotlib)'
+        }), 503
+
+    if name not in TREND_IMAGES:
+        return jsonify({
+            'success': False,
+            'message': f"Gráfico desconocido: {name} (opciones: {', '.join(TREND_IMAGES)})"
+        }), 404
+
+    chart, band = TREND_IMAGES[name]
+    days = max(1, min(request.args.get('days', 1, type=int), app.config['TREND_MAX_DAYS']))
+    network = request.args.get('network')
+    mac = request.args.get('mac')
+    if chart == 'signal_strength' and not network and not mac:
+        return jsonify({
+            'success': False,
+            'message': 'Debe especificar network o mac'
+        }), 400
+
+    try:
+        # Se renderiza solo si llegaron escaneos nuevos desde el último render
+        path = wifi_trends.render_cached_trend(get_trend_db(), trend_cache, chart, days, band, network, mac,
+                                               app.config['TREND_IMAGE_QUALITY'])
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al generar el gráfico de tendencias: {str(e)}'
+        }), 500
+
+    if not path:
+        return jsonify({
+            'success': False,
+            'message': 'No hay datos en el período especificado'
+        }), 404
+
+    # La clave de la caché sirve de ETag: el navegador revalida con If-None-Match
+    return send_file(path, mimetype='image/png', etag=os.path.splitext(os.path.basename(path))[0], max_age=0)
+
+@app.route('/api/trends/cache', methods=['GET'])
+def api_trend_cache():
+    """API con el estado de la caché de imágenes de tendencias"""
+    return jsonify({
+        'success': True,
+        'cache': trend_cache.stats()
+    })
+
+@app.route('/api/stream', methods=['GET'])
+def api_stream():
+    """Stream Server-Sent Events con el estado del último escaneo y los cambios de cada escaneo nuevo"""
+    client = broadcaster.subscribe()
+    keepalive = app.config['STREAM_KEEPALIVE']
+
+    def generate():
+        try:
+            # Estado actual para que el cliente no tenga que pedirlo aparte
+            snapshot = broadcaster.snapshot()
+            if snapshot:
+                yield snapshot
+
+            while True:
+                try:
+                    message = client.get(timeout=keepalive)
+                except queue.Empty:
+                    # Comentario SSE para mantener viva la conexión a través de proxies
+                    yield ': keepalive\n\n'
+                    continue
+
+                if message is None:
+                    # Cliente demasiado lento: se cierra y EventSource reconecta
+                    break
+                yield message
+        finally:
+            broadcaster.unsubscribe(client)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/retention', methods=['GET'])
+def api_retention():
+    """Política de retención y métricas de la última compactación"""
+    try:
+        status = wifi_retention.retention_status(mongo.db) or {}
+        return jsonify({
+            'success': True,
+            'raw_retention_days': app.config['RAW_RETENTION_DAYS'],
+            'rollup_retention_days': wifi_rollups.ROLLUP_RETENTION_DAYS,
+            'compaction_interval': app.config['RETENTION_COMPACTION_INTERVAL'],
+            'runs': status.get('runs', 0),
+            'total_deleted': status.get('total_deleted', 0),
+            'total_reclaimed_bytes': status.get('total_reclaimed_bytes', 0),
+            'last_run': status.get('last_run')
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener el estado de la retención: {str(e)}'
+        }), 500
+
+@app.route('/api/export', methods=['GET'])
+def api_export():
+    """API para exportar en streaming los escaneos de un período (?format=jsonl|csv|parquet&days=N&flatten=1)"""
+    fmt = request.args.get('format', 'jsonl')
+    flatten = request.args.get('flatten', '0').lower() in ('1', 'true', 'yes')
+
+    try:
+        wifi_export.check_format(fmt)
+        # Período: ?start=...&end=... (ISO 8601) o los últimos ?days=N días
+        end_time = datetime.fromisoformat(request.args['end']) if request.args.get('end') else datetime.now()
+        if request.args.get('start'):
+            start_time = datetime.fromisoformat(request.args['start'])
+        else:
+            days = min(max(request.args.get('days', 1, type=int), 1), app.config['EXPORT_MAX_DAYS'])
+            start_time = end_time - timedelta(days=days)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    if start_time > end_time or end_time - start_time > timedelta(days=app.config['EXPORT_MAX_DAYS']):
+        return jsonify({
+            'success': False,
+            'message': f"El período debe ser de como máximo {app.config['EXPORT_MAX_DAYS']} días"
+        }), 400
+
+    projection = {field: 1 for field in wifi_export.export_fields(flatten)}
+    cursor = (mongo.db.wifi_scans.find({'timestamp': {'$gte': start_time, '$lte': end_time}}, projection)
+              .sort('timestamp', 1).batch_size(app.config['EXPORT_CURSOR_BATCH']))
+
+    def generate():
+        # Los lotes se envían a medida que se leen del cursor (respuesta por trozos)
+        try:
+            yield from wifi_export.export_scans(cursor, fmt, flatten)
+        finally:
+            cursor.close()
+
+    filename = wifi_export.export_filename(start_time, end_time, fmt, flatten)
+    return Response(generate(), mimetype=wifi_export.MIME_TYPES[fmt], headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no'
+    })
+
 # Ejecutar la aplicación
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8000, debug=True)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark del conteo de canales y bandas.
+Compara la ruta original (get_scans_in_timeframe + conteo en Python) con las
+agregaciones wifi_db.channel_histogram y wifi_db.band_counts. Mide el tiempo
+total y los bytes enviados por el servidor (serverStatus.network.bytesOut).
+
+Necesita un MongoDB accesible; usa una base de datos temporal que se elimina
+al terminar (salvo con --keep).
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pymongo import MongoClient
+import wifi_db
+import wifi_indexes
+import wifi_parser
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures', 'iwlist_scan.txt')
+
+
+def build_scans(count, interval=60):
+    """Genera `count` escaneos sintéticos (uno cada `interval` segundos) a partir del fixture."""
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        base = wifi_parser.parse_iwlist_scan(f.read())
+
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(seconds=count * interval)
+    scans = []
+    for i in range(count):
+        networks = []
+        # Entre 15 y 30 redes por escaneo, con la señal variando
+        for j in range(rng.randint(15, 30)):
+            network = dict(base[j % len(base)])
+            network['mac'] = f"02:00:00:00:{j >> 8:02X}:{j & 0xFF:02X}"
+            network['signal'] = network['signal'] + rng.randint(-5, 5)
+            networks.append(network)
+        scans.append({
+            "timestamp": start + timedelta(seconds=i * interval),
+            "networks": networks,
+            "total_networks": len(networks),
+        })
+    return scans
+
+
+def legacy_counts(collection, start_time, end_time):
+    """Ruta original de wifi_trends: documentos completos y conteo en Python."""
+    query = {"timestamp": {"$gte": start_time, "$lte": end_time}}
+    scans = list(collection.find(query).sort("timestamp", 1))
+
+    channel_counts = []
+    band_counts = []
+    for scan in scans:
+        channels_2g = {i: 0 for i in range(1, 15)}
+        channels_5g = {}
+        for network in scan['networks']:
+            channel = network.get('channel')
+            if channel:
+                if channel <= 14:
+                    channels_2g[channel] = channels_2g.get(channel, 0) + 1
+                else:
+                    channels_5g[channel] = channels_5g.get(channel, 0) + 1
+        channel_counts.append((scan['timestamp'], channels_2g, channels_5g))
+        band_counts.append((scan['timestamp'], len(scan['networks']), sum(channels_2g.values()),
+                            sum(channels_5g.values())))
+    return channel_counts, band_counts
+
+
+def pipeline_counts(collection, start_time, end_time, bucket):
+    """Ruta nueva: agregaciones en el servidor."""
+    return (wifi_db.channel_histogram(collection, start_time, end_time, bucket),
+            wifi_db.band_counts(collection, start_time, end_time, bucket))
+
+
+def measure(client, func, *args):
+    """Ejecuta func y devuelve (segundos, bytes enviados por el servidor)."""
+    before = client.admin.command("serverStatus")["network"]["bytesOut"]
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    after = client.admin.command("serverStatus")["network"]["bytesOut"]
+    return elapsed, after - before
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Benchmark de conteo de canales en MongoDB')
+    parser.add_argument('--mongo-host', type=str, default='localhost', help='Host de MongoDB')
+    parser.add_argument('--mongo-port', type=int, default=27017, help='Puerto de MongoDB')
+    parser.add_argument('--scans', type=int, default=10080, help='Escaneos sintéticos (10080 = 7 días a 1/min)')
+    parser.add_argument('--keep', action='store_true', help='No eliminar la base de datos temporal')
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_host, args.mongo_port, serverSelectionTimeoutMS=5000)
+    database = client["wifi_analyzer_bench"]
+    collection = database["wifi_scans"]
+
+    try:
+        if collection.estimated_document_count() != args.scans:
+            collection.drop()
+            print(f"Insertando {args.scans} escaneos sintéticos...")
+            scans = build_scans(args.scans)
+            for i in range(0, len(scans), 1000):
+                collection.insert_many(scans[i:i + 1000])
+        wifi_indexes.ensure_indexes(collection)
+
+        end_time = datetime.now()
+        print(f"{'período':>8} {'ruta':>10} {'tiempo (ms)':>12} {'bytes':>12}")
+        for days, bucket in ((1, None), (1, 60), (7, 3600)):
+            start_time = end_time - timedelta(days=days)
+            label = f"{days}d/{bucket or 'scan'}"
+            t_old, b_old = measure(client, legacy_counts, collection, start_time, end_time)
+            t_new, b_new = measure(client, pipeline_counts, collection, start_time, end_time, bucket)
+            print(f"{label:>8} {'original':>10} {t_old * 1000:>12.1f} {b_old:>12}")
+            print(f"{'':>8} {'pipeline':>10} {t_new * 1000:>12.1f} {b_new:>12}"
+                  f"  ({t_old / t_new:.1f}x tiempo, {b_old / max(b_new, 1):.0f}x bytes)")
+    finally:
+        if not args.keep:
+            client.drop_database("wifi_analyzer_bench")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Verificación de memoria de WiFiDB.iter_scans.
+Mide el pico de RSS de un proceso que recorre los escaneos de rangos cada vez
+más largos, comparando get_scans_in_timeframe (list) con iter_scans (cursor).
+Con iter_scans el pico debe mantenerse plano aunque el rango crezca; si crece
+más de --tolerance, el script termina con código 1.
+
+Necesita un MongoDB accesible; usa la base de datos temporal de
+bench_channel_counts.py, que se elimina al terminar (salvo con --keep).
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pymongo import MongoClient
+from bench_channel_counts import build_scans
+import wifi_db
+
+BENCH_DB = "wifi_analyzer_bench"
+
+
+def child(mode, days, host, port):
+    """Recorre los escaneos de `days` días e imprime el pico de RSS en MB."""
+    db = wifi_db.WiFiDB(host=host, port=port, db_name=BENCH_DB)
+    start_time = datetime.now() - timedelta(days=days)
+
+    if mode == "list":
+        scans = db.get_scans_in_timeframe(start_time)
+        count = sum(len(scan["networks"]) for scan in scans)
+    else:
+        count = sum(len(scan["networks"]) for scan in db.iter_scans(start_time, fields=["timestamp", "networks"]))
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"RESULT {count} {peak_mb:.1f}")
+
+
+def run_child(mode, days, args):
+    """Ejecuta child() en un proceso nuevo (el pico de RSS no baja dentro de un proceso)."""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode, str(days),
+         "--mongo-host", args.mongo_host, "--mongo-port", str(args.mongo_port)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    line = [l for l in output.splitlines() if l.startswith("RESULT ")][-1]
+    _, count, peak_mb = line.split()
+    return int(count), float(peak_mb)
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Pico de memoria de iter_scans frente a list()')
+    parser.add_argument('--mongo-host', type=str, default='localhost', help='Host de MongoDB')
+    parser.add_argument('--mongo-port', type=int, default=27017, help='Puerto de MongoDB')
+    parser.add_argument('--scans', type=int, default=43200, help='Escaneos sintéticos (43200 = 30 días a 1/min)')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Crecimiento máximo admitido del pico de RSS de iter_scans (fracción)')
+    parser.add_argument('--keep', action='store_true', help='No eliminar la base de datos temporal')
+    parser.add_argument('--child', nargs=2, metavar=('MODO', 'DIAS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], float(args.child[1]), args.mongo_host, args.mongo_port)
+        return
+
+    client = MongoClient(args.mongo_host, args.mongo_port, serverSelectionTimeoutMS=5000)
+    collection = client[BENCH_DB]["wifi_scans"]
+    try:
+        if collection.estimated_document_count() != args.scans:
+            collection.drop()
+            print(f"Insertando {args.scans} escaneos sintéticos...")
+            scans = build_scans(args.scans)
+            for i in range(0, len(scans), 1000):
+                collection.insert_many(scans[i:i + 1000])
+            del scans
+
+        total_days = args.scans / 1440
+        print(f"{'días':>6} {'redes':>10} {'list (MB)':>10} {'iter (MB)':>10}")
+        iter_peaks = []
+        for fraction in (0.05, 0.25, 1.0):
+            days = total_days * fraction
+            count, list_mb = run_child("list", days, args)
+            _, iter_mb = run_child("iter", days, args)
+            iter_peaks.append(iter_mb)
+            print(f"{days:>6.1f} {count:>10} {list_mb:>10.1f} {iter_mb:>10.1f}")
+
+        growth = iter_peaks[-1] / iter_peaks[0] - 1
+        if growth > args.tolerance:
+            print(f"ERROR: el pico de RSS de iter_scans creció {growth:.0%} con el rango")
+            sys.exit(1)
+        print(f"OK: el pico de RSS de iter_scans se mantuvo plano ({growth:+.0%})")
+    finally:
+        if not args.keep:
+            client.drop_database(BENCH_DB)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark del parser de iwlist.
+Compara el parser original (re.split + re.search por campo) con
+wifi_parser.parse_iwlist_scan sobre salidas de 10, 100 y 1000 celdas
+construidas a partir de fixtures/iwlist_scan.txt.
+"""
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import wifi_parser
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures', 'iwlist_scan.txt')
+
+
+def legacy_parse(scan_output):
+    """Parser original de wifi_scanner.scan_wifi (sin cálculo de distancia)."""
+    cell_pattern = r'Cell \d+ - Address: ([0-9A-F:]+)'
+    essid_pattern = r'ESSID:"([^"]*)"'
+    channel_pattern = r'Channel:(\d+)'
+    frequency_pattern = r'Frequency:([\d.]+) GHz'
+    signal_pattern = r'Signal level=(-\d+) dBm'
+    quality_pattern = r'Quality=(\d+)/(\d+)'
+    encryption_pattern = r'Encryption key:(on|off)'
+
+    networks = []
+    cells = re.split(cell_pattern, scan_output)[1:]
+    for i in range(0, len(cells), 2):
+        if i+1 < len(cells):
+            info = cells[i+1]
+            essid_match = re.search(essid_pattern, info)
+            channel_match = re.search(channel_pattern, info)
+            frequency_match = re.search(frequency_pattern, info)
+            signal_match = re.search(signal_pattern, info)
+            quality_match = re.search(quality_pattern, info)
+            encryption_match = re.search(encryption_pattern, info)
+            networks.append({
+                'mac': cells[i].strip(),
+                'essid': essid_match.group(1) if essid_match else 'Unknown',
+                'channel': int(channel_match.group(1)) if channel_match else None,
+                'frequency': float(frequency_match.group(1)) if frequency_match else None,
+                'signal': int(signal_match.group(1)) if signal_match else None,
+                'quality': int(quality_match.group(1)) / int(quality_match.group(2)) * 100 if quality_match else None,
+                'encrypted': encryption_match.group(1) == 'on' if encryption_match else None,
+            })
+    return networks
+
+
+def build_output(cell_count):
+    """Replica las celdas del fixture hasta alcanzar cell_count celdas."""
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    cells = re.split(r'(?m)^\s+(?=Cell \d+ - Address:)', text)[1:]
+    lines = ['wlan0     Scan completed :']
+    for i in range(cell_count):
+        cell = cells[i % len(cells)]
+        # Dirección MAC única por celda
+        mac = f"02:00:00:{(i >> 16) & 0xFF:02X}:{(i >> 8) & 0xFF:02X}:{i & 0xFF:02X}"
+        cell = re.sub(r'Cell \d+ - Address: [0-9A-F:]+', f'Cell {i + 1:02d} - Address: {mac}', cell)
+        lines.append('          ' + cell.rstrip('\n'))
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    """Función principal"""
+    print(f"{'celdas':>8} {'original (ms)':>14} {'nuevo (ms)':>12} {'mejora':>8}")
+    for cell_count in (10, 100, 1000):
+        output = build_output(cell_count)
+
+        # Ambos parsers deben coincidir en los campos comunes
+        new = wifi_parser.parse_iwlist_scan(output)
+        old = legacy_parse(output)
+        assert len(new) == len(old) == cell_count
+        for n, o in zip(new, old):
+            assert all(n[key] == o[key] for key in o), (n, o)
+
+        repeat = max(3, 3000 // cell_count)
+        t_old = min(timeit.repeat(lambda: legacy_parse(output), number=1, repeat=repeat)) * 1000
+        t_new = min(timeit.repeat(lambda: wifi_parser.parse_iwlist_scan(output), number=1, repeat=repeat)) * 1000
+        print(f"{cell_count:>8} {t_old:>14.3f} {t_new:>12.3f} {t_old / t_new:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
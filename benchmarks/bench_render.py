@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark del renderizado de gráficos.
+Repite --cycles ciclos de escaneo continuo con --generate-graphs (gráfico de
+canales + lista de redes del fixture) y un gráfico de tendencia de número de
+redes de --trend-points puntos. Compara la ruta original (pyplot, 300 dpi,
+bbox_inches='tight', sin cerrar figuras) con wifi_render en los presets
+'print' y 'preview'. Informa renders por segundo y la RSS cada 100 ciclos;
+cada modo se ejecuta en un proceso nuevo.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+import wifi_frames
+import wifi_parser
+import wifi_render
+import wifi_trends
+import wifi_visualizer
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures', 'iwlist_scan.txt')
+MODES = ("pyplot", "print", "preview")
+
+
+def rss_mb():
+    """RSS actual del proceso en MB (Linux)."""
+    with open('/proc/self/statm') as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def build_frame(points):
+    """TrendFrame sintético de `points` escaneos, uno por minuto."""
+    rng = np.random.default_rng(42)
+    start = int(time.time()) - points * 60
+    total = rng.integers(15, 30, points).astype(wifi_frames.COUNT_DTYPE)
+    count_5g = np.floor(total * 0.3).astype(wifi_frames.COUNT_DTYPE)
+    return wifi_frames.TrendFrame(
+        timestamps=start + np.arange(points, dtype=np.int64) * 60,
+        total=total,
+        count_2g=total - count_5g,
+        count_5g=count_5g,
+    )
+
+
+def legacy_render(networks, frame, output_dir):
+    """Ruta original: pyplot con estado global, 300 dpi, recorte 'tight' y figuras sin cerrar."""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 8))
+    plt.title('Gráfico de Canal WiFi', fontsize=16)
+    plt.ylim(-90, -20)
+    plt.xticks(list(range(1, 15)))
+    for network in networks:
+        channel = network.get('channel')
+        signal = network.get('signal')
+        if channel and channel <= 14 and signal:
+            x = np.linspace(max(1, channel - 2), min(14, channel + 2), 100)
+            plt.fill_between(x, np.ones(100) * -90, np.ones(100) * signal, alpha=0.6)
+            plt.text(channel, signal + 2, network.get('essid'), fontsize=8, ha='center', va='bottom')
+    plt.savefig(os.path.join(output_dir, 'channel.png'), dpi=300, bbox_inches='tight')
+
+    fig, ax = plt.subplots(figsize=(10, len(networks) * 0.4 + 2))
+    ax.axis('off')
+    cell_text = [[n.get('essid'), f"{n.get('signal')} dBm", f"CH {n.get('channel')}", '', ''] for n in networks]
+    table = ax.table(cellText=cell_text, colLabels=['SSID (MAC)', 'Señal', 'Canal', 'Distancia', 'Banda'],
+                     loc='center', cellLoc='left')
+    table.auto_set_font_size(False)
+    table.set_fontsize(9)
+    plt.savefig(os.path.join(output_dir, 'list.png'), dpi=300, bbox_inches='tight')
+
+    if frame is not None:
+        times = frame.times()
+        plt.figure(figsize=(12, 6))
+        plt.plot(times, frame.total, 'o-', color='blue', label='Total')
+        plt.plot(times, frame.count_2g, 'o-', color='green', label='2.4GHz')
+        plt.plot(times, frame.count_5g, 'o-', color='red', label='5GHz')
+        plt.legend()
+        plt.savefig(os.path.join(output_dir, 'trend.png'), dpi=300, bbox_inches='tight')
+
+
+def child(mode, cycles, trend_points, trend_every):
+    """Ejecuta los ciclos de un modo e imprime RSS cada 100 ciclos y renders/s al final."""
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        networks = wifi_parser.parse_iwlist_scan(f.read())
+    frame = build_frame(trend_points) if trend_points else None
+    renderer = None if mode == "pyplot" else wifi_render.Renderer(mode)
+
+    # Silenciar los mensajes "guardado en ..." de cada gráfico
+    stdout = sys.stdout
+    renders = 0
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as output_dir:
+        for cycle in range(1, cycles + 1):
+            trend = frame if frame is not None and cycle % trend_every == 0 else None
+            sys.stdout = open(os.devnull, 'w')
+            try:
+                if renderer is None:
+                    legacy_render(networks, trend, output_dir)
+                else:
+                    wifi_visualizer.plot_channel_graph(networks, os.path.join(output_dir, 'channel.png'), renderer)
+                    wifi_visualizer.plot_network_list(networks, os.path.join(output_dir, 'list.png'), renderer)
+                    if trend is not None:
+                        wifi_trends.generate_network_count_trend(None, 30, os.path.join(output_dir, 'trend.png'),
+                                                                 trend, renderer)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            renders += 2 + (trend is not None)
+            if cycle % 100 == 0 or cycle == cycles:
+                print(f"RSS {cycle} {rss_mb():.1f}", flush=True)
+    elapsed = time.perf_counter() - start
+    print(f"RESULT {renders} {elapsed:.3f}")
+
+
+def run_child(mode, args):
+    """Ejecuta child() en un proceso nuevo y devuelve (renders/s, [(ciclo, RSS MB)])."""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode,
+         "--cycles", str(args.cycles), "--trend-points", str(args.trend_points),
+         "--trend-every", str(args.trend_every)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    rss = []
+    result = None
+    for line in output.splitlines():
+        if line.startswith("RSS "):
+            _, cycle, mb = line.split()
+            rss.append((int(cycle), float(mb)))
+        elif line.startswith("RESULT "):
+            _, renders, elapsed = line.split()
+            result = int(renders) / float(elapsed)
+    return result, rss
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Benchmark de renderizado de gráficos')
+    parser.add_argument('--cycles', type=int, default=1000, help='Ciclos de escaneo simulados')
+    parser.add_argument('--trend-points', type=int, default=43200,
+                        help='Puntos del gráfico de tendencia (43200 = 30 días a 1/min; 0 lo desactiva)')
+    parser.add_argument('--trend-every', type=int, default=50, help='Ciclos entre gráficos de tendencia')
+    parser.add_argument('--modes', type=str, default=','.join(MODES),
+                        help=f"Modos separados por comas ({', '.join(MODES)})")
+    parser.add_argument('--child', type=str, choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.cycles, args.trend_points, args.trend_every)
+        return
+
+    print(f"{'modo':>8} {'renders/s':>10} {'RSS inicial':>12} {'RSS final':>10} {'crecimiento':>12}")
+    for mode in args.modes.split(','):
+        rate, rss = run_child(mode, args)
+        first, last = rss[0][1], rss[-1][1]
+        print(f"{mode:>8} {rate:>10.2f} {first:>11.1f}M {last:>9.1f}M {last - first:>+11.1f}M")
+        for cycle, mb in rss:
+            print(f"{'':>8} ciclo {cycle:>5}: {mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark del registro binario de escaneos (wifi_scanlog).
+Escribe --scans escaneos sintéticos (las redes del fixture con la señal variando,
+uno por minuto) como un archivo JSON indentado por escaneo (formato original) y
+en el registro binario con cada códec. Informa bytes por escaneo, latencia de
+escritura (p50/p99 y máxima, que con compresión incluye el bloque que se cierra),
+el tiempo para encontrar el último escaneo y para leer una hora de escaneos.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import wifi_parser
+import wifi_scanlog
+import wifi_scanner
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures', 'iwlist_scan.txt')
+
+
+def build_scans(networks, count, seed=42):
+    """Genera `count` escaneos (timestamp, redes) uno por minuto con la señal variando ±3 dBm."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    scans = []
+    for i in range(count):
+        scan = []
+        for network in networks:
+            network = dict(network)
+            network['signal'] = network['signal'] + rng.randint(-3, 3)
+            network['distance'] = wifi_scanner.calculate_distance(network['signal'])
+            scan.append(network)
+        scans.append((start + timedelta(minutes=i), scan))
+    return scans
+
+
+def percentile(values, fraction):
+    """Percentil de una lista ya ordenada."""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def directory_size(directory):
+    """Bytes de todos los archivos de un directorio."""
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+
+def write_json(scans, directory):
+    """Ruta original: un archivo wifi_scan_<fecha>.json con indent=2 por escaneo."""
+    latencies = []
+    for timestamp, networks in scans:
+        filename = os.path.join(directory, f"wifi_scan_{timestamp.strftime('%Y%m%d_%H%M%S')}.json")
+        start = time.perf_counter()
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(networks, f, indent=2)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def latest_json(directory):
+    """Último escaneo del formato original: listar, ordenar y leer el más reciente."""
+    files = sorted(f for f in os.listdir(directory) if f.startswith('wifi_scan_') and f.endswith('.json'))
+    with open(os.path.join(directory, files[-1]), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_hour_json(directory, start):
+    """Una hora de escaneos del formato original (filtrando por el nombre de cada archivo)."""
+    end = start + timedelta(hours=1)
+    scans = []
+    for name in sorted(os.listdir(directory)):
+        timestamp = datetime.strptime(name[len('wifi_scan_'):-len('.json')], "%Y%m%d_%H%M%S")
+        if start <= timestamp <= end:
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                scans.append(json.load(f))
+    return scans
+
+
+def write_scanlog(scans, directory, codec):
+    """Anexa los escaneos al registro binario y devuelve la latencia de cada append."""
+    latencies = []
+    with wifi_scanlog.ScanLog(directory, codec, retention_days=0) as scanlog:
+        for timestamp, networks in scans:
+            start = time.perf_counter()
+            scanlog.append(networks, timestamp)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def timed(func, *args):
+    """Tiempo en ms de una llamada."""
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Benchmark del registro binario de escaneos')
+    parser.add_argument('--scans', type=int, default=10080, help='Escaneos a escribir (10080 = una semana a 1/min)')
+    args = parser.parse_args()
+
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        networks = wifi_parser.parse_iwlist_scan(f.read())
+    scans = build_scans(networks, args.scans)
+    hour = scans[len(scans) // 2][0]
+
+    formats = ['json'] + [codec for codec in wifi_scanlog.CODECS
+                          if codec != 'zstd' or wifi_scanlog.ZSTD_AVAILABLE]
+    print(f"{args.scans} escaneos de {len(networks)} redes")
+    print(f"{'formato':>8} {'archivos':>9} {'B/escaneo':>10} {'p50 (µs)':>9} {'p99 (µs)':>9} {'máx (ms)':>9} "
+          f"{'último (ms)':>12} {'1 hora (ms)':>12}")
+    for name in formats:
+        with tempfile.TemporaryDirectory() as directory:
+            if name == 'json':
+                latencies = write_json(scans, directory)
+                t_latest = timed(latest_json, directory)
+                t_hour = timed(read_hour_json, directory, hour)
+            else:
+                latencies = write_scanlog(scans, directory, name)
+                scanlog = wifi_scanlog.ScanLog(directory, retention_days=0)
+                t_latest = timed(scanlog.latest_scan)
+                t_hour = timed(lambda: list(scanlog.iter_scans(hour, hour + timedelta(hours=1))))
+
+            latencies.sort()
+            print(f"{name:>8} {len(os.listdir(directory)):>9} {directory_size(directory) / args.scans:>10.1f} "
+                  f"{percentile(latencies, 0.5) * 1e6:>9.1f} {percentile(latencies, 0.99) * 1e6:>9.1f} "
+                  f"{latencies[-1] * 1000:>9.2f} {t_latest:>12.2f} {t_hour:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
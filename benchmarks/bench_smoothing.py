@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark del suavizado incremental de señal (wifi_smoothing).
+Genera series sintéticas de RSSI por BSSID (una señal real que deriva y cambia
+de nivel, más ruido gaussiano y caídas por multitrayecto) y compara el error
+cuadrático medio frente a la señal real de la medición cruda, el EWMA y el
+filtro de Kalman. También mide las actualizaciones por segundo de
+SignalSmoother.smooth con escaneos de muchas redes. Termina con código 1 si el
+filtro de Kalman no mejora la medición cruda.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import wifi_smoothing
+
+
+def synthetic_stream(rng, points, interval, noise):
+    """
+    Genera una serie sintética de un BSSID.
+
+    Args:
+        rng (Random): Generador de números aleatorios
+        points (int): Mediciones de la serie
+        interval (float): Segundos entre escaneos
+        noise (float): Desviación típica del ruido de medición (dB)
+
+    Returns:
+        tuple: (timestamps, señal real, mediciones) con las mediciones redondeadas a dBm enteros
+    """
+    start = datetime(2024, 1, 1)
+    level = rng.uniform(-80, -40)
+    timestamps, truth, measured = [], [], []
+    for i in range(points):
+        # Deriva lenta y, de vez en cuando, un cambio de nivel (alguien mueve el equipo)
+        level += rng.gauss(0, 0.05 * math.sqrt(interval))
+        if rng.random() < 0.002:
+            level += rng.choice((-1, 1)) * rng.uniform(5, 12)
+        level = min(-30.0, max(-90.0, level))
+
+        value = level + rng.gauss(0, noise)
+        if rng.random() < 0.03:
+            # Caída breve por multitrayecto
+            value -= rng.uniform(8, 15)
+
+        timestamps.append(start + timedelta(seconds=i * interval))
+        truth.append(level)
+        measured.append(round(value))
+    return timestamps, truth, measured
+
+
+def rmse(values, truth):
+    """Error cuadrático medio entre dos series."""
+    return math.sqrt(sum((v - t) ** 2 for v, t in zip(values, truth)) / len(truth))
+
+
+def accuracy(streams, points, interval, noise, seed):
+    """Devuelve el RMSE medio (cruda, EWMA, Kalman) sobre `streams` series sintéticas."""
+    rng = random.Random(seed)
+    totals = {"cruda": 0.0, "ewma": 0.0, "kalman": 0.0}
+    for _ in range(streams):
+        timestamps, truth, measured = synthetic_stream(rng, points, interval, noise)
+        state = None
+        ewma, kalman = [], []
+        for timestamp, value in zip(timestamps, measured):
+            state = wifi_smoothing.update_state(state, value, timestamp)
+            ewma.append(state["ewma"])
+            kalman.append(state["estimate"])
+        totals["cruda"] += rmse(measured, truth)
+        totals["ewma"] += rmse(ewma, truth)
+        totals["kalman"] += rmse(kalman, truth)
+    return {name: total / streams for name, total in totals.items()}
+
+
+def throughput(networks_per_scan, scans, interval, seed):
+    """Devuelve actualizaciones por segundo de SignalSmoother.smooth (estados en memoria)."""
+    rng = random.Random(seed)
+    smoother = wifi_smoothing.SignalSmoother()
+    macs = [f"02:00:00:00:{i >> 8:02X}:{i & 0xFF:02X}" for i in range(networks_per_scan)]
+    start = datetime(2024, 1, 1)
+    scan_list = [
+        (start + timedelta(seconds=i * interval),
+         [{"mac": mac, "signal": rng.randint(-90, -30)} for mac in macs])
+        for i in range(scans)
+    ]
+
+    begin = time.perf_counter()
+    for timestamp, networks in scan_list:
+        smoother.smooth(networks, timestamp)
+    elapsed = time.perf_counter() - begin
+    return networks_per_scan * scans / elapsed
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Benchmark del suavizado incremental de señal')
+    parser.add_argument('--streams', type=int, default=200, help='Series sintéticas para medir la precisión')
+    parser.add_argument('--points', type=int, default=2000, help='Mediciones por serie')
+    parser.add_argument('--interval', type=float, default=10, help='Segundos entre escaneos')
+    parser.add_argument('--noise', type=float, default=4, help='Desviación típica del ruido (dB)')
+    parser.add_argument('--networks', type=int, default=200, help='Redes por escaneo para medir el rendimiento')
+    parser.add_argument('--scans', type=int, default=500, help='Escaneos para medir el rendimiento')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla de los datos sintéticos')
+    args = parser.parse_args()
+
+    errors = accuracy(args.streams, args.points, args.interval, args.noise, args.seed)
+    print(f"RMSE frente a la señal real ({args.streams} series de {args.points} puntos, ruido {args.noise} dB):")
+    for name, error in errors.items():
+        print(f"  {name:>7}: {error:.2f} dB")
+
+    rate = throughput(args.networks, args.scans, args.interval, args.seed)
+    print(f"Rendimiento: {rate:,.0f} actualizaciones/s ({args.networks} redes x {args.scans} escaneos)")
+
+    if errors["kalman"] >= errors["cruda"]:
+        print("ERROR: el filtro de Kalman no mejora la medición cruda")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
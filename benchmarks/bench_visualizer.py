@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de wifi_visualizer con 50, 200 y 500 redes sintéticas.
+Compara el gráfico de canales original (fill_between + text por red, solo
+2.4GHz) con la PolyCollection única de plot_channel_graph, y la tabla única
+original (altura proporcional a todas las redes) con la lista paginada de
+plot_network_list y su salida HTML. Informa el tiempo por render y el tamaño
+de los PNG generados.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import wifi_render
+import wifi_visualizer
+
+CHANNELS_5G = sorted(wifi_visualizer.CHANNEL_COLORS_5G)
+
+
+def build_networks(count, seed=42):
+    """Genera `count` redes sintéticas (70% en 2.4GHz y 30% en 5GHz)."""
+    rng = random.Random(seed)
+    networks = []
+    for i in range(count):
+        channel = rng.randint(1, 13) if rng.random() < 0.7 else rng.choice(CHANNELS_5G)
+        networks.append({
+            "essid": f"Red-{i:03d}",
+            "mac": f"02:00:00:00:{i >> 8:02X}:{i & 0xFF:02X}",
+            "channel": channel,
+            "frequency": 2.412 + (channel - 1) * 0.005 if channel <= 14 else 5.0 + channel * 0.005,
+            "signal": rng.randint(-88, -30),
+            "distance": round(rng.uniform(1, 60), 2),
+        })
+    return networks
+
+
+def legacy_channel_graph(networks, output_file, dpi):
+    """Gráfico de canales original: tres arreglos de 100 puntos, fill_between y text por red."""
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+    ax.set_ylim(-90, -20)
+    ax.set_xticks(list(range(1, 15)))
+    for network in networks:
+        channel = network['channel']
+        signal = network['signal']
+        if channel <= 14:
+            x = np.linspace(max(1, channel - 2), min(14, channel + 2), 100)
+            color = wifi_visualizer.CHANNEL_COLORS_2G.get(channel, '#AAAAAA')
+            ax.fill_between(x, np.ones(100) * -90, np.ones(100) * signal, alpha=0.6, color=color)
+            ax.text(channel, signal + 2, network['essid'], fontsize=8, ha='center', va='bottom', color=color)
+    fig.savefig(output_file, dpi=dpi, bbox_inches='tight')
+
+
+def legacy_network_list(networks, output_file, dpi):
+    """Lista de redes original: una sola tabla con la altura de todas las redes."""
+    fig = Figure(figsize=(10, len(networks) * 0.4 + 2))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+    ax.axis('off')
+    rows = [cells for cells, _ in wifi_visualizer._network_rows(networks)]
+    table = ax.table(cellText=rows, colLabels=wifi_visualizer.NETWORK_LIST_COLUMNS, loc='center', cellLoc='left')
+    table.auto_set_font_size(False)
+    table.set_fontsize(9)
+    table.scale(1, 1.5)
+    fig.savefig(output_file, dpi=dpi, bbox_inches='tight')
+
+
+def timed(repeat, func, *args):
+    """Mejor tiempo (ms) de `repeat` ejecuciones, con la salida estándar silenciada."""
+    best = float('inf')
+    stdout = sys.stdout
+    for _ in range(repeat):
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            start = time.perf_counter()
+            func(*args)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+    return best * 1000
+
+
+def files_size(directory, prefix):
+    """Suma en KB de los archivos de `directory` que empiezan por `prefix`."""
+    return sum(os.path.getsize(os.path.join(directory, name))
+               for name in os.listdir(directory) if name.startswith(prefix)) / 1024
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Benchmark de wifi_visualizer con redes sintéticas')
+    parser.add_argument('--sizes', type=str, default='50,200,500', help='Cantidades de redes separadas por comas')
+    parser.add_argument('--quality', type=str, choices=sorted(wifi_render.QUALITY_PRESETS),
+                        default=wifi_render.DEFAULT_QUALITY, help='Preset de calidad')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por medición (se toma la mejor)')
+    args = parser.parse_args()
+
+    renderer = wifi_render.Renderer(args.quality)
+    print(f"{'redes':>6} {'gráfico':>10} {'original (ms)':>14} {'nuevo (ms)':>11} {'original (KB)':>14} {'nuevo (KB)':>11}")
+    for count in (int(size) for size in args.sizes.split(',')):
+        networks = build_networks(count)
+        with tempfile.TemporaryDirectory() as output_dir:
+            def path(name):
+                return os.path.join(output_dir, name)
+
+            t_old = timed(args.repeat, legacy_channel_graph, networks, path('old_channel.png'), renderer.dpi)
+            t_new = timed(args.repeat, wifi_visualizer.plot_channel_graph, networks, path('new_channel.png'), renderer)
+            print(f"{count:>6} {'canales':>10} {t_old:>14.1f} {t_new:>11.1f} "
+                  f"{files_size(output_dir, 'old_channel'):>14.0f} {files_size(output_dir, 'new_channel'):>11.0f}")
+
+            t_old = timed(args.repeat, legacy_network_list, networks, path('old_list.png'), renderer.dpi)
+            t_new = timed(args.repeat, wifi_visualizer.plot_network_list, networks, path('new_list.png'), renderer)
+            t_html = timed(args.repeat, wifi_visualizer.plot_network_list, networks, path('new_list.html'))
+            print(f"{'':>6} {'lista':>10} {t_old:>14.1f} {t_new:>11.1f} "
+                  f"{files_size(output_dir, 'old_list'):>14.0f} {files_size(output_dir, 'new_list_p') + files_size(output_dir, 'new_list.png'):>11.0f}")
+            print(f"{'':>6} {'lista html':>10} {'':>14} {t_html:>11.1f} {'':>14} {files_size(output_dir, 'new_list.html'):>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
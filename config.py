@@ -16,14 +16,38 @@ class Config:
     # Configuración de MongoDB
     MONGO_URI = os.environ.get('MONGO_URI') or 'mongodb://localhost:27017/wifi_analyzer'
     MONGO_DBNAME = 'wifi_analyzer'
+    # 'embedded' o 'both': con 'both' cada escaneo también se guarda como muestras por BSSID
+    SAMPLE_STORAGE = os.environ.get('MONGO_SAMPLE_STORAGE') or 'embedded'
 
     # Configuración de escaneo WiFi
     DEFAULT_SCAN_INTERVAL = 60  # segundos
     DEFAULT_SCAN_COUNT = 1
+    SCAN_BACKEND = os.environ.get('WIFI_SCAN_BACKEND') or 'iwlist'  # 'iwlist', 'iw' o 'helper'
+    SCAN_JOB_MAX_WAIT = 30  # segundos máximos de espera en /api/scan/jobs/<id>?wait=N
 
     # Configuración de la interfaz
     ITEMS_PER_PAGE = 10
+    HISTORY_SHALLOW_PAGES = 5  # páginas del historial que se pueden pedir por número
+    SCAN_COUNT_TTL = 30  # segundos que se reutiliza el total estimado de escaneos
+    API_MAX_PAGE_SIZE = 100  # escaneos máximos por página en /api/scans
     MAX_NETWORKS_IN_CHART = 10
+    STREAM_POLL_INTERVAL = 2  # segundos entre consultas del último escaneo para /api/stream
+    STREAM_KEEPALIVE = 15  # segundos sin eventos antes de enviar un keepalive SSE
+
+    # Caché de imágenes de tendencias (/api/trends/<gráfico>.png)
+    RENDER_CACHE_DIR = os.environ.get('WIFI_RENDER_CACHE_DIR') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'wifi_analyzer', 'renders')
+    RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    TREND_IMAGE_QUALITY = 'preview'  # 'preview' (100 dpi) o 'print' (300 dpi)
+    TREND_MAX_DAYS = 90
+
+    # Exportación en streaming (/api/export)
+    EXPORT_MAX_DAYS = 365
+    EXPORT_CURSOR_BATCH = 100  # escaneos por lote que se piden a MongoDB
+
+    # Retención (ver wifi_retention): días de escaneos completos y segundos entre compactaciones
+    RAW_RETENTION_DAYS = int(os.environ.get('MONGO_RAW_RETENTION_DAYS') or 0)
+    RETENTION_COMPACTION_INTERVAL = 6 * 3600
 
     # Configuración de zona horaria
     TIMEZONE = 'America/Argentina/Buenos_Aires'  # Zona horaria para Argentina (UTC-3)
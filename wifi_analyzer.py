@@ -12,9 +12,14 @@ import time
 import subprocess
 from datetime import datetime, timedelta
 import wifi_scanner
+import wifi_backends
+import wifi_export
+import wifi_scanlog
+import wifi_scheduler
 
 # Intentar importar el módulo de visualización, pero continuar si no está disponible
 try:
+    import wifi_render
     import wifi_visualizer
     VISUALIZER_AVAILABLE = True
 except ImportError:
@@ -24,6 +29,9 @@ except ImportError:
 # Intentar importar el módulo de base de datos, pero continuar si no está disponible
 try:
     import wifi_db
+    import wifi_indexes
+    import wifi_retention
+    import wifi_rollups
     DB_AVAILABLE = True
 except ImportError:
     print("ADVERTENCIA: No se pudo importar el módulo de base de datos. El almacenamiento en MongoDB no estará disponible.")
@@ -31,19 +39,32 @@ except ImportError:
 
 # Intentar importar el módulo de tendencias, pero continuar si no está disponible
 try:
+    import wifi_archive
+    import wifi_cache
+    import wifi_render
     import wifi_trends
     TRENDS_AVAILABLE = True
 except ImportError:
     print("ADVERTENCIA: No se pudo importar el módulo de tendencias. El análisis de tendencias no estará disponible.")
     TRENDS_AVAILABLE = False
 
-def ensure_wifi_interface_up():
+def ensure_wifi_interface_up(backend=None):
     """
     Asegura que la interfaz WiFi esté activa.
 
+    Args:
+        backend (str, optional): Backend de escaneo usado para el escaneo de prueba
+
     Returns:
         bool: True si la interfaz está activa, False en caso contrario
     """
+    scan_backend = wifi_backends.get_backend(backend)
+
+    # El helper persistente ya es dueño de la interfaz; basta con comprobar que responde
+    if isinstance(scan_backend, wifi_backends.HelperBackend):
+        print("Verificando el helper de escaneo...")
+        return scan_backend.test_scan()
+
     try:
         # Verificar si la interfaz existe
         print("Verificando interfaces WiFi disponibles...")
@@ -85,20 +106,9 @@ def ensure_wifi_interface_up():
                                capture_output=True, text=True, check=True)
         print(f"Estado de la interfaz:\n{link_result.stdout}")
 
-        # Probar un escaneo directamente
+        # Probar un escaneo directamente con el backend seleccionado
         print("Intentando escaneo de prueba...")
-        try:
-            scan_result = subprocess.run(["sudo", "iwlist", "wlan0", "scan"],
-                                  capture_output=True, text=True, check=True, timeout=10)
-            print("Escaneo de prueba exitoso.")
-            return True
-        except subprocess.CalledProcessError as scan_error:
-            print(f"Error en el escaneo de prueba: {scan_error}")
-            print(f"Salida del error: {scan_error.stderr}")
-            return False
-        except subprocess.TimeoutExpired:
-            print("El escaneo de prueba tardó demasiado tiempo. Puede que la interfaz esté ocupada.")
-            return False
+        return scan_backend.test_scan()
 
     except subprocess.CalledProcessError as e:
         print(f"Error al activar la interfaz WiFi: {e}")
@@ -108,10 +118,74 @@ def ensure_wifi_interface_up():
         print(f"Error inesperado: {e}")
         return False
 
-def continuous_scan(interval, count, output_dir=None, db=None, use_json=True, generate_graphs=False):
+def _store_scan(networks, timestamp, scan_number, db, metadata, json_file, scanlog=None):
+    """
+    Persiste un escaneo (MongoDB, registro binario y/o JSON). Se ejecuta en la cola de trabajo.
+
+    Args:
+        networks (list): Lista de redes WiFi
+        timestamp (datetime): Momento del escaneo
+        scan_number (int): Número de escaneo dentro de la sesión
+        db (WiFiDB, optional): Instancia de WiFiDB
+        metadata (dict): Metadatos del escaneo
+        json_file (str, optional): Ruta del archivo JSON a escribir
+        scanlog (ScanLog, optional): Registro binario de escaneos
+    """
+    # Guardar en MongoDB si está disponible (save_scan verifica la conexión o usa su búfer)
+    if db:
+        scan_id = db.save_scan(networks, metadata=metadata, timestamp=timestamp)
+        if scan_id:
+            print(f"Escaneo #{scan_number} guardado en MongoDB con ID: {scan_id}")
+
+    # Anexar al registro binario (un solo hilo de trabajo escribe en él)
+    if scanlog:
+        scanlog.append(networks, timestamp, metadata)
+        print(f"Escaneo #{scan_number} guardado en el registro {scanlog.directory}")
+
+    # Guardar resultados en archivo JSON si se solicitó
+    if json_file:
+        wifi_scanner.save_scan_results(networks, json_file)
+        print(f"Escaneo #{scan_number} guardado en archivo JSON: {json_file}")
+
+def _render_scan_graphs(networks, channel_graph_file, network_list_file, renderer=None):
+    """
+    Genera los gráficos PNG de un escaneo. Se ejecuta en la cola de trabajo.
+
+    Args:
+        networks (list): Lista de redes WiFi
+        channel_graph_file (str): Ruta del gráfico de canales
+        network_list_file (str): Ruta de la lista de redes
+        renderer (Renderer, optional): Renderizador (reutiliza sus plantillas entre escaneos)
+    """
+    saved = wifi_visualizer.plot_channel_graph(networks, channel_graph_file, renderer)
+    saved += wifi_visualizer.plot_network_list(networks, network_list_file, renderer)
+    print(f"Gráficos guardados: {', '.join(saved)}")
+
+def _print_session_stats(db, start_time, scan_count):
+    """
+    Muestra estadísticas básicas de la sesión. Se ejecuta en la cola de trabajo.
+
+    Args:
+        db (WiFiDB): Instancia de WiFiDB
+        start_time (datetime): Inicio de la sesión
+        scan_count (int): Escaneos realizados hasta el momento
+    """
+    if not db.is_connected():
+        return
+    total_networks = db.collection.count_documents({"timestamp": {"$gte": start_time}})
+    unique_networks = len(db.collection.distinct("networks.essid", {"timestamp": {"$gte": start_time}}))
+    print(f"Estadísticas: {scan_count} escaneos, {total_networks} redes detectadas, {unique_networks} redes únicas")
+
+def continuous_scan(interval, count, output_dir=None, db=None, use_json=True, generate_graphs=False, backend=None,
+                    queue_size=8, graph_quality='preview', list_format='png', scanlog=None,
+                    compaction_interval=0):
     """
     Realiza escaneos continuos de redes WiFi.
 
+    Los escaneos se disparan en ticks fijos del reloj monotónico (sin deriva).
+    El guardado, los gráficos y las estadísticas se envían a una cola de trabajo
+    acotada, de modo que la cadencia de escaneo nunca espera por ellos.
+
     Args:
         interval (int): Intervalo entre escaneos en segundos
         count (int): Número de escaneos a realizar (0 para infinito)
@@ -119,15 +193,38 @@ def continuous_scan(interval, count, output_dir=None, db=None, use_json=True, ge
         db (WiFiDB, optional): Instancia de WiFiDB para guardar en MongoDB
         use_json (bool): Si es True, guarda los resultados en archivos JSON
         generate_graphs (bool): Si es True, genera gráficos PNG
+        backend (str, optional): Backend de escaneo ('iwlist' o 'iw')
+        queue_size (int): Máximo de trabajos pendientes en la cola de trabajo
+        graph_quality (str): Preset de calidad de los gráficos ('preview' o 'print')
+        list_format (str): Formato de la lista de redes ('png' paginado o 'html')
+        scanlog (ScanLog, optional): Registro binario donde anexar los escaneos (se cierra al terminar)
+        compaction_interval (float): Segundos entre compactaciones de MongoDB (retención de
+            escaneos y rollups); 0 para no compactar durante la sesión
     """
     if output_dir and (use_json or generate_graphs):
         os.makedirs(output_dir, exist_ok=True)
 
+    renderer = None
+    if generate_graphs and not VISUALIZER_AVAILABLE:
+        print("No se generarán gráficos porque el módulo de visualización no está disponible.")
+        generate_graphs = False
+    elif generate_graphs:
+        # Un solo renderizador para toda la sesión: las figuras se reutilizan en cada escaneo
+        # y se dibujan con el backend Agg, sin pyplot, desde el hilo de trabajo
+        renderer = wifi_render.Renderer(graph_quality)
+
     scan_count = 0
     start_time = datetime.now()
+    last_compaction = time.monotonic()
+    scheduler = wifi_scheduler.TickScheduler(interval)
+    workers = wifi_scheduler.WorkerQueue(maxsize=queue_size)
 
     try:
         while count == 0 or scan_count < count:
+            missed = scheduler.wait_next()
+            if missed:
+                print(f"ADVERTENCIA: Se perdieron {missed} ticks (total: {scheduler.missed_ticks}); el escaneo tardó más que el intervalo.")
+
             current_time = datetime.now()
             elapsed_time = current_time - start_time
             elapsed_seconds = elapsed_time.total_seconds()
@@ -138,100 +235,92 @@ def continuous_scan(interval, count, output_dir=None, db=None, use_json=True, ge
             timestamp = current_time.strftime("%Y%m%d_%H%M%S")
 
             # Realizar escaneo
-            networks = wifi_scanner.scan_wifi()
+            networks = wifi_scanner.scan_wifi(backend)
 
             if networks:
-                # Guardar en MongoDB si está disponible
-                if db and db.is_connected():
-                    metadata = {
-                        "source": "continuous_scan",
-                        "scan_number": scan_count + 1,
-                        "interval": interval,
-                        "start_time": start_time.isoformat()
-                    }
-                    scan_id = db.save_scan(networks, metadata=metadata)
-                    if scan_id:
-                        print(f"Datos guardados en MongoDB con ID: {scan_id}")
-
-                # Guardar resultados en archivo JSON si se solicitó
+                metadata = {
+                    "source": "continuous_scan",
+                    "scan_number": scan_count + 1,
+                    "interval": interval,
+                    "start_time": start_time.isoformat()
+                }
+
+                json_file = None
                 if use_json:
                     if output_dir:
                         json_file = os.path.join(output_dir, f"wifi_scan_{timestamp}.json")
                     else:
                         json_file = f"wifi_scan_{timestamp}.json"
 
-                    wifi_scanner.save_scan_results(networks, json_file)
-                    print(f"Datos guardados en archivo JSON: {json_file}")
+                workers.submit(f"guardado del escaneo #{scan_count + 1}", _store_scan,
+                               networks, current_time, scan_count + 1, db, metadata, json_file, scanlog)
 
                 # Generar gráficos si se solicitó y el visualizador está disponible
-                if generate_graphs and VISUALIZER_AVAILABLE:
-                    try:
-                        print("Generando gráficos...")
-                        if output_dir:
-                            channel_graph_file = os.path.join(output_dir, f"wifi_channel_graph_{timestamp}.png")
-                            network_list_file = os.path.join(output_dir, f"wifi_network_list_{timestamp}.png")
-                        else:
-                            channel_graph_file = f"wifi_channel_graph_{timestamp}.png"
-                            network_list_file = f"wifi_network_list_{timestamp}.png"
-
-                        wifi_visualizer.plot_channel_graph(networks, channel_graph_file)
-                        wifi_visualizer.plot_network_list(networks, network_list_file)
-                        print(f"Gráficos guardados: {channel_graph_file}, {network_list_file}")
-                    except Exception as e:
-                        print(f"Error al generar gráficos: {e}")
-                elif generate_graphs and not VISUALIZER_AVAILABLE:
-                    print("No se generarán gráficos porque el módulo de visualización no está disponible.")
+                if generate_graphs:
+                    if output_dir:
+                        channel_graph_file = os.path.join(output_dir, f"wifi_channel_graph_{timestamp}.png")
+                        network_list_file = os.path.join(output_dir, f"wifi_network_list_{timestamp}.{list_format}")
+                    else:
+                        channel_graph_file = f"wifi_channel_graph_{timestamp}.png"
+                        network_list_file = f"wifi_network_list_{timestamp}.{list_format}"
+
+                    workers.submit(f"gráficos del escaneo #{scan_count + 1}", _render_scan_graphs,
+                                   networks, channel_graph_file, network_list_file, renderer)
 
             scan_count += 1
 
             # Mostrar estadísticas si se han realizado múltiples escaneos y se usa MongoDB
-            if scan_count > 1 and db and db.is_connected():
-                try:
-                    # Obtener estadísticas básicas
-                    total_networks = db.collection.count_documents({"timestamp": {"$gte": start_time}})
-                    unique_networks = len(db.collection.distinct("networks.essid", {"timestamp": {"$gte": start_time}}))
-                    print(f"Estadísticas: {scan_count} escaneos, {total_networks} redes detectadas, {unique_networks} redes únicas")
-                except Exception as e:
-                    print(f"Error al obtener estadísticas: {e}")
+            if scan_count > 1 and db:
+                workers.submit("estadísticas", _print_session_stats, db, start_time, scan_count)
+
+            # Compactación periódica: escaneos expirados y rollups finos antiguos
+            if db and compaction_interval > 0 and time.monotonic() - last_compaction >= compaction_interval:
+                last_compaction = time.monotonic()
+                workers.submit("compactación", db.compact)
 
             # Esperar para el siguiente escaneo
             if count == 0 or scan_count < count:
-                print(f"Esperando {interval} segundos para el siguiente escaneo...")
-                time.sleep(interval)
+                print(f"Cola de trabajo: {workers.depth()} pendientes, {workers.dropped_jobs} descartados, "
+                      f"{scheduler.missed_ticks} ticks perdidos. "
+                      f"Próximo escaneo en {scheduler.seconds_until_next():.1f} segundos...")
 
     except KeyboardInterrupt:
         print("\nEscaneo detenido por el usuario.")
 
-        # Mostrar resumen final si se usa MongoDB
-        if db and db.is_connected():
-            try:
-                end_time = datetime.now()
-                elapsed_time = end_time - start_time
-                elapsed_seconds = elapsed_time.total_seconds()
-
-                total_networks = db.collection.count_documents({"timestamp": {"$gte": start_time, "$lte": end_time}})
-                unique_networks = len(db.collection.distinct("networks.essid", {"timestamp": {"$gte": start_time, "$lte": end_time}}))
-
-                print(f"\nResumen de la sesión:")
-                print(f"- Duración: {int(elapsed_seconds // 3600)}h {int((elapsed_seconds % 3600) // 60)}m {int(elapsed_seconds % 60)}s")
-                print(f"- Escaneos realizados: {scan_count}")
-                print(f"- Total de redes detectadas: {total_networks}")
-                print(f"- Redes únicas detectadas: {unique_networks}")
-
-                if TRENDS_AVAILABLE:
-                    print("\nPara visualizar tendencias, ejecute:")
-                    print(f"python wifi_analyzer.py --use-mongodb --trends --days {max(1, int(elapsed_seconds / 86400) + 1)}")
-            except Exception as e:
-                print(f"Error al generar resumen: {e}")
-        else:
-            # Mostrar resumen básico si no se usa MongoDB
-            end_time = datetime.now()
-            elapsed_time = end_time - start_time
-            elapsed_seconds = elapsed_time.total_seconds()
+    # Terminar los trabajos pendientes antes de mostrar el resumen
+    if workers.depth():
+        print(f"Esperando {workers.depth()} trabajos pendientes...")
+    workers.close()
+    if renderer:
+        renderer.close()
+    if scanlog:
+        # Escribir el bloque pendiente (con compresión los escaneos se agrupan en memoria)
+        scanlog.close()
+
+    end_time = datetime.now()
+    elapsed_seconds = (end_time - start_time).total_seconds()
+
+    print(f"\nResumen de la sesión:")
+    print(f"- Duración: {int(elapsed_seconds // 3600)}h {int((elapsed_seconds % 3600) // 60)}m {int(elapsed_seconds % 60)}s")
+    print(f"- Escaneos realizados: {scan_count}")
+    print(f"- Ticks perdidos: {scheduler.missed_ticks}")
+    print(f"- Trabajos en segundo plano: {workers.completed_jobs} completados, {workers.failed_jobs} con error, "
+          f"{workers.dropped_jobs} descartados (profundidad máxima de cola: {workers.max_depth})")
+
+    # Mostrar resumen de MongoDB si está disponible
+    if db and db.is_connected():
+        try:
+            total_networks = db.collection.count_documents({"timestamp": {"$gte": start_time, "$lte": end_time}})
+            unique_networks = len(db.collection.distinct("networks.essid", {"timestamp": {"$gte": start_time, "$lte": end_time}}))
 
-            print(f"\nResumen de la sesión:")
-            print(f"- Duración: {int(elapsed_seconds // 3600)}h {int((elapsed_seconds % 3600) // 60)}m {int(elapsed_seconds % 60)}s")
-            print(f"- Escaneos realizados: {scan_count}")
+            print(f"- Total de redes detectadas: {total_networks}")
+            print(f"- Redes únicas detectadas: {unique_networks}")
+
+            if TRENDS_AVAILABLE:
+                print("\nPara visualizar tendencias, ejecute:")
+                print(f"python wifi_analyzer.py --use-mongodb --trends --days {max(1, int(elapsed_seconds / 86400) + 1)}")
+        except Exception as e:
+            print(f"Error al generar resumen: {e}")
 
 def main():
     """Función principal"""
@@ -243,33 +332,109 @@ def main():
     parser.add_argument('--continuous', action='store_true', help='Realizar escaneos continuos')
     parser.add_argument('--interval', type=int, default=60, help='Intervalo entre escaneos (segundos)')
     parser.add_argument('--count', type=int, default=0, help='Número de escaneos (0 para infinito)')
+    parser.add_argument('--queue-size', type=int, default=8,
+                        help='Máximo de trabajos de guardado/gráficos pendientes en escaneo continuo')
     parser.add_argument('--output-dir', type=str, help='Directorio para guardar los resultados')
+    parser.add_argument('--scan-backend', type=str, choices=sorted(wifi_backends.BACKENDS),
+                        default=wifi_backends.DEFAULT_BACKEND,
+                        help='Backend de escaneo: iwlist (escaneo activo), iw (caché de nl80211) o helper (socket de wifi_scan_helper.py)')
 
     # Opciones de almacenamiento
     storage_group = parser.add_mutually_exclusive_group()
-    storage_group.add_argument('--use-json', action='store_true', help='Usar archivos JSON para almacenar los resultados (predeterminado)')
+    storage_group.add_argument('--use-scanlog', action='store_true',
+                               help='Usar el registro binario segmentado para almacenar los resultados (predeterminado)')
+    storage_group.add_argument('--use-json', action='store_true', help='Usar un archivo JSON por escaneo (formato anterior)')
     storage_group.add_argument('--use-mongodb', action='store_true', help='Usar MongoDB para almacenar los resultados')
 
+    # Opciones del registro binario de escaneos
+    parser.add_argument('--scanlog-dir', type=str,
+                        help=f'Directorio del registro binario (por defecto {wifi_scanlog.SCANLOG_DIR} dentro de --output-dir)')
+    parser.add_argument('--scanlog-codec', type=str, choices=wifi_scanlog.CODECS, default='none',
+                        help='Compresión de los bloques del registro: none (un bloque por escaneo), gzip o zstd')
+    parser.add_argument('--scanlog-retention', type=float, default=wifi_scanlog.RETENTION_DAYS,
+                        help='Días que se conservan los segmentos del registro (0 para conservarlos siempre)')
+    parser.add_argument('--import-scanlog', action='store_true',
+                        help='Importar a MongoDB los escaneos del registro binario de los últimos --days días')
+
     # Opciones de visualización
     parser.add_argument('--generate-graphs', action='store_true', help='Generar gráficos PNG de los resultados')
+    parser.add_argument('--graph-quality', type=str, choices=['preview', 'print'],
+                        help='Calidad de los PNG: preview (100 dpi, rápido) o print (300 dpi). '
+                             'Por defecto preview en escaneo continuo y print en el resto')
+    parser.add_argument('--list-format', type=str, choices=['png', 'html'], default='png',
+                        help='Formato de la lista de redes: png (paginado) o html')
 
     # Opciones de MongoDB
     parser.add_argument('--mongo-host', type=str, default='localhost', help='Host de MongoDB')
     parser.add_argument('--mongo-port', type=int, default=27017, help='Puerto de MongoDB')
     parser.add_argument('--mongo-db', type=str, default='wifi_analyzer', help='Nombre de la base de datos MongoDB')
+    parser.add_argument('--mongo-buffer', type=int, default=0,
+                        help='Escaneos por lote para escribir en MongoDB con búfer (0 desactiva el búfer)')
+    parser.add_argument('--mongo-flush-interval', type=int, default=300,
+                        help='Segundos máximos que un escaneo espera en el búfer de MongoDB')
+    parser.add_argument('--mongo-unacknowledged', action='store_true',
+                        help='Escribir los lotes sin confirmación (w=0); más rápido pero sin detección de errores')
+    parser.add_argument('--mongo-samples', action='store_true',
+                        help='Guardar también una muestra por BSSID y escaneo en la colección wifi_samples')
+    parser.add_argument('--migrate-samples', action='store_true',
+                        help='Copiar los escaneos existentes de wifi_scans a la colección de muestras por BSSID')
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help='Recalcular los rollups por minuto/hora/día de tendencias desde wifi_scans')
+    parser.add_argument('--raw-retention-days', type=int,
+                        help='Días que se conservan los escaneos completos en MongoDB antes de expirar (por defecto '
+                             'MONGO_RAW_RETENTION_DAYS o 0, que los conserva siempre); los resúmenes por hora y '
+                             'día se conservan más')
+    parser.add_argument('--compact', action='store_true',
+                        help='Aplicar la retención una vez (borrar escaneos expirados y rollups antiguos) y '
+                             'mostrar el espacio liberado')
+    parser.add_argument('--compact-storage', action='store_true',
+                        help='Con --compact, ejecutar también el comando compact de MongoDB para devolver el espacio al disco')
+    parser.add_argument('--compaction-interval', type=int, default=6 * 3600,
+                        help='Segundos entre compactaciones durante el escaneo continuo con MongoDB (0 para desactivarlas)')
     parser.add_argument('--import-json', action='store_true', help='Importar archivos JSON existentes a MongoDB')
-    parser.add_argument('--trends', action='store_true', help='Generar gráficos de tendencias desde MongoDB')
+    parser.add_argument('--import-workers', type=int, default=os.cpu_count() or 1,
+                        help='Procesos que leen los archivos JSON al importarlos (1 para leerlos en serie)')
+    parser.add_argument('--import-batch', type=int, default=500,
+                        help='Escaneos por lote (insert_many y punto de control) al importar archivos JSON')
+    parser.add_argument('--import-restart', action='store_true',
+                        help='Ignorar el punto de control y volver a leer todos los archivos JSON '
+                             '(los ya importados se descartan como duplicados)')
+    parser.add_argument('--export-json', action='store_true',
+                        help='Exportar a JSON los escaneos de los últimos --days días (de MongoDB con --use-mongodb; '
+                             'si no, del registro binario como archivos wifi_scan_*.json)')
+    parser.add_argument('--export', type=str, choices=wifi_export.EXPORT_FORMATS,
+                        help='Exportar en streaming los escaneos de los últimos --days días a JSONL, CSV o Parquet '
+                             '(de MongoDB con --use-mongodb; si no, del registro binario)')
+    parser.add_argument('--export-flatten', action='store_true',
+                        help='Con --export, una fila por BSSID y escaneo en lugar de una por escaneo')
+    parser.add_argument('--check-indexes', action='store_true',
+                        help='Mostrar el plan de consulta (explain) de cada endpoint y verificar los índices')
+    parser.add_argument('--trends', action='store_true',
+                        help='Generar gráficos de tendencias desde MongoDB (sin --use-mongodb, desde el archivo '
+                             'columnar del registro binario y los archivos JSON)')
     parser.add_argument('--days', type=int, default=1, help='Número de días para análisis de tendencias')
     parser.add_argument('--network', type=str, help='Nombre de la red para análisis específico de tendencias')
+    parser.add_argument('--render-workers', type=int, default=os.cpu_count() or 1,
+                        help='Procesos para renderizar los gráficos de tendencias en paralelo (1 para renderizar en serie)')
+    parser.add_argument('--no-render-cache', action='store_true',
+                        help='No usar la caché de gráficos de tendencias (renderizar siempre, archivos con fecha y hora)')
 
     args = parser.parse_args()
+    scanlog_dir = args.scanlog_dir or os.path.join(args.output_dir or '.', wifi_scanlog.SCANLOG_DIR)
 
     # Inicializar conexión a MongoDB si se solicita
     db = None
     if args.use_mongodb and DB_AVAILABLE:
         try:
             print(f"Conectando a MongoDB ({args.mongo_host}:{args.mongo_port})...")
-            db = wifi_db.WiFiDB(host=args.mongo_host, port=args.mongo_port, db_name=args.mongo_db)
+            db = wifi_db.WiFiDB(host=args.mongo_host, port=args.mongo_port, db_name=args.mongo_db,
+                                buffered=args.mongo_buffer > 0,
+                                batch_size=max(1, args.mongo_buffer),
+                                flush_interval=args.mongo_flush_interval,
+                                write_concern={"w": 0} if args.mongo_unacknowledged else None,
+                                sample_storage='both' if (args.mongo_samples or args.migrate_samples) else wifi_db.SAMPLE_STORAGE,
+                                raw_retention_days=(args.raw_retention_days if args.raw_retention_days is not None
+                                                    else wifi_retention.RAW_RETENTION_DAYS))
             if not db.is_connected():
                 print("No se pudo conectar a MongoDB. Se usará almacenamiento en archivos JSON.")
                 db = None
@@ -280,20 +445,103 @@ def main():
     elif args.use_mongodb and not DB_AVAILABLE:
         print("El módulo de base de datos no está disponible. Se usará almacenamiento en archivos JSON.")
 
+    # Verificar índices y mostrar los planes de consulta de cada endpoint
+    if args.check_indexes and db and db.is_connected():
+        print("Planes de consulta por endpoint:")
+        wifi_indexes.check_indexes(db.collection, essid=args.network or "")
+        db.close()
+        return
+
+    # Migrar escaneos existentes a la colección de muestras por BSSID
+    if args.migrate_samples and db and db.is_connected():
+        print("Migrando escaneos existentes a muestras por BSSID...")
+        wifi_db.migrate_to_samples(db)
+        db.close()
+        return
+
+    # Recalcular los rollups de tendencias desde los escaneos existentes
+    if args.rebuild_rollups and db and db.is_connected():
+        print("Recalculando rollups de tendencias...")
+        wifi_rollups.rebuild_rollups(db.db, db.collection)
+        db.close()
+        return
+
+    # Aplicar la retención una vez (por ejemplo, desde cron o un timer de systemd)
+    if args.compact and db and db.is_connected():
+        print(f"Compactando: escaneos completos de más de {db.raw_retention_days} días y rollups antiguos...")
+        metrics = db.compact(reclaim_storage=args.compact_storage)
+        if metrics:
+            for name, count in metrics["deleted"].items():
+                print(f"  {name}: {count} documentos borrados")
+        db.close()
+        return
+
+    # Exportar los escaneos del período en streaming (JSONL, CSV o Parquet)
+    if args.export:
+        try:
+            wifi_export.check_format(args.export)
+        except ValueError as e:
+            print(e)
+            return
+
+        end_time = datetime.now()
+        start_time = end_time - timedelta(days=args.days)
+        if db and db.is_connected():
+            scans = db.iter_scans(start_time, end_time, fields=wifi_export.export_fields(args.export_flatten))
+            source = "MongoDB"
+        else:
+            scans = wifi_scanlog.ScanLog(scanlog_dir, retention_days=0).iter_scans(start_time, end_time)
+            source = f"el registro {scanlog_dir}"
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+        filename = os.path.join(args.output_dir or '.',
+                                wifi_export.export_filename(start_time, end_time, args.export, args.export_flatten))
+        exported = wifi_export.export_to_file(scans, filename, args.export, args.export_flatten)
+        print(f"Se exportaron {exported} escaneos de {source} a {filename}")
+        if db:
+            db.close()
+        return
+
+    # Exportar los escaneos del período a JSON (se escriben de a uno desde el cursor)
+    if args.export_json and db and db.is_connected():
+        start_time = datetime.now() - timedelta(days=args.days)
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+        filename = os.path.join(args.output_dir or '.', f"wifi_scans_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        db.export_timeframe_to_json(start_time, filename=filename)
+        db.close()
+        return
+
+    # Exportar los escaneos del registro binario como archivos JSON (uno por escaneo)
+    if args.export_json and not args.use_mongodb:
+        scanlog = wifi_scanlog.ScanLog(scanlog_dir, retention_days=0)
+        exported = wifi_scanlog.export_json(scanlog, args.output_dir or '.', datetime.now() - timedelta(days=args.days))
+        print(f"Se exportaron {exported} escaneos del registro {scanlog_dir}")
+        return
+
+    # Importar a MongoDB los escaneos del registro binario
+    if args.import_scanlog and db and db.is_connected():
+        print(f"Importando el registro binario {scanlog_dir} a MongoDB...")
+        scanlog = wifi_scanlog.ScanLog(scanlog_dir, retention_days=0)
+        wifi_db.import_scanlog(scanlog, db, datetime.now() - timedelta(days=args.days))
+        db.close()
+        return
+
     # Importar archivos JSON existentes a MongoDB
     if args.import_json and db and db.is_connected():
         print("Importando archivos JSON existentes a MongoDB...")
-        imported = wifi_db.import_existing_scans(directory=args.output_dir or '.', db=db)
-        print(f"Se importaron {imported} archivos.")
+        wifi_db.import_existing_scans(directory=args.output_dir or '.', db=db, workers=args.import_workers,
+                                      batch_size=args.import_batch, resume=not args.import_restart)
+        db.close()
         return
 
     # Asegurar que la interfaz WiFi esté activa
-    if not ensure_wifi_interface_up():
+    if not ensure_wifi_interface_up(args.scan_backend):
         print("No se pudo activar la interfaz WiFi. Verifique los permisos y el hardware.")
         return
 
-    # Generar gráficos de tendencias desde MongoDB
-    if args.trends and db and db.is_connected():
+    # Generar gráficos de tendencias desde MongoDB o, sin MongoDB, desde el archivo columnar
+    if args.trends:
         if not TRENDS_AVAILABLE:
             print("El módulo de tendencias no está disponible. No se pueden generar gráficos de tendencias.")
             return
@@ -303,32 +551,56 @@ def main():
         start_time = end_time - timedelta(days=args.days)
 
         try:
-            # Obtener datos de MongoDB
-            scans = db.get_scans_in_timeframe(start_time, end_time)
-
-            if not scans:
+            archive = None
+            if db and db.is_connected():
+                # Contar los escaneos del período sin traerlos de MongoDB
+                scan_count = db.count_scans(start_time, end_time)
+            else:
+                # Actualizar el archivo columnar con los escaneos nuevos del registro y de los JSON
+                archive = wifi_archive.ScanArchive(os.path.join(args.output_dir or '.', wifi_archive.ARCHIVE_DIR))
+                wifi_trends.sync_archive(archive, scanlog_dir, args.output_dir or '.')
+                frame = wifi_trends.load_archive_frame(archive, args.days)
+                scan_count = len(frame)
+
+            if not scan_count:
                 print(f"No se encontraron datos en el período especificado ({start_time} a {end_time}).")
                 return
 
-            print(f"Se encontraron {len(scans)} escaneos en el período especificado.")
+            print(f"Se encontraron {scan_count} escaneos en el período especificado.")
+
+            # Cargar una sola vez los arreglos que comparten todos los gráficos
+            if archive is None:
+                frame = wifi_trends.load_trend_frame(db, args.days)
 
             # Generar gráficos de tendencias
             try:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                # Con caché los archivos tienen nombres estables y solo se renderizan si llegaron
+                # escaneos nuevos; sin caché se nombran con la fecha y hora
+                cache = None if args.no_render_cache else wifi_cache.RenderCache()
+                if cache is None:
+                    version = None
+                else:
+                    version = archive.version() if archive else db.get_latest_scan_id()
+                timestamp = f"{args.days}d" if cache else datetime.now().strftime("%Y%m%d_%H%M%S")
                 output_dir = args.output_dir or '.'
 
-                # Generar gráfico de ocupación de canales
+                # Gráficos de ocupación de canales (2.4GHz y 5GHz)
                 channel_trend_file = os.path.join(output_dir, f"wifi_channel_trend_{timestamp}.png")
-                wifi_trends.generate_channel_occupancy_trend(db, args.days, channel_trend_file)
+                jobs = wifi_trends.channel_occupancy_jobs(frame, args.days, channel_trend_file)
 
-                # Generar gráfico de número de redes
+                # Gráfico de número de redes
                 network_count_file = os.path.join(output_dir, f"wifi_network_count_trend_{timestamp}.png")
-                wifi_trends.generate_network_count_trend(db, args.days, network_count_file)
+                jobs.append(wifi_trends.network_count_job(frame, args.days, network_count_file))
 
-                # Si se especificó una red, generar gráfico de intensidad de señal
+                # Si se especificó una red, gráfico de intensidad de señal
                 if args.network:
                     signal_trend_file = os.path.join(output_dir, f"wifi_signal_trend_{args.network}_{timestamp}.png")
-                    wifi_trends.generate_signal_strength_trend(db, args.network, None, args.days, signal_trend_file)
+                    jobs.append(wifi_trends.signal_strength_job(db, frame, args.network, None, args.days,
+                                                                signal_trend_file))
+
+                # Renderizar los gráficos independientes en paralelo (o en serie si no es posible)
+                wifi_trends.render_trend_jobs(jobs, args.graph_quality or wifi_render.DEFAULT_QUALITY,
+                                              args.render_workers, cache, version)
 
                 print(f"Análisis de tendencias completado. Los gráficos se guardaron en {output_dir}")
             except Exception as e:
@@ -343,11 +615,12 @@ def main():
     # Ejecutar la acción correspondiente
     if args.scan:
         print("Realizando un único escaneo...")
-        networks = wifi_scanner.scan_wifi()
+        networks = wifi_scanner.scan_wifi(args.scan_backend)
         if networks:
             # Determinar el modo de almacenamiento
             use_mongodb = args.use_mongodb and DB_AVAILABLE
-            use_json = args.use_json or (not use_mongodb)
+            use_json = args.use_json
+            use_scanlog = args.use_scanlog or (not use_mongodb and not use_json)
 
             json_file = None
             scan_id = None
@@ -358,7 +631,14 @@ def main():
                 if scan_id:
                     print(f"Datos guardados en MongoDB con ID: {scan_id}")
 
-            # Guardar en archivo JSON si se solicitó o es el modo predeterminado
+            # Anexar al registro binario si se solicitó o es el modo predeterminado
+            if use_scanlog:
+                with wifi_scanlog.ScanLog(scanlog_dir, args.scanlog_codec,
+                                          retention_days=args.scanlog_retention) as scanlog:
+                    scanlog.append(networks, metadata={"source": "single_scan"})
+                print(f"Datos guardados en el registro {scanlog_dir}")
+
+            # Guardar en archivo JSON si se solicitó
             if use_json:
                 json_file = wifi_scanner.save_scan_results(networks)
                 print(f"Datos guardados en archivo JSON: {json_file}")
@@ -372,13 +652,14 @@ def main():
                     if args.output_dir:
                         os.makedirs(args.output_dir, exist_ok=True)
                         channel_graph_file = os.path.join(args.output_dir, f"wifi_channel_graph_{timestamp}.png")
-                        network_list_file = os.path.join(args.output_dir, f"wifi_network_list_{timestamp}.png")
+                        network_list_file = os.path.join(args.output_dir, f"wifi_network_list_{timestamp}.{args.list_format}")
                     else:
                         channel_graph_file = f"wifi_channel_graph_{timestamp}.png"
-                        network_list_file = f"wifi_network_list_{timestamp}.png"
+                        network_list_file = f"wifi_network_list_{timestamp}.{args.list_format}"
 
-                    wifi_visualizer.plot_channel_graph(networks, channel_graph_file)
-                    wifi_visualizer.plot_network_list(networks, network_list_file)
+                    renderer = wifi_render.get_renderer(args.graph_quality or wifi_render.DEFAULT_QUALITY)
+                    wifi_visualizer.plot_channel_graph(networks, channel_graph_file, renderer)
+                    wifi_visualizer.plot_network_list(networks, network_list_file, renderer)
                 except Exception as e:
                     print(f"Error al generar gráficos: {e}")
             elif args.generate_graphs and not VISUALIZER_AVAILABLE:
@@ -395,12 +676,12 @@ def main():
                         print(f"Visualizando escaneo de MongoDB del {latest_scan['timestamp']}")
                         # Aquí podríamos implementar una visualización específica para datos de MongoDB
                         # Por ahora, usamos la visualización estándar
-                        wifi_visualizer.main()
+                        wifi_visualizer.main(scanlog_dir)
                     else:
                         print("No se encontraron escaneos en MongoDB.")
                 else:
                     # Usar la visualización estándar basada en archivos JSON
-                    wifi_visualizer.main()
+                    wifi_visualizer.main(scanlog_dir)
             except Exception as e:
                 print(f"Error al visualizar el escaneo: {e}")
         else:
@@ -410,13 +691,22 @@ def main():
         print(f"Iniciando escaneo continuo cada {args.interval} segundos...")
         # Determinar el modo de almacenamiento para el escaneo continuo
         use_mongodb = args.use_mongodb and DB_AVAILABLE
-        use_json = args.use_json or (not use_mongodb)
+        use_json = args.use_json
+        scanlog = None
+        if args.use_scanlog or (not use_mongodb and not use_json):
+            scanlog = wifi_scanlog.ScanLog(scanlog_dir, args.scanlog_codec, retention_days=args.scanlog_retention)
 
         # Pasar los parámetros de almacenamiento a la función de escaneo continuo
         continuous_scan(args.interval, args.count, args.output_dir,
                        db if use_mongodb else None,
                        use_json,
-                       args.generate_graphs)
+                       args.generate_graphs,
+                       args.scan_backend,
+                       args.queue_size,
+                       args.graph_quality or 'preview',
+                       args.list_format,
+                       scanlog,
+                       args.compaction_interval)
 
     else:
         # Si no se especifica ninguna acción, mostrar ayuda
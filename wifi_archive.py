@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Archivo columnar de escaneos para WiFi Analyzer
+Convierte los segmentos del registro binario (wifi_scanlog) y los archivos
+wifi_scan_*.json en partes columnares de arreglos .npy. El lector las abre con
+memmap y solo lee del disco las páginas de la ventana de tiempo y de los BSSID
+pedidos, sin deserializar escaneos. Con él, wifi_trends funciona sin MongoDB.
+
+Cada parte es un directorio <origen>@<versión> con:
+
+    timestamps.npy      int64[n]     Segundos desde epoch de cada escaneo
+    scan_offsets.npy    int64[n+1]   Observaciones de cada escaneo (obs[offsets[i]:offsets[i+1]])
+    obs_entity.npy      int32[m]     Red observada (fila de entities.json)
+    obs_scan.npy        int32[m]     Escaneo de cada observación
+    obs_signal.npy      int8[m]      Señal en dBm (NO_SIGNAL si falta)
+    obs_smoothed.npy    int16[m]     Señal suavizada en décimas de dBm (NO_SMOOTHED si falta)
+    entity_order.npy    int32[m]     Observaciones ordenadas por red (y por tiempo dentro de cada red)
+    entity_offsets.npy  int64[e+1]   Observaciones de cada red en entity_order
+    entities.json                    Atributos estables de cada red (MAC, ESSID, canal...)
+    manifest.json                    Rango temporal, escaneos y observaciones
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import wifi_frames
+import wifi_scanlog
+
+# Directorio predeterminado del archivo
+ARCHIVE_DIR = os.environ.get('WIFI_ARCHIVE_DIR', 'wifi_archive')
+
+# Entradas por red de un registro del scanlog, leídas sin decodificar (ver wifi_scanlog.NETWORK_ENTRY)
+NETWORK_DTYPE = np.dtype([('entity', '<u2'), ('signal', 'i1'), ('quality', '<u2'), ('smoothed', '<i2')])
+
+# Prefijo de las partes generadas desde archivos wifi_scan_*.json (una por día)
+JSON_PART_PREFIX = 'json_'
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_seconds(timestamp):
+    """Convierte un datetime sin zona horaria a segundos desde epoch."""
+    return int((timestamp - _EPOCH) // timedelta(seconds=1))
+
+
+class PartBuilder:
+    """
+    Acumula escaneos en columnas y los escribe como una parte del archivo.
+    """
+
+    def __init__(self, entities=None):
+        """
+        Args:
+            entities (list, optional): Atributos de las redes ya numeradas (p. ej. los
+                descriptores de un segmento del scanlog). Con add_scan se agregan al vuelo.
+        """
+        self.entities = list(entities or [])
+        self._interned = {json.dumps(entity, sort_keys=True, default=str): i
+                          for i, entity in enumerate(self.entities)}
+        self.timestamps = []
+        self.counts = []
+        self.obs_entity = []
+        self.obs_signal = []
+        self.obs_smoothed = []
+
+    def add_entries(self, seconds, entries):
+        """
+        Agrega un escaneo a partir de sus entradas crudas del scanlog.
+
+        Args:
+            seconds (int): Segundos desde epoch
+            entries (ndarray NETWORK_DTYPE): Entradas por red del registro
+        """
+        self.timestamps.append(seconds)
+        self.counts.append(len(entries))
+        self.obs_entity.append(entries['entity'].astype(np.int32))
+        self.obs_signal.append(entries['signal'])
+        self.obs_smoothed.append(entries['smoothed'])
+
+    def add_scan(self, timestamp, networks):
+        """
+        Agrega un escaneo a partir de sus redes (p. ej. un archivo JSON).
+
+        Args:
+            timestamp (datetime): Momento del escaneo
+            networks (list): Redes del escaneo
+        """
+        entries = np.zeros(len(networks), dtype=NETWORK_DTYPE)
+        for i, network in enumerate(networks):
+            attributes = {key: value for key, value in network.items() if key not in wifi_scanlog.SCAN_FIELDS}
+            key = json.dumps(attributes, sort_keys=True, default=str)
+            entity = self._interned.get(key)
+            if entity is None:
+                entity = self._interned[key] = len(self.entities)
+                self.entities.append(json.loads(key))
+            signal = network.get('signal')
+            smoothed = network.get('signal_smoothed')
+            entries[i] = (entity,
+                          wifi_scanlog.NO_SIGNAL if signal is None else max(-127, min(127, int(round(signal)))),
+                          wifi_scanlog.NO_QUALITY,
+                          wifi_scanlog.NO_SMOOTHED if smoothed is None else int(round(smoothed * 10)))
+        self.add_entries(_to_seconds(timestamp), entries)
+
+    def write(self, path, source):
+        """
+        Escribe la parte en `path` (primero en un directorio temporal, luego se renombra).
+
+        Args:
+            path (str): Directorio de la parte (no debe existir)
+            source (str): Descripción del origen para el manifiesto
+
+        Returns:
+            str: Ruta de la parte o None si no hay escaneos
+        """
+        if not self.timestamps:
+            return None
+
+        # Los escaneos se ordenan por tiempo (los JSON o un reloj ajustado pueden venir desordenados)
+        timestamps = np.array(self.timestamps, dtype=np.int64)
+        counts = np.array(self.counts, dtype=np.int64)
+        order = np.argsort(timestamps, kind='stable')
+        obs_entity = np.concatenate([self.obs_entity[i] for i in order])
+        obs_signal = np.concatenate([self.obs_signal[i] for i in order]).astype(np.int8)
+        obs_smoothed = np.concatenate([self.obs_smoothed[i] for i in order]).astype(np.int16)
+        timestamps = timestamps[order]
+        counts = counts[order]
+
+        scan_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=scan_offsets[1:])
+        obs_scan = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+
+        # Índice por red: observaciones ordenadas por red y, dentro de cada red, por tiempo
+        entity_order = np.argsort(obs_entity, kind='stable').astype(np.int32)
+        entity_offsets = np.zeros(len(self.entities) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(obs_entity, minlength=len(self.entities)), out=entity_offsets[1:])
+
+        temp_path = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(temp_path)
+        arrays = {
+            "timestamps": timestamps, "scan_offsets": scan_offsets, "obs_entity": obs_entity,
+            "obs_scan": obs_scan, "obs_signal": obs_signal, "obs_smoothed": obs_smoothed,
+            "entity_order": entity_order, "entity_offsets": entity_offsets,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(temp_path, f"{name}.npy"), array)
+        with open(os.path.join(temp_path, 'entities.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.entities, f, separators=(',', ':'), default=str)
+        with open(os.path.join(temp_path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump({"source": source, "first": int(timestamps[0]), "last": int(timestamps[-1]),
+                       "scans": len(timestamps), "observations": len(obs_entity)}, f)
+        os.replace(temp_path, path)
+        return path
+
+
+class ArchivePart:
+    """
+    Una parte del archivo; sus arreglos se abren con memmap al usarlos por primera vez.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Directorio de la parte
+        """
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self._arrays = {}
+        self._entities = None
+
+    @property
+    def first(self):
+        return self.manifest["first"]
+
+    @property
+    def last(self):
+        return self.manifest["last"]
+
+    def array(self, name):
+        """Devuelve un arreglo de la parte mapeado en memoria (solo lectura)."""
+        array = self._arrays.get(name)
+        if array is None:
+            array = self._arrays[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode='r')
+        return array
+
+    @property
+    def entities(self):
+        if self._entities is None:
+            with open(os.path.join(self.path, 'entities.json'), 'r', encoding='utf-8') as f:
+                self._entities = json.load(f)
+        return self._entities
+
+    def scan_range(self, start=None, end=None):
+        """Índices [desde, hasta) de los escaneos entre dos timestamps en segundos (inclusivos)."""
+        timestamps = self.array('timestamps')
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, 'left'))
+        last = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, 'right'))
+        return first, max(first, last)
+
+    def entity_observations(self, entity, first, last):
+        """
+        Observaciones de una red en los escaneos [first, last), sin leer las de las demás.
+
+        Returns:
+            ndarray: Índices de observación ordenados por tiempo
+        """
+        offsets = self.array('entity_offsets')
+        observations = self.array('entity_order')[offsets[entity]:offsets[entity + 1]]
+        scans = self.array('obs_scan')[observations]
+        low, high = np.searchsorted(scans, [first, last], 'left')
+        return np.asarray(observations[low:high])
+
+
+class ScanArchive:
+    """
+    Archivo columnar de escaneos: partes ordenadas por tiempo.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR):
+        """
+        Args:
+            directory (str): Directorio del archivo (se crea si no existe)
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _part_names(self):
+        """Partes publicadas (sin las temporales), del más antiguo al más reciente."""
+        return [name for name in os.listdir(self.directory)
+                if '@' in name and '.tmp-' not in name
+                and os.path.exists(os.path.join(self.directory, name, 'manifest.json'))]
+
+    def parts(self):
+        """Devuelve las partes del archivo ordenadas por su primer escaneo."""
+        parts = [ArchivePart(os.path.join(self.directory, name)) for name in self._part_names()]
+        return sorted(parts, key=lambda part: (part.first, part.name))
+
+    def version(self):
+        """Identificador de los datos archivados (cambia cuando se agrega o reemplaza una parte)."""
+        return ','.join(sorted(self._part_names()))
+
+    def _replace_part(self, source, version, builder):
+        """Publica la parte `source@version` y borra las versiones anteriores del mismo origen."""
+        path = os.path.join(self.directory, f"{source}@{version}")
+        if builder.write(path, source) is None:
+            return False
+        for name in self._part_names():
+            if name.split('@')[0] == source and name != os.path.basename(path):
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+        return True
+
+    def sync_scanlog(self, scanlog):
+        """
+        Archiva los segmentos del registro binario que cambiaron desde la última vez.
+
+        Cada segmento es una parte cuya versión es el tamaño de su índice: los segmentos
+        cerrados se archivan una vez y el activo se vuelve a archivar si creció. Las partes
+        de segmentos borrados por la retención del registro también se borran.
+
+        Args:
+            scanlog (ScanLog): Registro de escaneos
+
+        Returns:
+            int: Partes escritas
+        """
+        existing = set(self._part_names())
+        segment_names = scanlog.segment_names()
+        written = 0
+        for name in segment_names:
+            segment = wifi_scanlog.Segment(os.path.join(scanlog.directory, name))
+            if not segment.blocks or f"{name}@{segment.index_bytes}" in existing:
+                continue
+
+            entities = [{}] * (max(segment.descriptors, default=-1) + 1)
+            for descriptor, attributes in segment.descriptors.items():
+                entities[descriptor] = attributes
+            builder = PartBuilder(entities)
+            for record in segment.iter_records():
+                micros, entries = wifi_scanlog.record_entries(record)
+                builder.add_entries(micros // 1_000_000, np.frombuffer(entries, dtype=NETWORK_DTYPE))
+            written += self._replace_part(name, segment.index_bytes, builder)
+
+        sources = set(segment_names)
+        for name in existing:
+            source = name.split('@')[0]
+            if source.startswith(wifi_scanlog.SEGMENT_PREFIX) and source not in sources:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+        return written
+
+    def sync_json_files(self, directory='.'):
+        """
+        Archiva los archivos wifi_scan_<fecha>.json, una parte por día.
+
+        Un día se vuelve a archivar si cambió su cantidad de archivos.
+
+        Args:
+            directory (str): Directorio de los archivos JSON
+
+        Returns:
+            int: Partes escritas
+        """
+        days = {}
+        for name in os.listdir(directory):
+            if name.startswith('wifi_scan_') and name.endswith('.json'):
+                days.setdefault(name[len('wifi_scan_'):len('wifi_scan_') + 8], []).append(name)
+
+        existing = set(self._part_names())
+        written = 0
+        for day, names in sorted(days.items()):
+            source = f"{JSON_PART_PREFIX}{day}"
+            if f"{source}@{len(names)}" in existing:
+                continue
+
+            builder = PartBuilder()
+            for name in names:
+                try:
+                    timestamp = datetime.strptime(name[len('wifi_scan_'):-len('.json')], "%Y%m%d_%H%M%S")
+                    with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                        builder.add_scan(timestamp, json.load(f))
+                except Exception as e:
+                    print(f"Error al archivar {name}: {e}")
+            written += self._replace_part(source, len(names), builder)
+        return written
+
+    def load_frame(self, start_time=None, end_time=None, essid=None, mac=None, channels=True):
+        """
+        Carga una ventana del archivo como TrendFrame.
+
+        Solo se leen las páginas de los escaneos de la ventana. Con essid o mac la
+        matriz de señal tiene solo esas redes, y sin channels (conteos por canal y
+        banda) se leen únicamente sus observaciones, a través del índice por red.
+
+        Args:
+            start_time (datetime, optional): Inicio de la ventana (inclusivo)
+            end_time (datetime, optional): Fin de la ventana (inclusivo)
+            essid (str, optional): ESSID de las redes de la matriz de señal
+            mac (str, optional): MAC de la red de la matriz de señal
+            channels (bool): Si es True, calcula los conteos por canal, banda y total
+
+        Returns:
+            TrendFrame: Datos de la ventana (un punto por escaneo)
+        """
+        start = _to_seconds(start_time) if start_time else None
+        end = _to_seconds(end_time) if end_time else None
+        windows = []
+        for part in self.parts():
+            if (start is not None and part.last < start) or (end is not None and part.first > end):
+                continue
+            first, last = part.scan_range(start, end)
+            if last > first:
+                windows.append((part, first, last))
+
+        n = sum(last - first for _, first, last in windows)
+        timestamps = np.zeros(n, dtype=np.int64)
+        total = np.zeros(n, dtype=wifi_frames.COUNT_DTYPE)
+        channel_rows = {channel: i for i, channel in enumerate(wifi_frames.KNOWN_CHANNELS)}
+        channel_list = list(wifi_frames.KNOWN_CHANNELS)
+
+        # Filas de la matriz de señal: una por MAC (varias entidades pueden compartirla)
+        filtered = bool(essid or mac)
+        bssid_rows = {}
+        bssids = []
+        essids = []
+        remaps = []
+        for part, _, _ in windows:
+            remap = np.full(len(part.entities), -1, dtype=np.int64)
+            channel_of = np.full(len(part.entities), -1, dtype=np.int64)
+            for entity, attributes in enumerate(part.entities):
+                channel = attributes.get('channel')
+                if channel:
+                    if channel not in channel_rows:
+                        channel_rows[channel] = len(channel_list)
+                        channel_list.append(channel)
+                    channel_of[entity] = channel_rows[channel]
+                bssid = attributes.get('mac')
+                if not bssid or (mac and bssid != mac) or (essid and attributes.get('essid') != essid):
+                    continue
+                if bssid not in bssid_rows:
+                    bssid_rows[bssid] = len(bssids)
+                    bssids.append(bssid)
+                    essids.append(attributes.get('essid'))
+                remap[entity] = bssid_rows[bssid]
+            remaps.append((remap, channel_of))
+
+        counts = np.zeros((len(channel_list), n), dtype=wifi_frames.COUNT_DTYPE) if channels else None
+        signal = np.full((len(bssids), n), np.nan, dtype=wifi_frames.SIGNAL_DTYPE)
+        smoothed = np.full((len(bssids), n), np.nan, dtype=wifi_frames.SIGNAL_DTYPE)
+        has_smoothed = False
+
+        base = 0
+        for (part, first, last), (remap, channel_of) in zip(windows, remaps):
+            timestamps[base:base + last - first] = part.array('timestamps')[first:last]
+
+            if channels or not filtered:
+                # Todas las observaciones de la ventana (tramo contiguo de cada columna)
+                offsets = np.asarray(part.array('scan_offsets')[first:last + 1])
+                total[base:base + last - first] = np.diff(offsets)
+                low, high = int(offsets[0]), int(offsets[-1])
+                entity = np.asarray(part.array('obs_entity')[low:high])
+                column = np.asarray(part.array('obs_scan')[low:high]) - first + base
+                if channels:
+                    rows = channel_of[entity]
+                    valid = rows >= 0
+                    np.add.at(counts, (rows[valid], column[valid]), 1)
+                observations = np.arange(low, high)
+                rows = remap[entity]
+                keep = rows >= 0
+                observations, rows, column = observations[keep], rows[keep], column[keep]
+            else:
+                # Solo las observaciones de las redes pedidas, a través del índice por red
+                selected = np.flatnonzero(remap >= 0)
+                observations = np.concatenate(
+                    [part.entity_observations(entity, first, last) for entity in selected]
+                ) if len(selected) else np.zeros(0, dtype=np.int64)
+                rows = remap[np.asarray(part.array('obs_entity')[observations])]
+                column = np.asarray(part.array('obs_scan')[observations]) - first + base
+
+            values = np.asarray(part.array('obs_signal')[observations])
+            present = values != wifi_scanlog.NO_SIGNAL
+            signal[rows[present], column[present]] = values[present]
+
+            values = np.asarray(part.array('obs_smoothed')[observations])
+            present = values != wifi_scanlog.NO_SMOOTHED
+            if present.any():
+                has_smoothed = True
+                smoothed[rows[present], column[present]] = values[present] / 10
+
+            base += last - first
+
+        frame = wifi_frames.TrendFrame(
+            timestamps=timestamps,
+            bssids=bssids,
+            essids=essids,
+            signal=signal,
+            signal_smoothed=smoothed if has_smoothed else None,
+        )
+        if channels:
+            channel_array = np.array(channel_list, dtype=np.int16)
+            band_2g = channel_array <= 14
+            frame.channels = channel_array
+            frame.channel_counts = counts
+            frame.total = total
+            frame.count_2g = counts[band_2g].sum(axis=0)
+            frame.count_5g = counts[~band_2g].sum(axis=0)
+        return frame
+
+    def stats(self):
+        """Devuelve partes, escaneos, observaciones y bytes del archivo."""
+        parts = self.parts()
+        return {
+            "parts": len(parts),
+            "scans": sum(part.manifest["scans"] for part in parts),
+            "observations": sum(part.manifest["observations"] for part in parts),
+            "bytes": sum(entry.stat().st_size for part in parts for entry in os.scandir(part.path)),
+        }
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Backends de escaneo WiFi para Raspberry Pi
+Este módulo define la interfaz común de los backends de escaneo y sus
+implementaciones: `iwlist` (wireless extensions), `iw` (nl80211), el helper
+persistente de escaneo (socket Unix) y la reproducción de fixtures.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import time
+import wifi_parser
+
+# Interfaz y backend predeterminados
+DEFAULT_INTERFACE = os.environ.get('WIFI_INTERFACE', 'wlan0')
+DEFAULT_BACKEND = os.environ.get('WIFI_SCAN_BACKEND', 'iwlist')
+
+# Socket del helper persistente de escaneo (ver wifi_scan_helper.py)
+DEFAULT_HELPER_SOCKET = os.environ.get('WIFI_SCAN_SOCKET', '/run/wifi-analyzer/scan.sock')
+
+# Bandera IFF_UP de /sys/class/net/<iface>/flags
+IFF_UP = 0x1
+
+
+class ScanBackend:
+    """Interfaz común de los backends de escaneo"""
+
+    name = None
+
+    def __init__(self, interface=DEFAULT_INTERFACE, use_sudo=True):
+        """
+        Inicializa el backend.
+
+        Args:
+            interface (str): Nombre de la interfaz WiFi
+            use_sudo (bool): Si es False, los comandos privilegiados se ejecutan sin sudo
+                (el proceso ya corre como root, p. ej. dentro del helper)
+        """
+        self.interface = interface
+        self.use_sudo = use_sudo
+
+    def _privileged(self, command):
+        """Antepone sudo al comando si corresponde."""
+        return ["sudo"] + command if self.use_sudo else command
+
+    def _interface_is_up(self):
+        """Lee el estado administrativo de la interfaz desde sysfs (sin procesos)."""
+        try:
+            with open(f"/sys/class/net/{self.interface}/flags", 'r') as f:
+                return bool(int(f.read().strip(), 16) & IFF_UP)
+        except (OSError, ValueError):
+            return False
+
+    def _ensure_interface_up(self):
+        """Activa la interfaz solo si sysfs indica que está caída."""
+        if not self._interface_is_up():
+            print(f"La interfaz {self.interface} está caída, intentando activarla...")
+            subprocess.run(self._privileged(["ip", "link", "set", self.interface, "up"]), check=True)
+            time.sleep(3)
+
+    def scan(self):
+        """
+        Realiza un escaneo y devuelve las redes encontradas.
+
+        Returns:
+            list: Lista de diccionarios con información de cada red (sin distancia)
+        """
+        raise NotImplementedError
+
+    def test_scan(self):
+        """
+        Comprueba que el backend puede escanear con la interfaz actual.
+
+        Returns:
+            bool: True si el escaneo de prueba fue exitoso
+        """
+        raise NotImplementedError
+
+
+class IwlistBackend(ScanBackend):
+    """Backend basado en `iwlist <interfaz> scan` (escaneo activo)"""
+
+    name = 'iwlist'
+
+    def __init__(self, interface=DEFAULT_INTERFACE, use_sudo=True, check_link=True):
+        """
+        Inicializa el backend.
+
+        Args:
+            interface (str): Nombre de la interfaz WiFi
+            use_sudo (bool): Si es False, los comandos se ejecutan sin sudo
+            check_link (bool): Si es True, verifica la interfaz con `ip link show` antes
+                de cada escaneo; si es False, solo consulta sysfs
+        """
+        super().__init__(interface, use_sudo)
+        self.check_link = check_link
+
+    def scan(self):
+        """
+        Escanea redes WiFi usando iwlist.
+
+        Returns:
+            list: Lista de diccionarios con información de cada red WiFi
+        """
+        try:
+            if self.check_link:
+                # Verificar el estado de la interfaz antes del escaneo
+                print(f"Verificando estado de la interfaz {self.interface} antes del escaneo...")
+                link_check = subprocess.run(["ip", "link", "show", self.interface],
+                                          capture_output=True, text=True, check=True)
+                print(f"Estado de la interfaz:\n{link_check.stdout}")
+
+                # Intentar reiniciar la interfaz si está caída
+                if "state DOWN" in link_check.stdout:
+                    print("La interfaz está caída, intentando reiniciarla...")
+                    subprocess.run(self._privileged(["ip", "link", "set", self.interface, "down"]), check=True)
+                    time.sleep(1)
+                    subprocess.run(self._privileged(["ip", "link", "set", self.interface, "up"]), check=True)
+                    time.sleep(3)
+            else:
+                self._ensure_interface_up()
+
+            # Ejecutar el comando de escaneo con timeout
+            print("Ejecutando comando de escaneo...")
+            try:
+                result = subprocess.run(self._privileged(["iwlist", self.interface, "scan"]),
+                                      capture_output=True, text=True, check=True, timeout=15)
+            except subprocess.TimeoutExpired:
+                print("El comando de escaneo tardó demasiado tiempo. La interfaz podría estar ocupada.")
+                return []
+
+            # Verificar si hay algún mensaje de error en la salida
+            if "Interface doesn't support scanning" in result.stdout:
+                print(f"Error en la salida del escaneo: {result.stdout}")
+                return []
+
+            print("Escaneo completado con éxito.")
+
+            # Procesar la salida en una sola pasada
+            networks = wifi_parser.parse_iwlist_scan(result.stdout)
+            if not networks:
+                print(f"No se encontraron celdas en la salida del escaneo. Salida completa:\n{result.stdout}")
+            return networks
+
+        except subprocess.CalledProcessError as e:
+            print(f"Error al escanear redes WiFi: {e}")
+            print(f"Salida de error: {e.stderr}")
+
+            # Intentar obtener más información sobre el error
+            try:
+                print("Verificando estado de la interfaz después del error...")
+                subprocess.run(self._privileged(["iwconfig", self.interface]), check=True)
+                print("Verificando si hay procesos bloqueando la interfaz...")
+                subprocess.run(self._privileged(["lsof", f"/dev/{self.interface}"]), check=False)
+            except:
+                pass
+
+            return []
+
+    def test_scan(self):
+        """
+        Realiza un escaneo de prueba con iwlist.
+
+        Returns:
+            bool: True si el escaneo de prueba fue exitoso
+        """
+        try:
+            subprocess.run(self._privileged(["iwlist", self.interface, "scan"]),
+                           capture_output=True, text=True, check=True, timeout=10)
+            print("Escaneo de prueba exitoso.")
+            return True
+        except subprocess.CalledProcessError as scan_error:
+            print(f"Error en el escaneo de prueba: {scan_error}")
+            print(f"Salida del error: {scan_error.stderr}")
+            return False
+        except subprocess.TimeoutExpired:
+            print("El escaneo de prueba tardó demasiado tiempo. Puede que la interfaz esté ocupada.")
+            return False
+
+
+class IwBackend(ScanBackend):
+    """
+    Backend basado en nl80211 mediante `iw dev <interfaz> scan dump`.
+
+    Lee los resultados que el kernel ya tiene en caché (por ejemplo los del
+    escaneo periódico de wpa_supplicant) sin lanzar un escaneo activo. Solo
+    si la caché está vacía se dispara un escaneo con `sudo iw dev <iface> scan`.
+    """
+
+    name = 'iw'
+
+    def __init__(self, interface=DEFAULT_INTERFACE, use_sudo=True, trigger_if_empty=True):
+        """
+        Inicializa el backend.
+
+        Args:
+            interface (str): Nombre de la interfaz WiFi
+            use_sudo (bool): Si es False, los comandos privilegiados se ejecutan sin sudo
+            trigger_if_empty (bool): Si es True, lanza un escaneo activo cuando la caché está vacía
+        """
+        super().__init__(interface, use_sudo)
+        self.trigger_if_empty = trigger_if_empty
+
+    def _dump(self):
+        """Ejecuta `iw dev <iface> scan dump` y devuelve su salida."""
+        result = subprocess.run(["iw", "dev", self.interface, "scan", "dump"],
+                                capture_output=True, text=True, check=True, timeout=5)
+        return result.stdout
+
+    def scan(self):
+        """
+        Obtiene las redes de la caché de escaneo de nl80211.
+
+        Returns:
+            list: Lista de diccionarios con información de cada red WiFi
+        """
+        try:
+            self._ensure_interface_up()
+
+            networks = wifi_parser.parse_iw_scan(self._dump())
+
+            if not networks and self.trigger_if_empty:
+                print("La caché de escaneo está vacía, lanzando un escaneo activo...")
+                result = subprocess.run(self._privileged(["iw", "dev", self.interface, "scan"]),
+                                        capture_output=True, text=True, check=True, timeout=15)
+                networks = wifi_parser.parse_iw_scan(result.stdout)
+
+            return networks
+
+        except subprocess.TimeoutExpired:
+            print("El comando iw tardó demasiado tiempo. La interfaz podría estar ocupada.")
+            return []
+        except subprocess.CalledProcessError as e:
+            print(f"Error al escanear redes WiFi con iw: {e}")
+            print(f"Salida de error: {e.stderr}")
+            return []
+
+    def test_scan(self):
+        """
+        Comprueba que se puede leer la caché de escaneo con iw.
+
+        Returns:
+            bool: True si la lectura fue exitosa
+        """
+        try:
+            self._dump()
+            print("Lectura de la caché de escaneo exitosa.")
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"Error al leer la caché de escaneo: {e}")
+            print(f"Salida del error: {e.stderr}")
+            return False
+        except subprocess.TimeoutExpired:
+            print("La lectura de la caché de escaneo tardó demasiado tiempo.")
+            return False
+
+
+class FixtureBackend(ScanBackend):
+    """
+    Backend de interfaz simulada que reproduce salidas grabadas de iwlist o iw.
+
+    Permite probar el helper y el resto de la aplicación sin radio. Los archivos
+    se devuelven en orden circular, uno por escaneo.
+    """
+
+    name = 'fixture'
+
+    def __init__(self, interface=DEFAULT_INTERFACE, fixture_files=None):
+        """
+        Inicializa el backend.
+
+        Args:
+            interface (str): Nombre de la interfaz simulada
+            fixture_files (list, optional): Archivos con salidas grabadas. Si es None,
+                se usan los de la variable de entorno WIFI_SCAN_FIXTURES (separados por ':')
+                o fixtures/iwlist_scan.txt.
+        """
+        super().__init__(interface, use_sudo=False)
+        if not fixture_files:
+            default = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'iwlist_scan.txt')
+            fixture_files = os.environ.get('WIFI_SCAN_FIXTURES', default).split(':')
+        self.fixture_files = list(fixture_files)
+        self._next = 0
+
+    def scan(self):
+        """
+        Devuelve las redes del siguiente archivo grabado.
+
+        Returns:
+            list: Lista de diccionarios con información de cada red WiFi
+        """
+        filename = self.fixture_files[self._next % len(self.fixture_files)]
+        self._next += 1
+
+        with open(filename, 'r', encoding='utf-8') as f:
+            output = f.read()
+
+        # La salida de iw empieza cada bloque con "BSS "; la de iwlist con "Cell "
+        if wifi_parser.IW_BSS_PATTERN.search(output):
+            return wifi_parser.parse_iw_scan(output)
+        return wifi_parser.parse_iwlist_scan(output)
+
+    def test_scan(self):
+        """
+        Comprueba que los archivos grabados existen.
+
+        Returns:
+            bool: True si todos los archivos son legibles
+        """
+        return all(os.access(filename, os.R_OK) for filename in self.fixture_files)
+
+
+class HelperBackend(ScanBackend):
+    """
+    Cliente del helper persistente de escaneo (wifi_scan_helper.py).
+
+    El helper corre una sola vez como root y es dueño de la interfaz; cada
+    escaneo es una petición por socket Unix, sin sudo ni procesos nuevos.
+    """
+
+    name = 'helper'
+
+    def __init__(self, interface=DEFAULT_INTERFACE, socket_path=DEFAULT_HELPER_SOCKET, timeout=30):
+        """
+        Inicializa el cliente.
+
+        Args:
+            interface (str): No se usa; la interfaz la elige el helper
+            socket_path (str): Ruta del socket Unix del helper
+            timeout (float): Tiempo máximo de espera de la respuesta en segundos
+        """
+        super().__init__(interface, use_sudo=False)
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def request(self, command):
+        """
+        Envía un comando al helper y devuelve su respuesta.
+
+        Args:
+            command (str): Comando ('scan', 'test' o 'ping')
+
+        Returns:
+            dict: Respuesta decodificada del helper
+
+        Raises:
+            OSError: Si no se puede contactar al helper
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall(json.dumps({"cmd": command}).encode('utf-8') + b"\n")
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+
+        if not line:
+            raise OSError("El helper cerró la conexión sin responder")
+        return json.loads(line)
+
+    def scan(self):
+        """
+        Pide un escaneo al helper.
+
+        Returns:
+            list: Lista de diccionarios con información de cada red WiFi
+        """
+        try:
+            response = self.request("scan")
+        except (OSError, ValueError) as e:
+            print(f"Error al contactar al helper de escaneo ({self.socket_path}): {e}")
+            return []
+
+        if not response.get("success"):
+            print(f"El helper de escaneo devolvió un error: {response.get('message')}")
+            return []
+        return response.get("networks", [])
+
+    def test_scan(self):
+        """
+        Comprueba que el helper responde y que su backend puede escanear.
+
+        Returns:
+            bool: True si el helper está disponible
+        """
+        try:
+            response = self.request("test")
+        except (OSError, ValueError) as e:
+            print(f"El helper de escaneo no está disponible ({self.socket_path}): {e}")
+            return False
+        return bool(response.get("success"))
+
+
+# Backends disponibles por nombre
+BACKENDS = {
+    IwlistBackend.name: IwlistBackend,
+    IwBackend.name: IwBackend,
+    HelperBackend.name: HelperBackend,
+}
+
+
+def get_backend(backend=None, interface=DEFAULT_INTERFACE):
+    """
+    Devuelve una instancia de backend de escaneo.
+
+    Args:
+        backend (str|ScanBackend, optional): Nombre del backend o instancia ya creada.
+            Si es None, se usa DEFAULT_BACKEND.
+        interface (str): Nombre de la interfaz WiFi
+
+    Returns:
+        ScanBackend: Instancia del backend
+
+    Raises:
+        ValueError: Si el nombre del backend no existe
+    """
+    if isinstance(backend, ScanBackend):
+        return backend
+
+    name = backend or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de escaneo desconocido: {name} (disponibles: {', '.join(BACKENDS)})")
+    return BACKENDS[name](interface)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Caché de imágenes renderizadas para WiFi Analyzer
+Almacén en disco direccionado por contenido: la clave de cada imagen es un hash
+del tipo de gráfico, sus parámetros y la versión de los datos (el _id del último
+escaneo). Mientras no lleguen escaneos nuevos, la misma petición devuelve el
+mismo archivo sin volver a renderizar. El tamaño total está acotado y se
+descartan primero las imágenes usadas hace más tiempo (LRU por mtime).
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+# Directorio y tamaño máximo predeterminados de la caché
+CACHE_DIR = os.environ.get('WIFI_RENDER_CACHE_DIR') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'wifi_analyzer', 'renders')
+CACHE_MAX_BYTES = int(os.environ.get('WIFI_RENDER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+_ENTRY_PATTERN = re.compile(r'^[0-9a-f]{32}\.[a-z]+$')
+
+
+class RenderCache:
+    """
+    Caché LRU de imágenes en disco, acotada en bytes.
+
+    Las imágenes se escriben primero en un archivo temporal del mismo directorio
+    y se publican con os.replace, de modo que un lector nunca ve un archivo a medias.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, extension='.png'):
+        """
+        Args:
+            directory (str): Directorio de la caché (se crea si no existe)
+            max_bytes (int): Tamaño máximo total de las imágenes
+            extension (str): Extensión de las imágenes (determina el formato de savefig)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(chart, params, version):
+        """
+        Calcula la clave de una imagen.
+
+        Args:
+            chart (str): Tipo de gráfico
+            params (dict): Parámetros del gráfico (días, banda, red, calidad...)
+            version: Versión de los datos (p. ej. el _id del último escaneo)
+
+        Returns:
+            str: Hash hexadecimal de 32 caracteres
+        """
+        payload = json.dumps([chart, params, str(version)], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+    def path(self, key):
+        """Ruta de la imagen de `key` (exista o no)."""
+        return os.path.join(self.directory, key + self.extension)
+
+    def get(self, key):
+        """
+        Devuelve la ruta de la imagen si está en la caché y la marca como usada.
+
+        Returns:
+            str: Ruta de la imagen o None si no está
+        """
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def temp_path(self, key):
+        """Ruta temporal donde renderizar la imagen de `key` antes de publicarla con commit()."""
+        return os.path.join(self.directory, f".tmp-{key}-{os.getpid()}-{threading.get_ident()}{self.extension}")
+
+    def commit(self, key, temp_path):
+        """
+        Publica una imagen renderizada en temp_path y aplica el límite de tamaño.
+
+        Returns:
+            str: Ruta de la imagen en la caché
+        """
+        path = self.path(key)
+        os.replace(temp_path, path)
+        self.evict()
+        return path
+
+    def discard(self, temp_path):
+        """Elimina un archivo temporal que no llegó a publicarse."""
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
+    def render(self, key, render):
+        """
+        Devuelve la imagen de `key`, renderizándola una sola vez si no está.
+
+        Las peticiones concurrentes de la misma clave esperan al primer render
+        en lugar de repetirlo.
+
+        Args:
+            key (str): Clave de la imagen (ver key())
+            render (callable): render(ruta) escribe la imagen en la ruta y devuelve
+                un valor verdadero si la generó
+
+        Returns:
+            str: Ruta de la imagen o None si render no generó nada
+        """
+        cached = self.get(key)
+        if cached:
+            return cached
+
+        # Cerrojo por clave con la cantidad de peticiones que lo usan: solo se quita
+        # del diccionario cuando no queda ninguna esperando
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+            key_lock = entry[0]
+        try:
+            with key_lock:
+                # Otra petición pudo haberla generado mientras se esperaba
+                path = self.path(key)
+                if os.path.exists(path):
+                    return path
+
+                temp_path = self.temp_path(key)
+                try:
+                    if render(temp_path) and os.path.exists(temp_path):
+                        return self.commit(key, temp_path)
+                    return None
+                finally:
+                    self.discard(temp_path)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def entries(self):
+        """Lista las imágenes de la caché como (mtime, tamaño, ruta)."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not _ENTRY_PATTERN.match(entry.name):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """
+        Elimina las imágenes usadas hace más tiempo hasta respetar max_bytes.
+
+        Returns:
+            int: Imágenes eliminadas
+        """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        # La imagen más reciente se conserva aunque supere el límite por sí sola
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self):
+        """Devuelve imágenes, bytes, aciertos y fallos de la caché."""
+        entries = self.entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
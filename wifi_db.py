@@ -8,27 +8,72 @@ para almacenar y recuperar datos de escaneos WiFi.
 """
 
 import os
+import hashlib
 import json
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import pymongo
 from pymongo import MongoClient
+from pymongo.write_concern import WriteConcern
+from bson import json_util
 from bson.objectid import ObjectId
+import wifi_indexes
+import wifi_retention
+import wifi_rollups
+import wifi_smoothing
 
 # Configuración de MongoDB
 MONGO_HOST = os.environ.get('MONGO_HOST', 'localhost')
 MONGO_PORT = int(os.environ.get('MONGO_PORT', 27017))
 MONGO_DB = os.environ.get('MONGO_DB', 'wifi_analyzer')
 MONGO_COLLECTION = os.environ.get('MONGO_COLLECTION', 'wifi_scans')
+MONGO_SAMPLES_COLLECTION = os.environ.get('MONGO_SAMPLES_COLLECTION', 'wifi_samples')
+MONGO_SUMMARY_COLLECTION = os.environ.get('MONGO_SUMMARY_COLLECTION', 'wifi_scan_summary')
+
+# Redes con mejor señal que se guardan en el resumen del último escaneo
+SUMMARY_TOP_N = 10
+
+# Modo de almacenamiento de muestras por BSSID:
+# - 'embedded': solo el arreglo networks dentro de cada escaneo (comportamiento original)
+# - 'both': además, un documento compacto por (BSSID, timestamp) en MONGO_SAMPLES_COLLECTION
+SAMPLE_STORAGE = os.environ.get('MONGO_SAMPLE_STORAGE', 'embedded')
+
+# Documentos por lote al recorrer cursores (iter_scans, iter_network_history)
+ITER_BATCH_SIZE = 100
+
+# Marca de los escaneos guardados cuyas muestras por BSSID todavía no se insertaron
+# (como wifi_rollups.PENDING_FIELD para los rollups; ver mark_pending)
+SAMPLES_PENDING_FIELD = "samples_pending"
+
+# Segundos que se reutiliza el estado de los rollups (otro proceso puede terminar --rebuild-rollups)
+ROLLUPS_CHECK_TTL = 30
+
+# Importación masiva de archivos wifi_scan_*.json (import_existing_scans)
+IMPORT_BATCH_SIZE = 500                 # Escaneos por insert_many (y por punto de control)
+IMPORT_WORKERS = os.cpu_count() or 1    # Procesos que leen y validan los archivos
 
 # Configuración para MongoDB sin autenticación
 MONGO_USE_AUTH = False  # Cambiar a True si se configura autenticación en el futuro
 MONGO_USER = os.environ.get('MONGO_USER', '')
 MONGO_PASSWORD = os.environ.get('MONGO_PASSWORD', '')
 
+# Configuración del modo de escritura con búfer
+BUFFER_BATCH_SIZE = 20          # Escaneos por lote de insert_many
+BUFFER_FLUSH_INTERVAL = 300     # Segundos máximos que un escaneo espera en el búfer
+BUFFER_SPILL_FILE = os.environ.get('MONGO_SPILL_FILE', 'wifi_scans_spill.jsonl')
+# Write concern relajado: confirmación del primario sin esperar al journal.
+# Con {"w": 0} las escrituras no se confirman (más rápido, pero los errores no se detectan).
+BUFFER_WRITE_CONCERN = {"w": 1, "j": False}
+
 class WiFiDB:
     """Clase para manejar operaciones de base de datos para WiFi Analyzer"""
 
-    def __init__(self, host=MONGO_HOST, port=MONGO_PORT, db_name=MONGO_DB, collection_name=MONGO_COLLECTION):
+    def __init__(self, host=MONGO_HOST, port=MONGO_PORT, db_name=MONGO_DB, collection_name=MONGO_COLLECTION,
+                 buffered=False, batch_size=BUFFER_BATCH_SIZE, flush_interval=BUFFER_FLUSH_INTERVAL,
+                 spill_file=BUFFER_SPILL_FILE, write_concern=None, sample_storage=SAMPLE_STORAGE,
+                 samples_collection_name=MONGO_SAMPLES_COLLECTION, raw_retention_days=wifi_retention.RAW_RETENTION_DAYS):
         """
         Inicializa la conexión a MongoDB.
 
@@ -37,15 +82,49 @@ class WiFiDB:
             port (int): Puerto de MongoDB
             db_name (str): Nombre de la base de datos
             collection_name (str): Nombre de la colección
+            buffered (bool): Si es True, save_scan acumula escaneos en memoria y los
+                inserta por lotes con insert_many (ver flush())
+            batch_size (int): Escaneos en búfer que disparan un flush
+            flush_interval (float): Segundos desde el último flush que disparan uno nuevo
+            spill_file (str): Archivo JSONL donde se guardan los lotes que no se pudieron
+                insertar; se reintentan en el siguiente flush
+            write_concern (dict, optional): Opciones de WriteConcern para los lotes.
+                Si es None, se usa BUFFER_WRITE_CONCERN.
+            sample_storage (str): 'embedded' o 'both' (ver SAMPLE_STORAGE). Con 'both' cada
+                escaneo también se guarda como muestras por BSSID y el historial de redes se
+                lee de esa colección.
+            samples_collection_name (str): Nombre de la colección de muestras por BSSID
+            raw_retention_days (int): Días que se conservan los escaneos completos antes de
+                expirar (0 para conservarlos siempre); los rollups se conservan según
+                wifi_rollups.ROLLUP_RETENTION_DAYS (ver wifi_retention)
         """
         self.client = None
         self.db = None
         self.collection = None
+        self.samples = None
+        self.rollups_ready = False
+        self._rollups_checked = None
+        self._indexes_checked = False
+        # Filtros de señal por BSSID (el estado se guarda en wifi_smoothing.SMOOTHING_COLLECTION)
+        self.smoother = wifi_smoothing.SignalSmoother()
+        self.sample_storage = sample_storage
+        self.samples_collection_name = samples_collection_name
+        self.raw_retention_days = raw_retention_days
         self.host = host
         self.port = port
         self.db_name = db_name
         self.collection_name = collection_name
 
+        # Modo de escritura con búfer
+        self.buffered = buffered
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_file = spill_file
+        self.write_concern = write_concern if write_concern is not None else BUFFER_WRITE_CONCERN
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
         # Intentar conectar a MongoDB
         self.connect()
 
@@ -67,14 +146,38 @@ class WiFiDB:
             self.collection = self.db[self.collection_name]
             print(f"Conexión exitosa a MongoDB ({self.host}:{self.port}, DB: {self.db_name})")
 
-            # Crear índices para mejorar el rendimiento de las consultas
+            # Crear los índices que usan las consultas reales y verificar sus planes
             try:
-                self.collection.create_index([("timestamp", pymongo.DESCENDING)])
-                self.collection.create_index([("networks.essid", pymongo.TEXT)])
+                wifi_indexes.ensure_indexes(self.collection)
+                if not self._indexes_checked:
+                    self._indexes_checked = True
+                    plans = wifi_indexes.check_indexes(self.collection, verbose=False)
+                    for description, summary in plans.items():
+                        if summary.get("collscan"):
+                            print(f"Advertencia: la consulta '{description}' no usa índices (COLLSCAN)")
             except Exception as index_error:
                 print(f"Advertencia: No se pudieron crear índices: {index_error}")
                 print("Esto no afectará la funcionalidad básica, pero puede impactar el rendimiento.")
 
+            if self.sample_storage == 'both':
+                self.samples = ensure_samples_collection(self.db, self.samples_collection_name)
+            self.smoother.collection = self.db[wifi_smoothing.SMOOTHING_COLLECTION]
+
+            # Rollups por minuto/hora/día para las tendencias
+            try:
+                wifi_rollups.ensure_rollup_collections(self.db)
+                if not self._check_rollups(force=True):
+                    print("Los rollups no cubren los escaneos existentes; las tendencias leerán los escaneos "
+                          "completos. Ejecute 'wifi_analyzer.py --use-mongodb --rebuild-rollups'.")
+            except Exception as rollup_error:
+                print(f"Advertencia: No se pudieron preparar los rollups: {rollup_error}")
+
+            # Expiración de los escaneos completos (solo si los rollups los resumen)
+            try:
+                wifi_retention.apply_ttl(self.db, self.collection, self.raw_retention_days)
+            except Exception as retention_error:
+                print(f"Advertencia: No se pudo configurar la retención de escaneos: {retention_error}")
+
             return True
         except pymongo.errors.ServerSelectionTimeoutError as e:
             print(f"Error al conectar a MongoDB: {e}")
@@ -86,6 +189,27 @@ class WiFiDB:
             traceback.print_exc()
             return False
 
+    def _check_rollups(self, force=False):
+        """
+        Indica si los rollups cubren los escaneos, releyendo el estado de wifi_migrations
+        (un find_one) como mucho cada ROLLUPS_CHECK_TTL segundos.
+
+        Args:
+            force (bool): Si es True, se relee el estado aunque no haya vencido
+
+        Returns:
+            bool: True si las tendencias pueden leer los rollups
+        """
+        now = time.monotonic()
+        if force or self._rollups_checked is None or now - self._rollups_checked >= ROLLUPS_CHECK_TTL:
+            self._rollups_checked = now
+            try:
+                self.rollups_ready = wifi_rollups.rollups_ready(self.db, self.collection)
+            except pymongo.errors.PyMongoError as e:
+                # Se mantiene el último estado conocido hasta la próxima verificación
+                print(f"Advertencia: No se pudo verificar el estado de los rollups: {e}")
+        return self.rollups_ready
+
     def is_connected(self):
         """Verifica si la conexión a MongoDB está activa"""
         if not self.client:
@@ -96,45 +220,118 @@ class WiFiDB:
         except:
             return False
 
-    def save_scan(self, networks, metadata=None):
+    def save_scan(self, networks, metadata=None, timestamp=None):
         """
         Guarda los resultados de un escaneo en MongoDB.
 
         Args:
             networks (list): Lista de redes WiFi
             metadata (dict, optional): Metadatos adicionales
+            timestamp (datetime, optional): Momento del escaneo. Si es None, se usa el tiempo actual.
 
         Returns:
-            str: ID del documento insertado o None si hay un error
+            str: ID del documento insertado (o encolado en modo búfer) o None si hay un error
         """
+        # Crear documento
+        if timestamp is None:
+            timestamp = datetime.now()
+        # Añadir signal_smoothed/distance_smoothed a cada red
+        self.smoother.smooth(networks, timestamp)
+        document = {
+            "timestamp": timestamp,
+            "networks": networks,
+            "total_networks": len(networks)
+        }
+
+        # Añadir metadatos si existen
+        if metadata:
+            document["metadata"] = metadata
+        mark_pending(document, samples=self.samples is not None)
+
+        # En modo búfer no hay round-trip por escaneo: el _id se genera en el cliente
+        if self.buffered:
+            document["_id"] = ObjectId()
+            with self._buffer_lock:
+                self._buffer.append(document)
+                pending = len(self._buffer)
+            print(f"Escaneo en búfer con ID: {document['_id']} ({pending}/{self.batch_size})")
+
+            if pending >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+            return str(document["_id"])
+
         if not self.is_connected():
             if not self.connect():
                 print("No se pudo conectar a MongoDB. Los datos no se guardarán.")
                 return None
 
         try:
-            # Crear documento
-            timestamp = datetime.now()
-            document = {
-                "timestamp": timestamp,
-                "networks": networks,
-                "total_networks": len(networks)
-            }
-
-            # Añadir metadatos si existen
-            if metadata:
-                document["metadata"] = metadata
-
             # Insertar en la base de datos
             result = self.collection.insert_one(document)
 
             print(f"Datos guardados en MongoDB con ID: {result.inserted_id}")
+            self._save_samples([document])
+            self._save_rollups([document])
+            self.smoother.save()
+            self._save_summary(document)
             return str(result.inserted_id)
 
         except Exception as e:
             print(f"Error al guardar datos en MongoDB: {e}")
             return None
 
+    def _save_summary(self, document):
+        """
+        Actualiza el resumen precalculado del último escaneo.
+
+        Args:
+            document (dict): Documento de escaneo ya insertado (con _id)
+        """
+        try:
+            save_scan_summary(self.db, document)
+        except Exception as e:
+            print(f"Error al guardar el resumen del escaneo: {e}")
+
+    def _save_samples(self, documents):
+        """
+        Guarda las muestras por BSSID de los escaneos pendientes (modo 'both').
+
+        Args:
+            documents (list): Documentos de escaneo ya insertados (con _id; ver save_samples)
+        """
+        if self.samples is None:
+            return
+
+        try:
+            save_samples(self.samples, self.collection, documents)
+        except Exception as e:
+            # Los escaneos siguen marcados como pendientes
+            print(f"Error al guardar muestras por BSSID: {e}")
+
+    def _save_rollups(self, documents):
+        """
+        Suma los escaneos pendientes a los rollups por minuto, hora y día.
+
+        Args:
+            documents (list): Documentos de escaneo ya insertados (ver wifi_rollups.apply_rollups)
+        """
+        if not documents:
+            return
+
+        try:
+            wifi_rollups.apply_rollups(self.db, self.collection, documents)
+        except Exception as e:
+            # Los escaneos siguen marcados como pendientes: sin ellos los rollups no están
+            # completos y no se puede expirar nada hasta un rebuild_rollups
+            print(f"Error al actualizar los rollups: {e}")
+            self.rollups_ready = False
+            try:
+                wifi_retention.suspend_expiry(self.db, self.collection,
+                                              [document["_id"] for document in documents if "_id" in document])
+            except Exception as state_error:
+                print(f"Error al suspender la expiración de escaneos: {state_error}")
+            print("Ejecute 'wifi_analyzer.py --use-mongodb --rebuild-rollups'.")
+
     def get_scan(self, scan_id):
         """
         Recupera un escaneo específico por su ID.
@@ -174,10 +371,32 @@ class WiFiDB:
             print(f"Error al recuperar el escaneo más reciente: {e}")
             return None
 
+    def get_latest_scan_id(self):
+        """
+        Recupera el _id del escaneo más reciente (solo el índice _id, sin leer el documento).
+
+        Sirve como versión de los datos: cambia con cada escaneo nuevo.
+
+        Returns:
+            ObjectId: _id del último escaneo o None si no hay escaneos
+        """
+        if not self.is_connected():
+            if not self.connect():
+                return None
+
+        try:
+            latest = self.collection.find_one({}, {"_id": 1}, sort=[("_id", pymongo.DESCENDING)])
+            return latest["_id"] if latest else None
+        except Exception as e:
+            print(f"Error al recuperar el último escaneo: {e}")
+            return None
+
     def get_scans_in_timeframe(self, start_time, end_time=None):
         """
         Recupera escaneos en un rango de tiempo.
 
+        Carga todos los documentos en memoria; para rangos largos usar iter_scans().
+
         Args:
             start_time (datetime): Tiempo de inicio
             end_time (datetime, optional): Tiempo de fin. Si es None, se usa el tiempo actual.
@@ -185,25 +404,157 @@ class WiFiDB:
         Returns:
             list: Lista de documentos de escaneos
         """
+        return list(self.iter_scans(start_time, end_time))
+
+    def iter_scans(self, start_time, end_time=None, fields=None, batch_size=ITER_BATCH_SIZE):
+        """
+        Recorre los escaneos de un rango de tiempo sin cargarlos todos en memoria.
+
+        Args:
+            start_time (datetime): Tiempo de inicio
+            end_time (datetime, optional): Tiempo de fin. Si es None, se usa el tiempo actual.
+            fields (list, optional): Campos a devolver (p. ej. ["timestamp", "networks.channel"]).
+                Si es None, se devuelve el documento completo.
+            batch_size (int): Documentos por lote que se piden al servidor
+
+        Yields:
+            dict: Documentos de escaneo ordenados por timestamp
+        """
         if not self.is_connected():
             if not self.connect():
-                return []
+                return
 
         if end_time is None:
             end_time = datetime.now()
 
+        query = {"timestamp": {"$gte": start_time, "$lte": end_time}}
+        projection = {field: 1 for field in fields} if fields else None
+
         try:
-            query = {"timestamp": {"$gte": start_time, "$lte": end_time}}
-            results = list(self.collection.find(query).sort("timestamp", pymongo.ASCENDING))
-            return results
+            cursor = self.collection.find(query, projection).sort("timestamp", pymongo.ASCENDING).batch_size(batch_size)
+            with cursor:
+                yield from cursor
         except Exception as e:
             print(f"Error al recuperar escaneos en el rango de tiempo: {e}")
+
+    def count_scans(self, start_time, end_time=None):
+        """
+        Cuenta los escaneos de un rango de tiempo (usando el índice de timestamp).
+
+        Args:
+            start_time (datetime): Tiempo de inicio
+            end_time (datetime, optional): Tiempo de fin. Si es None, se usa el tiempo actual.
+
+        Returns:
+            int: Número de escaneos
+        """
+        if not self.is_connected():
+            if not self.connect():
+                return 0
+
+        if end_time is None:
+            end_time = datetime.now()
+
+        try:
+            return self.collection.count_documents({"timestamp": {"$gte": start_time, "$lte": end_time}})
+        except Exception as e:
+            print(f"Error al contar escaneos en el rango de tiempo: {e}")
+            return 0
+
+    def band_counts(self, start_time, end_time=None, bucket=None):
+        """
+        Cuenta las redes por banda con una agregación en MongoDB (ver band_counts()).
+
+        Returns:
+            list: Serie de conteos por bucket o lista vacía si hay un error
+        """
+        if not self.is_connected():
+            if not self.connect():
+                return []
+
+        try:
+            return band_counts(self.collection, start_time, end_time, bucket)
+        except Exception as e:
+            print(f"Error al contar redes por banda: {e}")
+            return []
+
+    def channel_histogram(self, start_time, end_time=None, bucket=None):
+        """
+        Calcula la ocupación de canales con una agregación en MongoDB (ver channel_histogram()).
+
+        Returns:
+            list: Serie del histograma por bucket o lista vacía si hay un error
+        """
+        if not self.is_connected():
+            if not self.connect():
+                return []
+
+        try:
+            return channel_histogram(self.collection, start_time, end_time, bucket)
+        except Exception as e:
+            print(f"Error al calcular el histograma de canales: {e}")
             return []
 
+    def get_band_series(self, start_time, end_time=None, granularity=None):
+        """
+        Recupera la serie de redes por banda y ocupación de canales desde los rollups.
+
+        Args:
+            start_time (datetime): Tiempo de inicio
+            end_time (datetime, optional): Tiempo de fin. Si es None, se usa el tiempo actual.
+            granularity (str, optional): 'minute', 'hour' o 'day'. Si es None, se elige
+                según el período.
+
+        Returns:
+            list: Serie (ver wifi_rollups.get_band_series) o None si los rollups no
+                cubren los escaneos y hay que leer los escaneos completos
+        """
+        if not self.is_connected() or not self._check_rollups():
+            return None
+
+        if end_time is None:
+            end_time = datetime.now()
+
+        try:
+            return wifi_rollups.get_band_series(self.db, start_time, end_time, granularity)
+        except Exception as e:
+            print(f"Error al recuperar rollups: {e}")
+            return None
+
+    def get_network_rollup(self, essid, mac=None, start_time=None, end_time=None, granularity=None):
+        """
+        Recupera el historial de señal (mínima, media y máxima) de una red desde los rollups.
+
+        Args:
+            essid (str): ESSID de la red
+            mac (str, optional): Dirección MAC de la red
+            start_time (datetime): Tiempo de inicio
+            end_time (datetime, optional): Tiempo de fin. Si es None, se usa el tiempo actual.
+            granularity (str, optional): 'minute', 'hour' o 'day'. Si es None, se elige
+                según el período.
+
+        Returns:
+            list: Historial con el formato de get_network_history o None si los
+                rollups no cubren los escaneos
+        """
+        if start_time is None or not self.is_connected() or not self._check_rollups():
+            return None
+
+        if end_time is None:
+            end_time = datetime.now()
+
+        try:
+            return wifi_rollups.get_bssid_series(self.db, start_time, end_time, essid, mac, granularity)
+        except Exception as e:
+            print(f"Error al recuperar rollups de la red: {e}")
+            return None
+
     def get_network_history(self, essid, mac=None, start_time=None, end_time=None):
         """
         Recupera el historial de una red específica.
 
+        Carga todo el historial en memoria; para rangos largos usar iter_network_history().
+
         Args:
             essid (str): ESSID de la red
             mac (str, optional): Dirección MAC de la red
@@ -213,9 +564,30 @@ class WiFiDB:
         Returns:
             list: Lista de documentos con la red específica
         """
+        return list(self.iter_network_history(essid, mac, start_time, end_time))
+
+    def iter_network_history(self, essid, mac=None, start_time=None, end_time=None, batch_size=ITER_BATCH_SIZE):
+        """
+        Recorre el historial de una red sin cargarlo todo en memoria.
+
+        Args:
+            essid (str): ESSID de la red
+            mac (str, optional): Dirección MAC de la red
+            start_time (datetime, optional): Tiempo de inicio
+            end_time (datetime, optional): Tiempo de fin
+            batch_size (int): Documentos por lote que se piden al servidor
+
+        Yields:
+            dict: {"timestamp", "network"} ordenados por timestamp
+        """
         if not self.is_connected():
             if not self.connect():
-                return []
+                return
+
+        # Con muestras por BSSID la consulta usa los índices (meta, timestamp) sin $unwind
+        if self.samples is not None:
+            yield from self._iter_network_history_from_samples(essid, mac, start_time, end_time, batch_size)
+            return
 
         query = {}
 
@@ -240,12 +612,14 @@ class WiFiDB:
 
         try:
             # Usar agregación para extraer solo la red específica de cada escaneo
+            # Ordenar antes de $unwind: el orden sale del índice y el servidor no
+            # necesita un $sort en memoria sobre todas las redes desenrolladas
             pipeline = [
                 {"$match": query},
+                {"$sort": {"timestamp": 1}},
                 {"$unwind": "$networks"},
                 {"$match": {"networks.essid": essid} if essid else {}},
                 {"$match": {"networks.mac": mac} if mac else {}},
-                {"$sort": {"timestamp": 1}},
                 {"$project": {
                     "timestamp": 1,
                     "network": "$networks",
@@ -253,11 +627,43 @@ class WiFiDB:
                 }}
             ]
 
-            results = list(self.collection.aggregate(pipeline))
-            return results
+            with self.collection.aggregate(pipeline, batchSize=batch_size) as cursor:
+                yield from cursor
         except Exception as e:
             print(f"Error al recuperar historial de red: {e}")
-            return []
+
+    def _iter_network_history_from_samples(self, essid, mac=None, start_time=None, end_time=None,
+                                           batch_size=ITER_BATCH_SIZE):
+        """
+        Recorre el historial de una red desde la colección de muestras por BSSID.
+
+        Devuelve el mismo formato que iter_network_history ({"timestamp", "network"}).
+        """
+        query = samples_query(essid, mac, start_time, end_time)
+
+        try:
+            pipeline = [
+                {"$match": query},
+                {"$sort": {"timestamp": 1}},
+                {"$project": {
+                    "_id": 0,
+                    "timestamp": 1,
+                    "network": {
+                        "mac": "$meta.bssid",
+                        "essid": "$meta.essid",
+                        "channel": "$channel",
+                        "frequency": "$frequency",
+                        "signal": "$signal",
+                        "signal_smoothed": "$signal_smoothed",
+                        "quality": "$quality",
+                        "distance": "$distance"
+                    }
+                }}
+            ]
+            with self.samples.aggregate(pipeline, batchSize=batch_size) as cursor:
+                yield from cursor
+        except Exception as e:
+            print(f"Error al recuperar historial de red desde las muestras: {e}")
 
     def export_to_json(self, scan_id, filename=None):
         """
@@ -293,6 +699,43 @@ class WiFiDB:
             print(f"Error al exportar escaneo a JSON: {e}")
             return None
 
+    def export_timeframe_to_json(self, start_time, end_time=None, filename=None):
+        """
+        Exporta los escaneos de un rango de tiempo a un archivo JSON (arreglo de escaneos).
+
+        Los escaneos se escriben de a uno a medida que se leen del cursor, de modo
+        que la memoria usada no crece con el tamaño del rango.
+
+        Args:
+            start_time (datetime): Tiempo de inicio
+            end_time (datetime, optional): Tiempo de fin. Si es None, se usa el tiempo actual.
+            filename (str, optional): Nombre del archivo. Si es None, se genera automáticamente.
+
+        Returns:
+            str: Ruta del archivo guardado o None si hay un error
+        """
+        if filename is None:
+            filename = f"wifi_scans_export_{start_time.strftime('%Y%m%d_%H%M%S')}.json"
+
+        try:
+            exported = 0
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write("[")
+                for scan in self.iter_scans(start_time, end_time):
+                    # Convertir ObjectId y datetime a string para serialización JSON
+                    scan["_id"] = str(scan["_id"])
+                    scan["timestamp"] = scan["timestamp"].isoformat()
+                    f.write(",\n" if exported else "\n")
+                    json.dump(scan, f)
+                    exported += 1
+                f.write("\n]\n")
+
+            print(f"{exported} escaneos exportados a {filename}")
+            return filename
+        except Exception as e:
+            print(f"Error al exportar escaneos a JSON: {e}")
+            return None
+
     def import_from_json(self, filename):
         """
         Importa un escaneo desde un archivo JSON.
@@ -318,9 +761,12 @@ class WiFiDB:
             # Eliminar _id si existe para evitar conflictos
             if "_id" in data:
                 del data["_id"]
+            mark_pending(data, samples=self.samples is not None)
 
             # Insertar en la base de datos
             result = self.collection.insert_one(data)
+            self._save_samples([data])
+            self._save_rollups([data])
 
             print(f"Datos importados a MongoDB con ID: {result.inserted_id}")
             return str(result.inserted_id)
@@ -328,21 +774,756 @@ class WiFiDB:
             print(f"Error al importar datos desde JSON: {e}")
             return None
 
+    def _read_spill(self):
+        """Lee los documentos pendientes del archivo de respaldo."""
+        if not self.spill_file or not os.path.exists(self.spill_file):
+            return []
+
+        documents = []
+        with open(self.spill_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    document = json_util.loads(line)
+                    # Respaldos anteriores a las marcas de pendiente: nunca se sumaron
+                    if wifi_rollups.PENDING_FIELD not in document:
+                        mark_pending(document, samples=self.samples is not None)
+                    documents.append(document)
+        return documents
+
+    def _write_spill(self, documents):
+        """Reemplaza el archivo de respaldo con los documentos indicados."""
+        if not self.spill_file:
+            print(f"ADVERTENCIA: Sin archivo de respaldo, se perdieron {len(documents)} escaneos.")
+            return
+
+        tmp_file = self.spill_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for document in documents:
+                f.write(json_util.dumps(document) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.spill_file)
+
+    def flush(self):
+        """
+        Inserta con insert_many los escaneos del búfer y del archivo de respaldo.
+
+        Si MongoDB no está disponible, los documentos que no se confirmaron se
+        guardan en el archivo de respaldo (spill_file) y se reintentan en el
+        próximo flush. Las muestras y los rollups se calculan solo para los
+        escaneos que siguen marcados como pendientes en wifi_scans, de modo que
+        reenviar un escaneo ya guardado no los duplica ni los omite.
+
+        Returns:
+            int: Número de documentos insertados
+        """
+        with self._buffer_lock:
+            batch = self._buffer
+            self._buffer = []
+            self._last_flush = time.monotonic()
+
+        try:
+            spilled = self._read_spill()
+        except Exception as e:
+            print(f"Error al leer el archivo de respaldo {self.spill_file}: {e}")
+            spilled = []
+
+        documents = spilled + batch
+        if not documents:
+            return 0
+
+        inserted = []
+        duplicates = []
+        unsaved = documents
+        try:
+            if self.collection is None and not self.connect():
+                raise pymongo.errors.ConnectionFailure("sin conexión a MongoDB")
+
+            # Al reenviar el respaldo hace falta confirmación: con w=0 no se sabría
+            # qué escaneos quedaron guardados
+            write_concern = dict(self.write_concern)
+            if spilled and write_concern.get("w") == 0:
+                write_concern["w"] = 1
+            collection = self.collection.with_options(write_concern=WriteConcern(**write_concern))
+
+            failed = set()
+            duplicated = set()
+            try:
+                collection.insert_many(documents, ordered=False)
+            except pymongo.errors.BulkWriteError as e:
+                # Un _id duplicado es un escaneo del respaldo que ya estaba guardado;
+                # los documentos con otros errores no se guardaron
+                for error in e.details.get("writeErrors", []):
+                    (duplicated if error.get("code") == 11000 else failed).add(error.get("index"))
+
+            inserted = [document for i, document in enumerate(documents) if i not in failed | duplicated]
+            duplicates = [documents[i] for i in sorted(duplicated)]
+            unsaved = [documents[i] for i in sorted(failed)]
+            if failed:
+                print(f"MongoDB rechazó {len(failed)} escaneos del lote")
+        except Exception as e:
+            print(f"Error al guardar lote en MongoDB: {e}")
+
+        # Respaldo: solo los escaneos cuya inserción no se confirmó
+        if unsaved:
+            try:
+                self._write_spill(unsaved)
+                print(f"{len(unsaved)} escaneos guardados en el respaldo {self.spill_file}")
+            except Exception as spill_error:
+                print(f"Error al escribir el respaldo {self.spill_file}: {spill_error}")
+                # Conservar en memoria los del búfer (los del respaldo siguen en el archivo)
+                unsaved_ids = {id(document) for document in unsaved}
+                with self._buffer_lock:
+                    self._buffer = [document for document in batch if id(document) in unsaved_ids] + self._buffer
+        elif spilled:
+            os.remove(self.spill_file)
+
+        stored = inserted + duplicates
+        if not stored:
+            return 0
+
+        # Los duplicados se releen de wifi_scans: su marca de pendiente es la guardada
+        pending = inserted
+        if duplicates:
+            try:
+                pending = pending + find_pending(self.collection, {"_id": {"$in": [d["_id"] for d in duplicates]}})
+            except Exception as e:
+                print(f"Error al leer los escaneos reenviados: {e}")
+        self._save_samples(pending)
+        self._save_rollups(pending)
+        self.smoother.save()
+        self._save_summary(max(stored, key=lambda document: document["_id"]))
+
+        print(f"Lote guardado en MongoDB: {len(inserted)} escaneos ({len(spilled)} desde el respaldo, "
+              f"{len(duplicates)} ya estaban guardados)")
+        return len(inserted)
+
+    def compact(self, reclaim_storage=False):
+        """
+        Aplica la política de retención: borra los escaneos completos expirados y los
+        rollups finos antiguos, y registra el espacio liberado (ver wifi_retention.compact).
+
+        Args:
+            reclaim_storage (bool): Si es True, ejecuta además el comando compact de MongoDB
+
+        Returns:
+            dict: Métricas de la compactación o None si hay un error
+        """
+        if not self.is_connected():
+            if not self.connect():
+                return None
+
+        try:
+            return wifi_retention.compact(self.db, self.collection, self.raw_retention_days,
+                                          samples_name=self.samples.name if self.samples is not None else None,
+                                          reclaim_storage=reclaim_storage)
+        except Exception as e:
+            print(f"Error al compactar los escaneos: {e}")
+            return None
+
     def close(self):
-        """Cierra la conexión a MongoDB"""
+        """Vacía el búfer (si corresponde) y cierra la conexión a MongoDB"""
+        if self.buffered:
+            self.flush()
         if self.client:
             self.client.close()
             print("Conexión a MongoDB cerrada")
 
 
+def _ranking_signal(network):
+    """Señal con la que se ordenan las redes: la suavizada, la medida o -100."""
+    for field in ('signal_smoothed', 'signal'):
+        if network.get(field) is not None:
+            return network[field]
+    return -100
+
+
+def build_scan_summary(document, top_n=SUMMARY_TOP_N):
+    """
+    Precalcula el resumen de un escaneo que usan los endpoints del dashboard.
+
+    Args:
+        document (dict): Documento de escaneo (con _id, timestamp y networks)
+        top_n (int): Número de redes con mejor señal a conservar
+
+    Returns:
+        dict: Resumen con histograma de canales por banda, top-N por señal (suavizada) y conteos
+    """
+    networks = document.get("networks", [])
+    channels_2g = {}
+    channels_5g = {}
+
+    for network in networks:
+        channel = network.get('channel')
+        if channel:
+            # Claves de texto: MongoDB no admite claves numéricas en subdocumentos
+            if channel <= 14:  # 2.4GHz
+                channels_2g[str(channel)] = channels_2g.get(str(channel), 0) + 1
+            else:  # 5GHz
+                channels_5g[str(channel)] = channels_5g.get(str(channel), 0) + 1
+
+    # Ordenar por la señal suavizada si existe: el top-N no salta con el ruido de cada escaneo
+    top_networks = sorted(networks, key=_ranking_signal, reverse=True)[:top_n]
+
+    return {
+        "scan_id": document.get("_id"),
+        "timestamp": document.get("timestamp"),
+        "total_networks": len(networks),
+        "count_2g": sum(channels_2g.values()),
+        "count_5g": sum(channels_5g.values()),
+        "channels_2g": channels_2g,
+        "channels_5g": channels_5g,
+        "top_networks": top_networks,
+    }
+
+
+def save_scan_summary(database, document, collection_name=MONGO_SUMMARY_COLLECTION):
+    """
+    Guarda el resumen del escaneo como resumen del "último escaneo".
+
+    Solo reemplaza el resumen si el escaneo es más reciente que el guardado.
+
+    Args:
+        database (Database): Base de datos de pymongo
+        document (dict): Documento de escaneo ya insertado (con _id)
+        collection_name (str): Colección donde se guarda el resumen
+
+    Returns:
+        dict: Resumen calculado
+    """
+    summary = build_scan_summary(document)
+    try:
+        database[collection_name].update_one(
+            {"_id": "latest", "$or": [{"scan_id": {"$lt": summary["scan_id"]}}, {"scan_id": {"$exists": False}}]},
+            {"$set": summary},
+            upsert=True
+        )
+    except pymongo.errors.DuplicateKeyError:
+        # Ya existe un resumen de un escaneo más reciente
+        pass
+    return summary
+
+
+def _bucket_expression(bucket):
+    """
+    Expresión de agregación que trunca el timestamp a buckets de `bucket` segundos.
+
+    Se usa aritmética sobre milisegundos en lugar de $dateTrunc (MongoDB >= 5.0)
+    para que funcione con mongo:4.4 en Raspberry Pi. Sin bucket, cada escaneo
+    es su propio punto.
+    """
+    if not bucket:
+        return "$timestamp"
+    millis = {"$toLong": "$timestamp"}
+    return {"$toDate": {"$subtract": [millis, {"$mod": [millis, int(bucket * 1000)]}]}}
+
+
+def band_counts(collection, start_time, end_time=None, bucket=None):
+    """
+    Cuenta las redes por banda en MongoDB y devuelve solo la serie resultante.
+
+    Args:
+        collection (Collection): Colección wifi_scans
+        start_time (datetime): Tiempo de inicio
+        end_time (datetime, optional): Tiempo de fin. Si es None, se usa el tiempo actual.
+        bucket (int, optional): Segundos por bucket. Si es None, un punto por escaneo.
+
+    Returns:
+        list: [{"timestamp", "scans", "total", "count_2g", "count_5g"}] con promedios
+            por escaneo dentro de cada bucket
+    """
+    if end_time is None:
+        end_time = datetime.now()
+
+    def band_size(condition):
+        return {"$size": {"$filter": {"input": "$networks.channel", "as": "ch", "cond": condition}}}
+
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": start_time, "$lte": end_time}}},
+        {"$project": {
+            "_id": 0,
+            "t": _bucket_expression(bucket),
+            "total": {"$size": "$networks"},
+            "count_2g": band_size({"$and": [{"$gt": ["$$ch", 0]}, {"$lte": ["$$ch", 14]}]}),
+            "count_5g": band_size({"$gt": ["$$ch", 14]}),
+        }},
+        {"$group": {
+            "_id": "$t",
+            "scans": {"$sum": 1},
+            "total": {"$avg": "$total"},
+            "count_2g": {"$avg": "$count_2g"},
+            "count_5g": {"$avg": "$count_5g"},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+    series = []
+    for row in collection.aggregate(pipeline):
+        row["timestamp"] = row.pop("_id")
+        series.append(row)
+    return series
+
+
+def channel_histogram(collection, start_time, end_time=None, bucket=None):
+    """
+    Calcula la ocupación de canales en MongoDB y devuelve solo el histograma.
+
+    Args:
+        collection (Collection): Colección wifi_scans
+        start_time (datetime): Tiempo de inicio
+        end_time (datetime, optional): Tiempo de fin. Si es None, se usa el tiempo actual.
+        bucket (int, optional): Segundos por bucket. Si es None, un punto por escaneo.
+
+    Returns:
+        list: [{"timestamp", "scans", "channels_2g": {canal: media}, "channels_5g": {...}}]
+            con el mismo formato que wifi_rollups.get_band_series
+    """
+    if end_time is None:
+        end_time = datetime.now()
+
+    match = {"$match": {"timestamp": {"$gte": start_time, "$lte": end_time}}}
+    bucket_expression = _bucket_expression(bucket)
+
+    # Escaneos por bucket (para promediar) y redes por (bucket, canal)
+    scans = {
+        row["_id"]: row["scans"]
+        for row in collection.aggregate([
+            match,
+            {"$group": {"_id": bucket_expression, "scans": {"$sum": 1}}},
+        ])
+    }
+    counts = collection.aggregate([
+        match,
+        {"$project": {"_id": 0, "t": bucket_expression, "ch": "$networks.channel"}},
+        {"$unwind": "$ch"},
+        {"$match": {"ch": {"$gt": 0}}},
+        {"$group": {"_id": {"t": "$t", "ch": "$ch"}, "n": {"$sum": 1}}},
+    ])
+
+    series = {
+        timestamp: {"timestamp": timestamp, "scans": total, "channels_2g": {}, "channels_5g": {}}
+        for timestamp, total in scans.items()
+    }
+    for row in counts:
+        point = series[row["_id"]["t"]]
+        channel = row["_id"]["ch"]
+        band = "channels_2g" if channel <= 14 else "channels_5g"
+        point[band][channel] = row["n"] / point["scans"]
+
+    return [series[timestamp] for timestamp in sorted(series)]
+
+
+# Campos de cada red que se copian a las muestras por BSSID
+SAMPLE_FIELDS = ("signal", "signal_smoothed", "channel", "frequency", "quality", "distance")
+
+
+def build_samples(document):
+    """
+    Convierte un documento de escaneo en muestras compactas por BSSID.
+
+    Cada muestra tiene la forma
+    {"timestamp", "meta": {"bssid", "essid"}, "scan_id", "signal", "channel", ...}.
+
+    Args:
+        document (dict): Documento de escaneo (con _id, timestamp y networks)
+
+    Returns:
+        list: Lista de muestras
+    """
+    samples = []
+    for network in document.get("networks", []):
+        sample = {
+            "timestamp": document["timestamp"],
+            "meta": {"bssid": network.get("mac"), "essid": network.get("essid")},
+            "scan_id": document.get("_id"),
+        }
+        for field in SAMPLE_FIELDS:
+            if network.get(field) is not None:
+                sample[field] = network[field]
+        samples.append(sample)
+    return samples
+
+
+def mark_pending(document, samples=False):
+    """
+    Marca un escaneo que se va a insertar como pendiente de rollups (y de muestras).
+
+    Las marcas se quitan al sumar el escaneo (wifi_rollups.apply_rollups) o al
+    insertar sus muestras (save_samples). Un escaneo guardado sin marca ya tiene
+    ambas cosas, aunque se vuelva a enviar.
+
+    Args:
+        document (dict): Documento de escaneo (se modifica en el lugar)
+        samples (bool): Si es True, también queda pendiente de muestras por BSSID
+
+    Returns:
+        dict: El mismo documento
+    """
+    document[wifi_rollups.PENDING_FIELD] = True
+    if samples:
+        document[SAMPLES_PENDING_FIELD] = True
+    return document
+
+
+def find_pending(collection, query):
+    """
+    Lee de wifi_scans los escaneos de la consulta que siguen pendientes de rollups o muestras.
+
+    Args:
+        collection (Collection): Colección wifi_scans
+        query (dict): Filtro (p. ej. por _id o content_hash)
+
+    Returns:
+        list: Documentos con timestamp, networks y sus marcas de pendiente
+    """
+    query = dict(query, **{"$or": [{wifi_rollups.PENDING_FIELD: True}, {SAMPLES_PENDING_FIELD: True}]})
+    projection = {"timestamp": 1, "networks": 1, wifi_rollups.PENDING_FIELD: 1, SAMPLES_PENDING_FIELD: 1}
+    return list(collection.find(query, projection))
+
+
+def save_samples(samples_collection, scans_collection, documents):
+    """
+    Inserta las muestras por BSSID de los escaneos marcados SAMPLES_PENDING_FIELD y quita la marca.
+
+    Args:
+        samples_collection (Collection): Colección de muestras
+        scans_collection (Collection): Colección wifi_scans
+        documents (list): Documentos de escaneo guardados (con _id)
+
+    Returns:
+        int: Número de muestras insertadas
+    """
+    documents = [document for document in documents if document.get(SAMPLES_PENDING_FIELD)]
+    if not documents:
+        return 0
+
+    samples = []
+    for document in documents:
+        samples.extend(build_samples(document))
+    if samples:
+        samples_collection.insert_many(samples, ordered=False)
+    scans_collection.update_many({"_id": {"$in": [document["_id"] for document in documents]}},
+                                 {"$unset": {SAMPLES_PENDING_FIELD: ""}})
+    for document in documents:
+        document.pop(SAMPLES_PENDING_FIELD, None)
+    return len(samples)
+
+
+def samples_query(essid=None, mac=None, start_time=None, end_time=None):
+    """
+    Construye el filtro de la colección de muestras por BSSID.
+
+    Args:
+        essid (str, optional): ESSID de la red
+        mac (str, optional): Dirección MAC (BSSID) de la red
+        start_time (datetime, optional): Tiempo de inicio
+        end_time (datetime, optional): Tiempo de fin
+
+    Returns:
+        dict: Filtro de MongoDB
+    """
+    query = {}
+    if mac:
+        query["meta.bssid"] = mac
+    if essid:
+        query["meta.essid"] = essid
+    if start_time or end_time:
+        query["timestamp"] = {}
+        if start_time:
+            query["timestamp"]["$gte"] = start_time
+        if end_time:
+            query["timestamp"]["$lte"] = end_time
+    return query
+
+
+def ensure_samples_collection(database, name=MONGO_SAMPLES_COLLECTION):
+    """
+    Crea (si no existe) la colección de muestras por BSSID y sus índices.
+
+    En MongoDB 5.0 o superior se crea como colección time-series con
+    timeField "timestamp" y metaField "meta" ({"bssid", "essid"}). En versiones
+    anteriores (p. ej. mongo:4.4 en Raspberry Pi) se usa una colección normal
+    con los mismos índices.
+
+    Args:
+        database (Database): Base de datos de pymongo
+        name (str): Nombre de la colección
+
+    Returns:
+        Collection: Colección de muestras
+    """
+    try:
+        if name not in database.list_collection_names():
+            version = database.client.server_info().get("versionArray", [0])
+            if version[0] >= 5:
+                database.create_collection(name, timeseries={
+                    "timeField": "timestamp",
+                    "metaField": "meta",
+                    "granularity": "minutes"
+                })
+                print(f"Colección time-series '{name}' creada")
+            else:
+                database.create_collection(name)
+                print(f"Colección '{name}' creada (MongoDB < 5.0, sin time-series)")
+
+        samples = database[name]
+        samples.create_index([("meta.bssid", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)])
+        samples.create_index([("meta.essid", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)])
+        try:
+            # Para buscar las muestras ya migradas de cada escaneo (ver migrate_to_samples).
+            # Las colecciones time-series de MongoDB 5.0 no admiten índices sobre mediciones;
+            # ahí la búsqueda se acota por timestamp
+            samples.create_index([("scan_id", pymongo.ASCENDING)])
+        except pymongo.errors.OperationFailure:
+            pass
+        return samples
+    except Exception as e:
+        print(f"Advertencia: No se pudo preparar la colección de muestras '{name}': {e}")
+        return database[name]
+
+
+def existing_samples(samples_collection, documents):
+    """
+    Devuelve las muestras que ya existen de los escaneos indicados.
+
+    Args:
+        samples_collection (Collection): Colección de muestras
+        documents (list): Documentos de escaneo (con _id y timestamp)
+
+    Returns:
+        set: Pares (scan_id, bssid) ya guardados
+    """
+    if not documents:
+        return set()
+    timestamps = [document["timestamp"] for document in documents]
+    query = {"scan_id": {"$in": [document["_id"] for document in documents]},
+             "timestamp": {"$gte": min(timestamps), "$lte": max(timestamps)}}
+    return {(sample.get("scan_id"), sample.get("meta", {}).get("bssid"))
+            for sample in samples_collection.find(query, {"_id": 0, "scan_id": 1, "meta.bssid": 1})}
+
+
+def migrate_to_samples(db, batch_size=500):
+    """
+    Copia los escaneos existentes de wifi_scans a la colección de muestras por BSSID.
+
+    El avance se guarda en la colección wifi_migrations (último _id migrado), de
+    modo que la migración se puede interrumpir y reanudar. Antes de insertar cada
+    lote se buscan las muestras que ya existen por (scan_id, BSSID): no se duplican
+    las de los escaneos guardados con SAMPLE_STORAGE='both' ni las de un lote que
+    se insertó justo antes de interrumpirse (sin llegar al punto de control).
+
+    Args:
+        db (WiFiDB): Instancia de WiFiDB conectada
+        batch_size (int): Escaneos leídos por lote
+
+    Returns:
+        int: Número de muestras insertadas
+    """
+    if not db.is_connected():
+        print("No se pudo conectar a MongoDB. No se migrarán los escaneos.")
+        return 0
+
+    samples = db.samples
+    if samples is None:
+        samples = ensure_samples_collection(db.db, db.samples_collection_name)
+
+    progress = db.db["wifi_migrations"]
+    state = progress.find_one({"_id": "samples"}) or {}
+    query = {"_id": {"$gt": state["last_scan_id"]}} if state.get("last_scan_id") else {}
+
+    total_scans = db.collection.count_documents(query)
+    print(f"Migrando {total_scans} escaneos a '{samples.name}'...")
+
+    cursor = db.collection.find(query, {"timestamp": 1, "networks": 1}).sort("_id", pymongo.ASCENDING).batch_size(batch_size)
+    inserted = 0
+    skipped = 0
+    migrated = 0
+    batch = []
+
+    def write_batch():
+        nonlocal inserted, skipped
+        existing = existing_samples(samples, batch)
+        pending = []
+        for document in batch:
+            for sample in build_samples(document):
+                if (sample["scan_id"], sample["meta"]["bssid"]) in existing:
+                    skipped += 1
+                else:
+                    pending.append(sample)
+        if pending:
+            samples.insert_many(pending, ordered=False)
+        inserted += len(pending)
+        # Estos escaneos ya tienen todas sus muestras (ver save_samples)
+        db.collection.update_many({"_id": {"$in": [document["_id"] for document in batch]},
+                                   SAMPLES_PENDING_FIELD: True}, {"$unset": {SAMPLES_PENDING_FIELD: ""}})
+        progress.update_one({"_id": "samples"}, {"$set": {"last_scan_id": batch[-1]["_id"]}}, upsert=True)
+
+    for document in cursor:
+        batch.append(document)
+        migrated += 1
+
+        if len(batch) >= batch_size:
+            write_batch()
+            batch = []
+            print(f"  {migrated}/{total_scans} escaneos migrados ({inserted} muestras, {skipped} ya existían)")
+
+    if batch:
+        write_batch()
+
+    print(f"Migración completada: {migrated} escaneos, {inserted} muestras ({skipped} ya existían)")
+    return inserted
+
+
+def scan_content_hash(timestamp, networks):
+    """
+    Calcula la clave de deduplicación de un escaneo: SHA-1 del timestamp y las redes.
+
+    Las redes se serializan con las claves ordenadas, de modo que el mismo escaneo
+    da la misma clave aunque venga de archivos con otro formato o indentación.
+
+    Args:
+        timestamp (datetime): Momento del escaneo
+        networks (list): Redes del escaneo
+
+    Returns:
+        str: Hash hexadecimal (campo content_hash del documento, con índice único)
+    """
+    digest = hashlib.sha1(timestamp.isoformat().encode('utf-8'))
+    digest.update(json.dumps(networks, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _parse_scan_file(path):
+    """
+    Lee un archivo wifi_scan_*.json y arma su documento (se ejecuta en los procesos del pool).
+
+    Returns:
+        tuple: (nombre del archivo, documento o None, error o None)
+    """
+    json_file = os.path.basename(path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            networks = json.load(f)
+        if not isinstance(networks, list):
+            raise ValueError("el archivo no contiene una lista de redes")
+
+        # Extraer timestamp del nombre del archivo; si no tiene fecha, la de modificación
+        # (estable entre ejecuciones, para que la clave de deduplicación no cambie)
+        timestamp_str = json_file.replace('wifi_scan_', '').replace('.json', '')
+        try:
+            timestamp = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
+        except ValueError:
+            timestamp = datetime.fromtimestamp(int(os.path.getmtime(path)))
+
+        document = {
+            "timestamp": timestamp,
+            "networks": networks,
+            "total_networks": len(networks),
+            "content_hash": scan_content_hash(timestamp, networks),
+            "metadata": {
+                "imported_from": json_file
+            }
+        }
+        return json_file, document, None
+    except Exception as e:
+        return json_file, None, str(e)
+
+
+def _iter_parsed_batches(paths, workers, batch_size):
+    """
+    Lee los archivos por lotes, en paralelo si hay más de un proceso.
+
+    El lote siguiente se reparte al pool antes de devolver el actual, de modo que
+    la lectura se solapa con la inserción y en memoria hay como mucho dos lotes.
+
+    Yields:
+        list: Resultados de _parse_scan_file de cada lote, en el orden de los archivos
+    """
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    if workers <= 1 or len(batches) == 0:
+        for batch in batches:
+            yield [_parse_scan_file(path) for path in batch]
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, batch_size // (workers * 4))
+        pending = pool.map(_parse_scan_file, batches[0], chunksize=chunksize)
+        for batch in batches[1:]:
+            following = pool.map(_parse_scan_file, batch, chunksize=chunksize)
+            yield list(pending)
+            pending = following
+        yield list(pending)
+
+
+def insert_scans(db, documents):
+    """
+    Inserta escaneos con insert_many desordenado, descartando los duplicados.
+
+    Los documentos con un content_hash (o _id) ya existente fallan por el índice
+    único sin detener el lote. Las muestras por BSSID y los rollups se derivan de
+    lo que está guardado: los escaneos insertados más los duplicados que en
+    wifi_scans siguen marcados como pendientes (p. ej. los de un lote que se
+    insertó a medias antes de abortar la importación). Así reimportar completa lo
+    que faltaba sin duplicar nada.
+
+    Args:
+        db (WiFiDB): Instancia de WiFiDB conectada
+        documents (list): Documentos de escaneo
+
+    Returns:
+        tuple: (escaneos insertados, duplicados)
+
+    Raises:
+        BulkWriteError: Si algún documento falló por otro motivo que un duplicado
+    """
+    if not documents:
+        return 0, 0
+
+    for document in documents:
+        mark_pending(document, samples=db.samples is not None)
+
+    failed = set()
+    try:
+        db.collection.insert_many(documents, ordered=False)
+    except pymongo.errors.BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != 11000 for error in errors):
+            raise
+        failed = {error.get("index") for error in errors}
+
+    inserted = [document for i, document in enumerate(documents) if i not in failed]
+    duplicated = [documents[i] for i in sorted(failed)]
+    hashes = [document["content_hash"] for document in duplicated if "content_hash" in document]
+    ids = [document["_id"] for document in duplicated if "content_hash" not in document]
+    if hashes or ids:
+        query = {"$or": [{"content_hash": {"$in": hashes}}, {"_id": {"$in": ids}}]}
+        inserted += find_pending(db.collection, query)
+
+    db._save_samples(inserted)
+    db._save_rollups(inserted)
+    return len(documents) - len(failed), len(failed)
+
+
 # Función para importar escaneos existentes a MongoDB
-def import_existing_scans(directory='.', db=None):
+def import_existing_scans(directory='.', db=None, workers=IMPORT_WORKERS, batch_size=IMPORT_BATCH_SIZE, resume=True):
     """
     Importa todos los archivos JSON de escaneos existentes a MongoDB.
 
+    Los archivos se leen en un pool de procesos y se insertan por lotes con
+    insert_many. Cada escaneo lleva un content_hash con índice único, de modo que
+    volver a importar un directorio no crea documentos duplicados. El avance (último
+    archivo de cada lote insertado, en orden de nombre) se guarda en la colección
+    wifi_migrations: una importación interrumpida sigue desde ahí y una nueva
+    ejecución solo lee los archivos posteriores.
+
     Args:
         directory (str): Directorio donde buscar archivos JSON
         db (WiFiDB, optional): Instancia de WiFiDB. Si es None, se crea una nueva.
+        workers (int): Procesos que leen los archivos (1 para leerlos en serie)
+        batch_size (int): Escaneos por insert_many y por punto de control
+        resume (bool): Si es False, se ignora el punto de control y se leen todos los
+            archivos (los ya importados se descartan como duplicados)
 
     Returns:
         int: Número de archivos importados
@@ -354,46 +1535,103 @@ def import_existing_scans(directory='.', db=None):
         print("No se pudo conectar a MongoDB. No se importarán los escaneos.")
         return 0
 
-    # Buscar archivos JSON de escaneos
-    json_files = [f for f in os.listdir(directory) if f.startswith('wifi_scan_') and f.endswith('.json')]
+    # Buscar archivos JSON de escaneos (en orden de nombre, es decir, de fecha)
+    json_files = sorted(f for f in os.listdir(directory) if f.startswith('wifi_scan_') and f.endswith('.json'))
+
+    progress = db.db["wifi_migrations"]
+    checkpoint_id = f"import_json:{os.path.abspath(directory)}"
+    state = (progress.find_one({"_id": checkpoint_id}) or {}) if resume else {}
+    if state.get("last_file"):
+        pending_files = [f for f in json_files if f > state["last_file"]]
+        print(f"Reanudando después de {state['last_file']}: "
+              f"{len(json_files) - len(pending_files)} archivos ya procesados")
+    else:
+        pending_files = json_files
+
+    total = len(pending_files)
+    print(f"Importando {total} archivos con {workers} procesos (lotes de {batch_size})...")
+    paths = [os.path.join(directory, json_file) for json_file in pending_files]
 
     imported_count = 0
-    for json_file in json_files:
-        file_path = os.path.join(directory, json_file)
+    duplicates = 0
+    errors = 0
+    processed = 0
+    start = time.monotonic()
+    try:
+        for results in _iter_parsed_batches(paths, max(1, workers), max(1, batch_size)):
+            documents = []
+            for json_file, document, error in results:
+                if error:
+                    print(f"Error al importar {json_file}: {error}")
+                    errors += 1
+                else:
+                    documents.append(document)
+
+            inserted, duplicated = insert_scans(db, documents)
+            imported_count += inserted
+            duplicates += duplicated
+            processed += len(results)
+
+            # Punto de control: todos los archivos hasta este se insertaron o descartaron
+            progress.update_one({"_id": checkpoint_id},
+                                {"$set": {"last_file": results[-1][0], "updated": datetime.now()},
+                                 "$inc": {"imported": inserted, "duplicates": duplicated}},
+                                upsert=True)
+
+            elapsed = time.monotonic() - start
+            rate = processed / elapsed if elapsed > 0 else 0
+            remaining = (total - processed) / rate if rate else 0
+            print(f"  {processed}/{total} archivos ({rate:.0f} archivos/s, {imported_count} nuevos, "
+                  f"{duplicates} duplicados, {errors} con errores, faltan ~{remaining:.0f} s)")
+    except pymongo.errors.PyMongoError as e:
+        print(f"Importación interrumpida: {e}")
+        print("Al volver a ejecutarla seguirá desde el último lote insertado.")
+
+    print(f"Se importaron {imported_count} de {total} archivos ({duplicates} ya estaban importados).")
+    return imported_count
 
-        try:
-            # Leer el archivo JSON
-            with open(file_path, 'r', encoding='utf-8') as f:
-                networks = json.load(f)
 
-            # Extraer timestamp del nombre del archivo
-            timestamp_str = json_file.replace('wifi_scan_', '').replace('.json', '')
-            try:
-                timestamp = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-            except:
-                timestamp = datetime.now()
-
-            # Crear documento
-            document = {
-                "timestamp": timestamp,
-                "networks": networks,
-                "total_networks": len(networks),
-                "metadata": {
-                    "imported_from": json_file
-                }
-            }
+def import_scanlog(scanlog, db, start_time=None, end_time=None, batch_size=500):
+    """
+    Importa a MongoDB los escaneos de un registro binario (wifi_scanlog).
 
-            # Insertar en la base de datos
-            result = db.collection.insert_one(document)
+    Los escaneos ya importados (mismo content_hash) se descartan como duplicados.
 
-            print(f"Archivo {json_file} importado con ID: {result.inserted_id}")
-            imported_count += 1
+    Args:
+        scanlog (ScanLog): Registro de escaneos
+        db (WiFiDB): Instancia de WiFiDB conectada
+        start_time (datetime, optional): Fecha de inicio
+        end_time (datetime, optional): Fecha de fin
+        batch_size (int): Escaneos por insert_many
 
-        except Exception as e:
-            print(f"Error al importar {json_file}: {e}")
+    Returns:
+        int: Número de escaneos importados
+    """
+    if not db.is_connected():
+        print("No se pudo conectar a MongoDB. No se importará el registro.")
+        return 0
 
-    print(f"Se importaron {imported_count} de {len(json_files)} archivos.")
-    return imported_count
+    imported = 0
+    duplicates = 0
+    batch = []
+
+    for scan in scanlog.iter_scans(start_time, end_time):
+        scan.setdefault("metadata", {})["imported_from"] = scanlog.directory
+        scan["content_hash"] = scan_content_hash(scan["timestamp"], scan["networks"])
+        batch.append(scan)
+        if len(batch) >= batch_size:
+            inserted, duplicated = insert_scans(db, batch)
+            imported += inserted
+            duplicates += duplicated
+            batch = []
+            print(f"  {imported} escaneos importados ({duplicates} duplicados)")
+
+    inserted, duplicated = insert_scans(db, batch)
+    imported += inserted
+    duplicates += duplicated
+
+    print(f"Se importaron {imported} escaneos del registro {scanlog.directory} ({duplicates} ya estaban importados).")
+    return imported
 
 
 if __name__ == "__main__":
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Exportación de escaneos en streaming para WiFi Analyzer
+Convierte un iterable de escaneos (un cursor de MongoDB o el registro binario)
+en trozos de bytes JSONL, CSV o Parquet, por lotes de filas: la memoria usada
+no depende del tamaño del rango. Cada fila es un escaneo (con sus redes) o,
+aplanando, una muestra por BSSID y escaneo. Los trozos se escriben a un archivo
+(wifi_analyzer.py --export) o se envían como respuesta HTTP (/api/export).
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+
+# pyarrow es opcional: sin él no se puede exportar a Parquet
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_FORMATS = ('jsonl', 'csv', 'parquet')
+
+# Filas por lote (un trozo de la salida y, en Parquet, un row group)
+EXPORT_BATCH_ROWS = 2000
+
+MIME_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Campos exportados de cada red (el resto, como la lista de IE, no se exporta)
+NETWORK_COLUMNS = ['mac', 'essid', 'channel', 'frequency', 'signal', 'signal_smoothed', 'quality',
+                   'distance', 'distance_smoothed', 'encrypted']
+
+# Columnas de cada fila: por escaneo (networks es una lista; en CSV, JSON) o por muestra
+SCAN_COLUMNS = ['scan_id', 'name', 'timestamp', 'total_networks', 'networks']
+SAMPLE_COLUMNS = ['scan_id', 'timestamp'] + NETWORK_COLUMNS
+
+# Campos que se piden a MongoDB (proyección) para cada tipo de fila
+SCAN_FIELDS = ['name', 'timestamp', 'total_networks'] + [f'networks.{column}' for column in NETWORK_COLUMNS]
+SAMPLE_FIELDS = ['timestamp'] + [f'networks.{column}' for column in NETWORK_COLUMNS]
+
+
+def check_format(fmt):
+    """
+    Verifica que se pueda exportar en un formato.
+
+    Raises:
+        ValueError: Si el formato no existe o es Parquet sin pyarrow instalado
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportación desconocido: {fmt} (use {', '.join(EXPORT_FORMATS)})")
+    if fmt == 'parquet' and not PARQUET_AVAILABLE:
+        raise ValueError("Para exportar a Parquet instale el paquete pyarrow")
+
+
+def export_fields(flatten=False):
+    """Devuelve los campos a proyectar de cada escaneo (ver iter_scans y find)."""
+    return SAMPLE_FIELDS if flatten else SCAN_FIELDS
+
+
+def scan_rows(scans):
+    """
+    Convierte escaneos en filas de SCAN_COLUMNS.
+
+    Yields:
+        dict: Una fila por escaneo
+    """
+    for scan in scans:
+        networks = scan.get('networks') or []
+        yield {
+            'scan_id': str(scan['_id']) if '_id' in scan else None,
+            'name': scan.get('name'),
+            'timestamp': scan['timestamp'],
+            'total_networks': scan.get('total_networks', len(networks)),
+            'networks': [{column: network.get(column) for column in NETWORK_COLUMNS} for network in networks],
+        }
+
+
+def sample_rows(scans):
+    """
+    Aplana escaneos en filas de SAMPLE_COLUMNS (una por BSSID y escaneo).
+
+    Yields:
+        dict: Una fila por red de cada escaneo
+    """
+    for scan in scans:
+        scan_id = str(scan['_id']) if '_id' in scan else None
+        for network in scan.get('networks') or []:
+            row = {'scan_id': scan_id, 'timestamp': scan['timestamp']}
+            for column in NETWORK_COLUMNS:
+                row[column] = network.get(column)
+            yield row
+
+
+def _batches(rows, size):
+    """Agrupa un iterable en listas de hasta `size` elementos."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _json_value(value):
+    """Serializa los valores que json no conoce (datetime, ObjectId)."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_jsonl(rows, batch_rows=EXPORT_BATCH_ROWS):
+    """Serializa filas como JSON Lines. Yields: bytes de cada lote."""
+    for batch in _batches(rows, batch_rows):
+        yield ''.join(json.dumps(row, default=_json_value) + '\n' for row in batch).encode('utf-8')
+
+
+def iter_csv(rows, columns, batch_rows=EXPORT_BATCH_ROWS):
+    """Serializa filas como CSV con cabecera (las listas van como JSON). Yields: bytes de cada lote."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in _batches(rows, batch_rows):
+        for row in batch:
+            values = []
+            for column in columns:
+                value = row.get(column)
+                if isinstance(value, datetime):
+                    value = value.isoformat()
+                elif isinstance(value, list):
+                    value = json.dumps(value, default=_json_value)
+                values.append(value)
+            writer.writerow(values)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class _ChunkSink:
+    """
+    Archivo de solo escritura que acumula lo escrito hasta que se drena.
+
+    ParquetWriter escribe aquí cada row group; tell() cuenta todos los bytes
+    escritos, de modo que los desplazamientos del pie del archivo son correctos
+    aunque los trozos ya se hayan enviado.
+    """
+
+    def __init__(self):
+        self.closed = False
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        """Devuelve y descarta los bytes escritos desde el último drain."""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_schema(flatten):
+    """Esquema Arrow de las filas de sample_rows (flatten) o scan_rows."""
+    network_fields = [
+        ('mac', pa.string()), ('essid', pa.string()), ('channel', pa.int16()), ('frequency', pa.float32()),
+        ('signal', pa.float32()), ('signal_smoothed', pa.float32()), ('quality', pa.float32()),
+        ('distance', pa.float32()), ('distance_smoothed', pa.float32()), ('encrypted', pa.bool_()),
+    ]
+    if flatten:
+        return pa.schema([('scan_id', pa.string()), ('timestamp', pa.timestamp('ms'))] + network_fields)
+    return pa.schema([('scan_id', pa.string()), ('name', pa.string()), ('timestamp', pa.timestamp('ms')),
+                      ('total_networks', pa.int32()), ('networks', pa.list_(pa.struct(network_fields)))])
+
+
+def iter_parquet(rows, flatten=False, batch_rows=EXPORT_BATCH_ROWS):
+    """Serializa filas como Parquet, un row group por lote. Yields: bytes de cada row group (y el pie)."""
+    schema = _parquet_schema(flatten)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+    try:
+        for batch in _batches(rows, batch_rows):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_scans(scans, fmt='jsonl', flatten=False, batch_rows=EXPORT_BATCH_ROWS):
+    """
+    Exporta escaneos en streaming.
+
+    Args:
+        scans (iterable): Escaneos (cursor de MongoDB, iter_scans o ScanLog.iter_scans)
+        fmt (str): 'jsonl', 'csv' o 'parquet'
+        flatten (bool): Si es True, una fila por BSSID y escaneo; si no, una por escaneo
+        batch_rows (int): Filas por lote
+
+    Returns:
+        generator: Trozos de bytes de la salida, en orden
+
+    Raises:
+        ValueError: Si no se puede exportar en el formato pedido (ver check_format)
+    """
+    check_format(fmt)
+    rows = sample_rows(scans) if flatten else scan_rows(scans)
+    if fmt == 'jsonl':
+        return iter_jsonl(rows, batch_rows)
+    if fmt == 'csv':
+        return iter_csv(rows, SAMPLE_COLUMNS if flatten else SCAN_COLUMNS, batch_rows)
+    return iter_parquet(rows, flatten, batch_rows)
+
+
+def export_to_file(scans, filename, fmt='jsonl', flatten=False, batch_rows=EXPORT_BATCH_ROWS):
+    """
+    Exporta escaneos a un archivo, escribiendo cada lote a medida que se genera.
+
+    Args:
+        scans (iterable): Escaneos a exportar
+        filename (str): Ruta del archivo
+        fmt (str): 'jsonl', 'csv' o 'parquet'
+        flatten (bool): Si es True, una fila por BSSID y escaneo
+        batch_rows (int): Filas por lote
+
+    Returns:
+        int: Número de escaneos exportados
+    """
+    exported = 0
+
+    def counted(scans):
+        nonlocal exported
+        for scan in scans:
+            exported += 1
+            yield scan
+
+    chunks = export_scans(counted(scans), fmt, flatten, batch_rows)
+    with open(filename, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return exported
+
+
+def export_filename(start_time, end_time, fmt, flatten=False):
+    """Nombre de archivo predeterminado de una exportación."""
+    kind = 'samples' if flatten else 'scans'
+    return f"wifi_{kind}_{start_time.strftime('%Y%m%d_%H%M%S')}_{end_time.strftime('%Y%m%d_%H%M%S')}.{fmt}"
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Marcos columnares de NumPy para las tendencias de WiFi Analyzer
+Este módulo convierte cursores de escaneos (o las series de rollups y
+agregaciones) directamente en arreglos de NumPy preasignados: timestamps como
+int64, una matriz canal x tiempo con la cantidad de redes y una matriz
+BSSID x tiempo con la señal (NaN donde la red no aparece). Todos los gráficos
+y estadísticas de tendencias comparten estos arreglos.
+"""
+
+import os
+
+import numpy as np
+
+# Canales que se preasignan como filas (2.4 GHz y 5 GHz); los demás se agregan al aparecer
+KNOWN_CHANNELS = list(range(1, 15)) + [
+    32, 36, 40, 44, 48, 52, 56, 60, 64, 68, 96, 100, 104, 108, 112, 116, 120, 124,
+    128, 132, 136, 140, 144, 149, 153, 157, 161, 165, 169, 173, 177
+]
+
+# Filas de BSSID preasignadas (se duplican al llenarse)
+INITIAL_BSSID_ROWS = 64
+
+# Campos de cada escaneo que necesita load_scan_frame (para la proyección de iter_scans)
+FRAME_FIELDS = ["timestamp", "networks.mac", "networks.essid", "networks.channel", "networks.signal",
+                "networks.signal_smoothed"]
+
+# Tipos de los arreglos: la señal en dBm entra exacta en float16 (2 bytes por muestra)
+SIGNAL_DTYPE = np.float16
+COUNT_DTYPE = np.float32
+
+# Arreglos de un TrendFrame (en el orden del constructor)
+FRAME_ARRAYS = ("timestamps", "channels", "channel_counts", "total", "count_2g", "count_5g",
+                "signal", "signal_smoothed", "signal_min", "signal_max")
+
+# Los arreglos más chicos que esto se pasan junto a la especificación en lugar de en un archivo
+INLINE_MAX_BYTES = 64 * 1024
+
+
+def to_epoch_seconds(timestamp):
+    """Convierte un datetime (sin zona horaria, como se guarda en MongoDB) a segundos int64."""
+    return np.datetime64(timestamp, 's').astype(np.int64)
+
+
+def _grow(array, size, axis, fill):
+    """Devuelve `array` ampliado hasta `size` elementos en el eje `axis`."""
+    shape = list(array.shape)
+    extra = size - shape[axis]
+    shape[axis] = extra
+    return np.concatenate([array, np.full(shape, fill, dtype=array.dtype)], axis=axis)
+
+
+class TrendFrame:
+    """
+    Datos de tendencias en formato columnar.
+
+    Atributos:
+        timestamps (ndarray int64[n]): Segundos desde epoch de cada punto
+        channels (ndarray int16[c]): Canal de cada fila de channel_counts
+        channel_counts (ndarray float32[c, n]): Redes por canal y punto (media si son buckets)
+        total, count_2g, count_5g (ndarray float32[n]): Redes por punto, total y por banda
+        bssids, essids (list[str]): BSSID y ESSID de cada fila de signal
+        signal (ndarray float16[b, n]): Señal en dBm por BSSID y punto (NaN si no aparece)
+        signal_smoothed (ndarray float16[b, n] o None): Señal suavizada guardada con cada escaneo
+            (wifi_smoothing); None si ningún punto la tiene
+        signal_min, signal_max (ndarray float16[b, n] o None): Rango de señal (solo rollups)
+    """
+
+    def __init__(self, timestamps, channels=None, channel_counts=None, total=None, count_2g=None,
+                 count_5g=None, bssids=None, essids=None, signal=None, signal_smoothed=None,
+                 signal_min=None, signal_max=None):
+        n = len(timestamps)
+        self.timestamps = timestamps
+        self.channels = channels if channels is not None else np.zeros(0, dtype=np.int16)
+        self.channel_counts = (channel_counts if channel_counts is not None
+                               else np.zeros((0, n), dtype=COUNT_DTYPE))
+        self.total = total if total is not None else np.zeros(n, dtype=COUNT_DTYPE)
+        self.count_2g = count_2g if count_2g is not None else np.zeros(n, dtype=COUNT_DTYPE)
+        self.count_5g = count_5g if count_5g is not None else np.zeros(n, dtype=COUNT_DTYPE)
+        self.bssids = bssids or []
+        self.essids = essids or []
+        self.signal = signal if signal is not None else np.zeros((0, n), dtype=SIGNAL_DTYPE)
+        self.signal_smoothed = signal_smoothed
+        self.signal_min = signal_min
+        self.signal_max = signal_max
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def times(self):
+        """Devuelve los timestamps como datetime64[s] (aceptado por matplotlib)."""
+        return self.timestamps.astype('datetime64[s]')
+
+    def band_channels(self, band):
+        """
+        Devuelve los canales de una banda y sus filas de channel_counts.
+
+        Args:
+            band (str): '2g' (canales 1-14, siempre todos) o '5g' (solo los que aparecen)
+
+        Returns:
+            tuple: (ndarray de canales, ndarray [canales, n] de conteos)
+        """
+        if band == '2g':
+            rows = self.channels <= 14
+        else:
+            rows = (self.channels > 14) & (self.channel_counts.sum(axis=1) > 0)
+        return self.channels[rows], self.channel_counts[rows]
+
+    def rows_for(self, essid=None, mac=None):
+        """Devuelve los índices de las filas de signal que coinciden con el ESSID y/o la MAC."""
+        return [i for i, (bssid, name) in enumerate(zip(self.bssids, self.essids))
+                if (not mac or bssid == mac) and (not essid or name == essid)]
+
+    def signal_stats(self, rows=None):
+        """
+        Calcula estadísticas de señal por BSSID sobre la matriz compartida.
+
+        Args:
+            rows (list, optional): Filas a incluir. Si es None, todas.
+
+        Returns:
+            list: [{"mac", "essid", "samples", "min", "mean", "max"}]
+        """
+        rows = range(len(self.bssids)) if rows is None else rows
+        stats = []
+        for row in rows:
+            values = self.signal[row].astype(np.float32)
+            present = ~np.isnan(values)
+            if not present.any():
+                continue
+            stats.append({
+                "mac": self.bssids[row],
+                "essid": self.essids[row],
+                "samples": int(present.sum()),
+                "min": float(np.nanmin(values)),
+                "mean": float(np.nanmean(values)),
+                "max": float(np.nanmax(values)),
+            })
+        return stats
+
+    def nbytes(self):
+        """Devuelve la memoria ocupada por los arreglos."""
+        arrays = [self.timestamps, self.channels, self.channel_counts, self.total, self.count_2g,
+                  self.count_5g, self.signal, self.signal_smoothed, self.signal_min, self.signal_max]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+
+def load_scan_frame(scans, capacity=0):
+    """
+    Convierte un cursor de escaneos en un TrendFrame sin listas intermedias.
+
+    Args:
+        scans (iterable): Documentos de escaneo ordenados por timestamp (p. ej.
+            WiFiDB.iter_scans(..., fields=FRAME_FIELDS))
+        capacity (int): Número esperado de escaneos para preasignar (p. ej.
+            WiFiDB.count_scans); si se queda corto, los arreglos se amplían
+
+    Returns:
+        TrendFrame: Datos de todos los escaneos (un punto por escaneo)
+    """
+    columns = max(int(capacity), 1)
+    timestamps = np.zeros(columns, dtype=np.int64)
+    total = np.zeros(columns, dtype=COUNT_DTYPE)
+
+    channel_rows = {channel: i for i, channel in enumerate(KNOWN_CHANNELS)}
+    channels = list(KNOWN_CHANNELS)
+    counts = np.zeros((len(channels), columns), dtype=COUNT_DTYPE)
+
+    bssid_rows = {}
+    bssids = []
+    essids = []
+    signal = np.full((INITIAL_BSSID_ROWS, columns), np.nan, dtype=SIGNAL_DTYPE)
+    # Se crea al encontrar el primer valor suavizado (los escaneos antiguos no lo tienen)
+    smoothed = None
+
+    n = 0
+    for scan in scans:
+        if n == columns:
+            # Llegaron más escaneos de los contados: duplicar las columnas
+            columns *= 2
+            timestamps = _grow(timestamps, columns, 0, 0)
+            total = _grow(total, columns, 0, 0)
+            counts = _grow(counts, columns, 1, 0)
+            signal = _grow(signal, columns, 1, np.nan)
+            if smoothed is not None:
+                smoothed = _grow(smoothed, columns, 1, np.nan)
+
+        networks = scan.get("networks", [])
+        timestamps[n] = to_epoch_seconds(scan["timestamp"])
+        total[n] = len(networks)
+
+        for network in networks:
+            channel = network.get("channel")
+            if channel:
+                row = channel_rows.get(channel)
+                if row is None:
+                    row = channel_rows[channel] = len(channels)
+                    channels.append(channel)
+                    counts = _grow(counts, len(channels), 0, 0)
+                counts[row, n] += 1
+
+            mac = network.get("mac")
+            if mac and network.get("signal") is not None:
+                row = bssid_rows.get(mac)
+                if row is None:
+                    row = bssid_rows[mac] = len(bssids)
+                    bssids.append(mac)
+                    essids.append(network.get("essid"))
+                    if row == signal.shape[0]:
+                        signal = _grow(signal, row * 2, 0, np.nan)
+                        if smoothed is not None:
+                            smoothed = _grow(smoothed, row * 2, 0, np.nan)
+                signal[row, n] = network["signal"]
+                if network.get("signal_smoothed") is not None:
+                    if smoothed is None:
+                        smoothed = np.full(signal.shape, np.nan, dtype=SIGNAL_DTYPE)
+                    smoothed[row, n] = network["signal_smoothed"]
+        n += 1
+
+    channels = np.array(channels, dtype=np.int16)
+    counts = counts[:, :n]
+    band_2g = channels <= 14
+    return TrendFrame(
+        timestamps=timestamps[:n],
+        channels=channels,
+        channel_counts=counts,
+        total=total[:n],
+        count_2g=counts[band_2g].sum(axis=0),
+        count_5g=counts[~band_2g].sum(axis=0),
+        bssids=bssids,
+        essids=essids,
+        signal=signal[:len(bssids), :n],
+        signal_smoothed=smoothed[:len(bssids), :n] if smoothed is not None else None,
+    )
+
+
+def frame_from_band_series(series):
+    """
+    Convierte una serie de rollups o agregaciones en un TrendFrame.
+
+    Acepta las series de WiFiDB.get_band_series, channel_histogram y band_counts
+    (las claves que falten se calculan o quedan en cero).
+
+    Args:
+        series (list): Puntos con "timestamp" y, según el origen, "channels_2g",
+            "channels_5g", "total", "count_2g" y "count_5g"
+
+    Returns:
+        TrendFrame: Datos por bucket (sin matriz de señal)
+    """
+    n = len(series)
+    timestamps = np.zeros(n, dtype=np.int64)
+    channel_rows = {channel: i for i, channel in enumerate(KNOWN_CHANNELS)}
+    channels = list(KNOWN_CHANNELS)
+    counts = np.zeros((len(channels), n), dtype=COUNT_DTYPE)
+    total = np.zeros(n, dtype=COUNT_DTYPE)
+    count_2g = np.zeros(n, dtype=COUNT_DTYPE)
+    count_5g = np.zeros(n, dtype=COUNT_DTYPE)
+
+    for i, point in enumerate(series):
+        timestamps[i] = to_epoch_seconds(point["timestamp"])
+        for band in ("channels_2g", "channels_5g"):
+            for channel, count in point.get(band, {}).items():
+                channel = int(channel)
+                row = channel_rows.get(channel)
+                if row is None:
+                    row = channel_rows[channel] = len(channels)
+                    channels.append(channel)
+                    counts = _grow(counts, len(channels), 0, 0)
+                counts[row, i] = count
+
+        if "count_2g" in point:
+            count_2g[i] = point["count_2g"]
+            count_5g[i] = point["count_5g"]
+        if "total" in point:
+            total[i] = point["total"]
+
+    channels = np.array(channels, dtype=np.int16)
+    band_2g = channels <= 14
+    if n and not count_2g.any() and not count_5g.any():
+        # Series de channel_histogram: las bandas salen de la matriz de canales
+        count_2g = counts[band_2g].sum(axis=0)
+        count_5g = counts[~band_2g].sum(axis=0)
+    if n and not total.any():
+        total = count_2g + count_5g
+
+    return TrendFrame(timestamps, channels, counts, total, count_2g, count_5g)
+
+
+def frame_from_history(history):
+    """
+    Convierte el historial de una red (get_network_history o rollups) en un TrendFrame.
+
+    Los puntos con el mismo timestamp (varios BSSID del mismo ESSID en un escaneo)
+    comparten columna; cada BSSID tiene su fila en la matriz de señal.
+
+    Args:
+        history (iterable): Entradas {"timestamp", "network"} ordenadas por timestamp
+
+    Returns:
+        TrendFrame: Datos de señal por BSSID (sin matriz de canales)
+    """
+    columns = 256
+    timestamps = np.zeros(columns, dtype=np.int64)
+    signal = np.full((4, columns), np.nan, dtype=SIGNAL_DTYPE)
+    smoothed = None
+    signal_min = None
+    signal_max = None
+    bssid_rows = {}
+    bssids = []
+    essids = []
+
+    n = 0
+    last_timestamp = None
+    for entry in history:
+        network = entry["network"]
+        if network.get("signal") is None:
+            continue
+
+        timestamp = to_epoch_seconds(entry["timestamp"])
+        if timestamp != last_timestamp:
+            if n == columns:
+                columns *= 2
+                timestamps = _grow(timestamps, columns, 0, 0)
+                signal = _grow(signal, columns, 1, np.nan)
+                if smoothed is not None:
+                    smoothed = _grow(smoothed, columns, 1, np.nan)
+                if signal_min is not None:
+                    signal_min = _grow(signal_min, columns, 1, np.nan)
+                    signal_max = _grow(signal_max, columns, 1, np.nan)
+            timestamps[n] = timestamp
+            last_timestamp = timestamp
+            n += 1
+
+        mac = network.get("mac")
+        row = bssid_rows.get(mac)
+        if row is None:
+            row = bssid_rows[mac] = len(bssids)
+            bssids.append(mac)
+            essids.append(network.get("essid"))
+            if row == signal.shape[0]:
+                signal = _grow(signal, row * 2, 0, np.nan)
+                if smoothed is not None:
+                    smoothed = _grow(smoothed, row * 2, 0, np.nan)
+                if signal_min is not None:
+                    signal_min = _grow(signal_min, row * 2, 0, np.nan)
+                    signal_max = _grow(signal_max, row * 2, 0, np.nan)
+
+        signal[row, n - 1] = network["signal"]
+        if network.get("signal_smoothed") is not None:
+            if smoothed is None:
+                smoothed = np.full(signal.shape, np.nan, dtype=SIGNAL_DTYPE)
+            smoothed[row, n - 1] = network["signal_smoothed"]
+        if network.get("signal_min") is not None:
+            if signal_min is None:
+                signal_min = np.full(signal.shape, np.nan, dtype=SIGNAL_DTYPE)
+                signal_max = np.full(signal.shape, np.nan, dtype=SIGNAL_DTYPE)
+            signal_min[row, n - 1] = network["signal_min"]
+            signal_max[row, n - 1] = network["signal_max"]
+
+    rows = len(bssids)
+    return TrendFrame(
+        timestamps=timestamps[:n],
+        bssids=bssids,
+        essids=essids,
+        signal=signal[:rows, :n],
+        signal_smoothed=smoothed[:rows, :n] if smoothed is not None else None,
+        signal_min=signal_min[:rows, :n] if signal_min is not None else None,
+        signal_max=signal_max[:rows, :n] if signal_max is not None else None,
+    )
+
+
+def save_frame(frame, directory):
+    """
+    Escribe los arreglos de un TrendFrame como archivos .npy para abrirlos con memmap
+    desde otros procesos (sin serializar los datos con pickle).
+
+    Args:
+        frame (TrendFrame): Datos a compartir
+        directory (str): Directorio donde escribir los archivos (se crea si no existe)
+
+    Returns:
+        dict: Especificación liviana para open_frame ({"arrays", "bssids", "essids"})
+    """
+    os.makedirs(directory, exist_ok=True)
+    arrays = {}
+    for name in FRAME_ARRAYS:
+        array = getattr(frame, name)
+        if array is None:
+            continue
+        if array.nbytes <= INLINE_MAX_BYTES:
+            arrays[name] = array
+        else:
+            path = os.path.join(directory, f"{name}.npy")
+            np.save(path, array)
+            arrays[name] = path
+    return {"arrays": arrays, "bssids": frame.bssids, "essids": frame.essids}
+
+
+def open_frame(spec):
+    """
+    Abre un TrendFrame guardado con save_frame. Los arreglos en archivo se mapean en
+    memoria de solo lectura, de modo que varios procesos comparten las mismas páginas.
+
+    Args:
+        spec (dict): Especificación devuelta por save_frame
+
+    Returns:
+        TrendFrame: Datos sobre los arreglos mapeados
+    """
+    arrays = {name: np.load(value, mmap_mode='r') if isinstance(value, str) else value
+              for name, value in spec["arrays"].items()}
+    return TrendFrame(bssids=list(spec["bssids"]), essids=list(spec["essids"]), **arrays)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gestión de índices para WiFi Analyzer
+Este módulo declara los índices que necesitan las consultas reales de app.py y
+wifi_db.py, los crea, elimina los que sobran y verifica con explain() que cada
+consulta use un índice en lugar de recorrer la colección.
+"""
+
+from datetime import datetime, timedelta
+import pymongo
+from bson.objectid import ObjectId
+
+# Índices declarados para wifi_scans (nombre -> claves)
+SCAN_INDEXES = {
+    # get_latest_scan, get_scans_in_timeframe y las estadísticas por rango de tiempo
+    "timestamp_-1": [("timestamp", pymongo.DESCENDING)],
+    # Historial/tendencia de una red: igualdad por ESSID + rango de tiempo (multikey)
+    "networks.essid_1_timestamp_1": [("networks.essid", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)],
+    # Historial de una red por MAC: igualdad por BSSID + rango de tiempo (multikey)
+    "networks.mac_1_timestamp_1": [("networks.mac", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)],
+    # Deduplicación de escaneos importados (import_existing_scans, import_scanlog)
+    "content_hash_1": [("content_hash", pymongo.ASCENDING)],
+}
+
+# Opciones de creación de los índices que no son simples
+SCAN_INDEX_OPTIONS = {
+    # Único solo entre los escaneos importados: los guardados por save_scan no tienen content_hash
+    "content_hash_1": {"unique": True, "partialFilterExpression": {"content_hash": {"$exists": True}}},
+}
+
+# Índices que MongoDB gestiona por su cuenta y nunca se eliminan
+PROTECTED_INDEXES = {"_id_"}
+
+
+def ensure_indexes(collection, drop_unused=True):
+    """
+    Crea los índices declarados y elimina los que no lo están.
+
+    El índice de texto sobre networks.essid que se creaba antes no lo usa
+    ninguna consulta (todas son por igualdad) y solo encarece las escrituras.
+
+    Args:
+        collection (Collection): Colección wifi_scans
+        drop_unused (bool): Si es True, elimina los índices no declarados
+
+    Returns:
+        dict: {"created": [...], "dropped": [...]}
+    """
+    report = {"created": [], "dropped": []}
+    existing = collection.index_information()
+
+    for name, keys in SCAN_INDEXES.items():
+        options = SCAN_INDEX_OPTIONS.get(name, {})
+        if (name in existing and existing[name].get("key") == keys
+                and all(existing[name].get(option) == value for option, value in options.items())):
+            continue
+        if name in existing:
+            # Mismo nombre con otra definición: recrear
+            collection.drop_index(name)
+        collection.create_index(keys, name=name, **options)
+        report["created"].append(name)
+
+    if drop_unused:
+        for name in existing:
+            if name not in SCAN_INDEXES and name not in PROTECTED_INDEXES:
+                collection.drop_index(name)
+                report["dropped"].append(name)
+
+    if report["created"]:
+        print(f"Índices creados: {', '.join(report['created'])}")
+    if report["dropped"]:
+        print(f"Índices eliminados (no usados por ninguna consulta): {', '.join(report['dropped'])}")
+    return report
+
+
+def _find_winning_plans(explain):
+    """Busca recursivamente los winningPlan de una respuesta de explain."""
+    if isinstance(explain, dict):
+        if "winningPlan" in explain:
+            yield explain["winningPlan"]
+        for value in explain.values():
+            yield from _find_winning_plans(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            yield from _find_winning_plans(value)
+
+
+def _collect_stages(plan, stages, indexes):
+    """Recorre un plan y acumula los nombres de etapas e índices usados."""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    if "indexName" in plan:
+        indexes.append(plan["indexName"])
+    # Planes de SBE (MongoDB >= 5.1) anidan el plan clásico en queryPlan
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            _collect_stages(plan[key], stages, indexes)
+    for child in plan.get("inputStages", []):
+        _collect_stages(child, stages, indexes)
+
+
+def summarize_plan(explain):
+    """
+    Resume una respuesta de explain().
+
+    Args:
+        explain (dict): Respuesta de explain
+
+    Returns:
+        dict: {"stages": [...], "indexes": [...], "collscan": bool}
+    """
+    stages = []
+    indexes = []
+    for plan in _find_winning_plans(explain):
+        _collect_stages(plan, stages, indexes)
+    return {"stages": stages, "indexes": indexes, "collscan": "COLLSCAN" in stages}
+
+
+def endpoint_queries(collection, essid="", mac="", days=1):
+    """
+    Devuelve las consultas que ejecuta cada endpoint, listas para explain().
+
+    Args:
+        collection (Collection): Colección wifi_scans
+        essid (str): ESSID de ejemplo para las consultas por red
+        mac (str): MAC de ejemplo para las consultas por red
+        days (int): Días del rango de tiempo de ejemplo
+
+    Returns:
+        dict: {descripción: función sin argumentos que devuelve el explain}
+    """
+    database = collection.database
+    end_time = datetime.now()
+    start_time = end_time - timedelta(days=days)
+    time_range = {"$gte": start_time, "$lte": end_time}
+
+    def explain_aggregate(pipeline):
+        return database.command("aggregate", collection.name, pipeline=pipeline, explain=True)
+
+    def explain_distinct(key, query):
+        return database.command("explain", {"distinct": collection.name, "key": key, "query": query},
+                                verbosity="queryPlanner")
+
+    return {
+        "GET /history, GET /api/scans (sort _id)":
+            lambda: collection.find({}, {"name": 1, "timestamp": 1, "total_networks": 1}).sort("_id", -1).limit(10).explain(),
+        "GET /history?cursor=..., GET /api/scans?cursor=... (rango de _id)":
+            lambda: collection.find({"_id": {"$lt": ObjectId()}}, {"name": 1, "timestamp": 1, "total_networks": 1})
+            .sort("_id", -1).limit(10).explain(),
+        "GET /api/networks/channels, /api/networks/signal (último escaneo)":
+            lambda: collection.find().sort("_id", -1).limit(1).explain(),
+        "GET /api/networks/trend/<essid>":
+            lambda: explain_aggregate([
+                {"$match": {"timestamp": time_range, "networks.essid": essid}},
+                {"$unwind": "$networks"},
+                {"$match": {"networks.essid": essid}},
+            ]),
+        "GET /api/networks/channels/history, WiFiDB.channel_histogram/band_counts":
+            lambda: explain_aggregate([
+                {"$match": {"timestamp": time_range}},
+                {"$project": {"_id": 0, "t": "$timestamp", "ch": "$networks.channel"}},
+            ]),
+        "WiFiDB.get_latest_scan":
+            lambda: collection.find().sort("timestamp", -1).limit(1).explain(),
+        "WiFiDB.get_scans_in_timeframe":
+            lambda: collection.find({"timestamp": time_range}).sort("timestamp", 1).explain(),
+        "WiFiDB.get_network_history (ESSID)":
+            lambda: explain_aggregate([
+                {"$match": {"timestamp": time_range, "networks.essid": essid}},
+                {"$unwind": "$networks"},
+            ]),
+        "WiFiDB.get_network_history (MAC)":
+            lambda: explain_aggregate([
+                {"$match": {"timestamp": time_range, "networks.mac": mac}},
+                {"$unwind": "$networks"},
+            ]),
+        "continuous_scan: distinct networks.essid por rango":
+            lambda: explain_distinct("networks.essid", {"timestamp": {"$gte": start_time}}),
+    }
+
+
+def check_indexes(collection, essid="", mac="", verbose=True):
+    """
+    Ejecuta explain() sobre las consultas de cada endpoint e informa el plan.
+
+    Args:
+        collection (Collection): Colección wifi_scans
+        essid (str): ESSID de ejemplo para las consultas por red
+        mac (str): MAC de ejemplo para las consultas por red
+        verbose (bool): Si es True, imprime el plan de cada consulta
+
+    Returns:
+        dict: {descripción: resumen del plan}; las consultas que fallan tienen "error"
+    """
+    results = {}
+    for description, explain in endpoint_queries(collection, essid, mac).items():
+        try:
+            results[description] = summarize_plan(explain())
+        except Exception as e:
+            results[description] = {"error": str(e)}
+
+        if verbose:
+            summary = results[description]
+            if "error" in summary:
+                print(f"[ERROR]    {description}: {summary['error']}")
+            else:
+                status = "COLLSCAN" if summary["collscan"] else "OK"
+                used = ", ".join(summary["indexes"]) or "-"
+                print(f"[{status:8}] {description}")
+                print(f"           etapas: {' -> '.join(reversed(summary['stages']))} | índices: {used}")
+
+    collscans = [d for d, summary in results.items() if summary.get("collscan")]
+    if collscans and verbose:
+        print(f"ADVERTENCIA: {len(collscans)} consultas recorren la colección completa.")
+    return results
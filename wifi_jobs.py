@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Trabajos de escaneo asíncronos para WiFi Analyzer
+Este módulo registra los escaneos pedidos desde la web como trabajos con un
+identificador. Un único hilo (WorkerQueue) ejecuta los escaneos de a uno para
+no solapar el uso de la radio, y las peticiones que llegan mientras hay un
+escaneo pendiente o en curso se unen a ese trabajo en lugar de lanzar otro.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from wifi_scheduler import WorkerQueue
+
+# Estados de un trabajo
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_ERROR = 'error'
+
+# Trabajos terminados que se conservan para consultar su resultado
+JOB_HISTORY = 50
+
+
+class ScanJobManager:
+    """
+    Registro de trabajos de escaneo atendidos por un único hilo.
+    """
+
+    def __init__(self, run_scan, history=JOB_HISTORY):
+        """
+        Inicializa el registro y arranca el hilo de trabajo.
+
+        Args:
+            run_scan (callable): Recibe el trabajo (dict) y devuelve un dict con el
+                resultado; si devuelve "success": False el trabajo termina con error
+            history (int): Número de trabajos terminados que se conservan
+        """
+        self.run_scan = run_scan
+        self.history = history
+        self.jobs = OrderedDict()
+        self.active_job = None
+        self.coalesced_requests = 0
+        self._condition = threading.Condition()
+        self._worker = WorkerQueue(maxsize=4, name="scan-jobs")
+
+    def submit(self, name, metadata=None):
+        """
+        Pide un escaneo sin bloquear.
+
+        Si ya hay un escaneo pendiente o en curso, la petición se une a él.
+
+        Args:
+            name (str): Nombre del escaneo
+            metadata (dict, optional): Metadatos que se guardan con el escaneo
+
+        Returns:
+            tuple: (trabajo (dict), True si se unió a un trabajo existente)
+        """
+        with self._condition:
+            if self.active_job is not None:
+                job = self.jobs[self.active_job]
+                job['requests'] += 1
+                self.coalesced_requests += 1
+                return dict(job), True
+
+            job = {
+                'job_id': uuid.uuid4().hex,
+                'status': JOB_QUEUED,
+                'name': name,
+                'metadata': metadata or {},
+                'requests': 1,
+                'created': time.time(),
+                'started': None,
+                'finished': None,
+                'result': None,
+                'message': None,
+            }
+            self.jobs[job['job_id']] = job
+            self.active_job = job['job_id']
+            self._prune()
+
+        if not self._worker.submit(f"escaneo {job['job_id']}", self._run, job['job_id']):
+            self._finish(job['job_id'], JOB_ERROR, message='Cola de escaneos llena')
+        return dict(job), False
+
+    def get(self, job_id, wait=0):
+        """
+        Devuelve el estado de un trabajo.
+
+        Args:
+            job_id (str): Identificador del trabajo
+            wait (float): Segundos que se espera a que termine (long polling)
+
+        Returns:
+            dict: Copia del trabajo o None si no existe
+        """
+        deadline = time.monotonic() + wait
+        with self._condition:
+            while True:
+                job = self.jobs.get(job_id)
+                if job is None or job['status'] in (JOB_DONE, JOB_ERROR):
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return dict(job) if job else None
+
+    def _run(self, job_id):
+        with self._condition:
+            job = self.jobs[job_id]
+            job['status'] = JOB_RUNNING
+            job['started'] = time.time()
+            self._condition.notify_all()
+
+        try:
+            result = self.run_scan(dict(job))
+        except Exception as e:
+            self._finish(job_id, JOB_ERROR, message=f'Error al realizar el escaneo: {str(e)}')
+            return
+
+        if result.get('success'):
+            self._finish(job_id, JOB_DONE, result=result, message=result.get('message'))
+        else:
+            self._finish(job_id, JOB_ERROR, result=result, message=result.get('message'))
+
+    def _finish(self, job_id, status, result=None, message=None):
+        with self._condition:
+            job = self.jobs[job_id]
+            job['status'] = status
+            job['finished'] = time.time()
+            job['result'] = result
+            job['message'] = message
+            if self.active_job == job_id:
+                self.active_job = None
+            self._condition.notify_all()
+
+    def _prune(self):
+        """Elimina los trabajos terminados más antiguos por encima del historial."""
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in (JOB_DONE, JOB_ERROR)]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
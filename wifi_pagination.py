@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Paginación por rangos de _id (keyset) para el historial de escaneos
+En lugar de skip/limit, cada página se pide con un token opaco que indica el
+_id del último (o primer) escaneo visto y la dirección: la consulta es un rango
+sobre el índice _id y cuesta lo mismo en la página 1 que en la 10.000. Las
+primeras páginas se siguen pudiendo pedir por número y el total de escaneos es
+el estimado por los metadatos de la colección, cacheado unos segundos. Un
+número de página más profundo se sigue atendiendo con skip, acotado a la
+última página según ese total.
+"""
+
+import base64
+import binascii
+import threading
+import time
+
+from bson.objectid import ObjectId
+
+# Páginas a las que la interfaz enlaza por número; las demás se recorren con tokens
+SHALLOW_PAGES = 5
+
+# Segundos que se reutiliza el total estimado de escaneos
+COUNT_TTL = 30
+
+# Direcciones de un token: escaneos más antiguos o más recientes que su _id
+NEXT = 'n'
+PREV = 'p'
+
+
+def encode_token(direction, scan_id, page):
+    """
+    Crea un token opaco de paginación.
+
+    Args:
+        direction (str): NEXT (escaneos anteriores a scan_id) o PREV (posteriores)
+        scan_id (ObjectId): _id del escaneo que delimita la página
+        page (int): Número de la página a la que lleva el token (orientativo)
+
+    Returns:
+        str: Token apto para URLs
+    """
+    raw = f"{direction}:{scan_id}:{page}".encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_token(token):
+    """
+    Decodifica un token de encode_token.
+
+    Args:
+        token (str): Token recibido del cliente
+
+    Returns:
+        tuple: (dirección, ObjectId, página)
+
+    Raises:
+        ValueError: Si el token no es válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('ascii')
+        direction, scan_id, page = raw.split(':')
+        page = int(page)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Token de paginación no válido: {token}")
+    if direction not in (NEXT, PREV) or not ObjectId.is_valid(scan_id) or page < 1:
+        raise ValueError(f"Token de paginación no válido: {token}")
+    return direction, ObjectId(scan_id), page
+
+
+class ScanPager:
+    """
+    Paginador de una colección de escaneos ordenada por _id descendente.
+    """
+
+    def __init__(self, collection, per_page, shallow_pages=SHALLOW_PAGES, count_ttl=COUNT_TTL):
+        """
+        Args:
+            collection (Collection): Colección de escaneos
+            per_page (int): Escaneos por página predeterminados
+            shallow_pages (int): Páginas a las que se enlaza por número
+            count_ttl (float): Segundos que se reutiliza el total estimado
+        """
+        self.collection = collection
+        self.per_page = per_page
+        self.shallow_pages = shallow_pages
+        self.count_ttl = count_ttl
+        self._count = None
+        self._count_time = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        """
+        Devuelve el total estimado de escaneos (metadatos de la colección, sin recorrerla).
+
+        Returns:
+            int: Número de escaneos
+        """
+        with self._lock:
+            if self._count is not None and time.monotonic() - self._count_time < self.count_ttl:
+                return self._count
+        count = self.collection.estimated_document_count()
+        with self._lock:
+            self._count = count
+            self._count_time = time.monotonic()
+        return count
+
+    def page(self, page=1, token=None, per_page=None, projection=None):
+        """
+        Devuelve una página de escaneos, del más reciente al más antiguo.
+
+        Con token se consulta el rango de _id siguiente o anterior; sin token se usa
+        el número de página con skip. Las páginas posteriores a shallow_pages se
+        siguen pudiendo pedir, pero el skip crece con ellas: el número se acota a la
+        última página según el total estimado, de modo que nunca se salta más que
+        la colección.
+
+        Args:
+            page (int): Número de página (sin token)
+            token (str, optional): Token "next" o "prev" de una página anterior
+            per_page (int, optional): Escaneos por página; por defecto, el del paginador
+            projection (dict, optional): Campos a devolver
+
+        Returns:
+            dict: {"scans", "page", "next", "prev", "total", "total_pages"}; next y prev
+                son tokens o None si no hay más escaneos en esa dirección
+
+        Raises:
+            ValueError: Si el token no es válido
+        """
+        per_page = per_page or self.per_page
+
+        if token:
+            direction, scan_id, page = decode_token(token)
+            if direction == NEXT:
+                scans = list(self.collection.find({'_id': {'$lt': scan_id}}, projection)
+                             .sort('_id', -1).limit(per_page + 1))
+                has_next = len(scans) > per_page
+                scans = scans[:per_page]
+                has_prev = True
+            else:
+                # Los escaneos más recientes que scan_id, leídos hacia arriba y dados vuelta
+                scans = list(self.collection.find({'_id': {'$gt': scan_id}}, projection)
+                             .sort('_id', 1).limit(per_page + 1))
+                has_prev = len(scans) > per_page
+                scans = scans[:per_page][::-1]
+                has_next = True
+                if not has_prev:
+                    page = 1
+        else:
+            # skip sobre el índice _id, acotado a la última página
+            page = min(max(page, 1), max(-(-self.count() // per_page), 1))
+            scans = list(self.collection.find({}, projection).sort('_id', -1)
+                         .skip((page - 1) * per_page).limit(per_page + 1))
+            has_next = len(scans) > per_page
+            scans = scans[:per_page]
+            has_prev = page > 1
+
+        total = self.count()
+        return {
+            'scans': scans,
+            'page': page,
+            'next': encode_token(NEXT, scans[-1]['_id'], page + 1) if scans and has_next else None,
+            'prev': encode_token(PREV, scans[0]['_id'], max(page - 1, 1)) if scans and has_prev else None,
+            'total': total,
+            'total_pages': max(-(-total // per_page), page),
+        }
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+WiFi Parser para Raspberry Pi
+Este módulo interpreta la salida de `iwlist <interfaz> scan` y de
+`iw dev <interfaz> scan dump` usando patrones precompilados.
+"""
+
+import re
+
+# Separador de celdas (cada red WiFi)
+CELL_PATTERN = re.compile(r'Cell \d+ - Address: ([0-9A-Fa-f:]+)')
+
+# Cabecera de celda en el orden que imprime iwlist (Channel, Frequency,
+# Quality/Signal, Encryption, ESSID). Extrae todos los campos en un único match.
+CELL_HEADER_PATTERN = re.compile(
+    r'\s*Channel:(\d+)'
+    r'\s+Frequency:([\d.]+) GHz[^\n]*'
+    r'\s+Quality=(\d+)/(\d+)\s+Signal level=(-\d+) dBm'
+    r'\s+Encryption key:(on|off)'
+    r'\s+ESSID:"([^"]*)"'
+)
+
+# Patrones individuales, usados solo si la celda no sigue el orden habitual
+ESSID_PATTERN = re.compile(r'ESSID:"([^"]*)"')
+CHANNEL_PATTERN = re.compile(r'Channel:(\d+)')
+FREQUENCY_PATTERN = re.compile(r'Frequency:([\d.]+) GHz')
+SIGNAL_PATTERN = re.compile(r'Signal level=(-\d+) dBm')
+QUALITY_PATTERN = re.compile(r'Quality=(\d+)/(\d+)')
+ENCRYPTION_PATTERN = re.compile(r'Encryption key:(on|off)')
+
+# Elementos de información (IE) conocidos, p. ej. "IEEE 802.11i/WPA2 Version 1"
+IE_PATTERN = re.compile(r'IE: (?!Unknown)([^\n]+)')
+
+
+def _parse_cell_fallback(mac, info):
+    """
+    Procesa una celda campo por campo cuando no sigue el orden habitual.
+
+    Args:
+        mac (str): Dirección MAC de la celda
+        info (str): Texto de la celda
+
+    Returns:
+        dict: Información de la red
+    """
+    essid_match = ESSID_PATTERN.search(info)
+    channel_match = CHANNEL_PATTERN.search(info)
+    frequency_match = FREQUENCY_PATTERN.search(info)
+    signal_match = SIGNAL_PATTERN.search(info)
+    quality_match = QUALITY_PATTERN.search(info)
+    encryption_match = ENCRYPTION_PATTERN.search(info)
+
+    return {
+        'mac': mac,
+        'essid': essid_match.group(1) if essid_match else 'Unknown',
+        'channel': int(channel_match.group(1)) if channel_match else None,
+        'frequency': float(frequency_match.group(1)) if frequency_match else None,
+        'signal': int(signal_match.group(1)) if signal_match else None,
+        'quality': int(quality_match.group(1)) / int(quality_match.group(2)) * 100 if quality_match else None,
+        'encrypted': encryption_match.group(1) == 'on' if encryption_match else None,
+        'ie': IE_PATTERN.findall(info),
+    }
+
+
+def parse_iwlist_scan(scan_output):
+    """
+    Procesa la salida completa de `iwlist scan`.
+
+    Para cada celda se intenta primero un único patrón que extrae ESSID,
+    canal, frecuencia, señal, calidad y cifrado a la vez; si la celda no
+    sigue el orden habitual se recurre a la búsqueda campo por campo.
+
+    Args:
+        scan_output (str): Salida de texto del comando iwlist
+
+    Returns:
+        list: Lista de diccionarios con la información de cada red (sin distancia)
+    """
+    cells = CELL_PATTERN.split(scan_output)
+    networks = []
+
+    # cells = [cabecera, mac1, info1, mac2, info2, ...]
+    for i in range(1, len(cells) - 1, 2):
+        mac = cells[i]
+        info = cells[i + 1]
+
+        match = CELL_HEADER_PATTERN.match(info)
+        if not match:
+            networks.append(_parse_cell_fallback(mac, info))
+            continue
+
+        channel, frequency, quality, quality_max, signal, encryption, essid = match.groups()
+        networks.append({
+            'mac': mac,
+            'essid': essid,
+            'channel': int(channel),
+            'frequency': float(frequency),
+            'signal': int(signal),
+            'quality': int(quality) / int(quality_max) * 100,
+            'encrypted': encryption == 'on',
+            'ie': IE_PATTERN.findall(info),
+        })
+
+    return networks
+
+
+# Patrones para la salida de `iw dev <interfaz> scan [dump]` (nl80211)
+IW_BSS_PATTERN = re.compile(r'^BSS ([0-9A-Fa-f:]{17})', re.MULTILINE)
+IW_FREQ_PATTERN = re.compile(r'^\s+freq: (\d+(?:\.\d+)?)', re.MULTILINE)
+IW_SIGNAL_PATTERN = re.compile(r'^\s+signal: (-?\d+(?:\.\d+)?) dBm', re.MULTILINE)
+IW_SSID_PATTERN = re.compile(r'^\s+SSID: ?([^\n]*)', re.MULTILINE)
+IW_CAPABILITY_PATTERN = re.compile(r'^\s+capability:([^\n]*)', re.MULTILINE)
+IW_DS_CHANNEL_PATTERN = re.compile(r'DS Parameter set: channel (\d+)')
+IW_PRIMARY_CHANNEL_PATTERN = re.compile(r'\* primary channel: (\d+)')
+IW_RSN_PATTERN = re.compile(r'^\s+RSN:\s+\* Version: (\d+)', re.MULTILINE)
+IW_WPA_PATTERN = re.compile(r'^\s+WPA:\s+\* Version: (\d+)', re.MULTILINE)
+
+
+def frequency_to_channel(frequency_mhz):
+    """
+    Convierte una frecuencia central en MHz a número de canal.
+
+    Args:
+        frequency_mhz (float): Frecuencia en MHz
+
+    Returns:
+        int: Número de canal o None si la frecuencia no es reconocida
+    """
+    frequency_mhz = int(round(frequency_mhz))
+    if frequency_mhz == 2484:
+        return 14
+    if 2412 <= frequency_mhz < 2484:
+        return (frequency_mhz - 2407) // 5
+    if 5160 <= frequency_mhz <= 5885:
+        return (frequency_mhz - 5000) // 5
+    if 5955 <= frequency_mhz <= 7115:
+        return (frequency_mhz - 5950) // 5
+    return None
+
+
+def signal_to_quality(signal):
+    """
+    Estima la calidad (%) a partir del nivel de señal, con la misma escala
+    que informa iwlist (señal + 110 sobre 70).
+
+    Args:
+        signal (int): Nivel de señal en dBm
+
+    Returns:
+        float: Calidad en porcentaje
+    """
+    return min(max(signal + 110, 0), 70) / 70 * 100
+
+
+def parse_iw_scan(scan_output):
+    """
+    Procesa la salida de `iw dev <interfaz> scan` o `scan dump`.
+
+    Devuelve diccionarios con las mismas claves que parse_iwlist_scan para que
+    el resto de la aplicación no dependa del backend usado.
+
+    Args:
+        scan_output (str): Salida de texto del comando iw
+
+    Returns:
+        list: Lista de diccionarios con la información de cada red (sin distancia)
+    """
+    blocks = IW_BSS_PATTERN.split(scan_output)
+    networks = []
+
+    # blocks = [cabecera, mac1, info1, mac2, info2, ...]
+    for i in range(1, len(blocks) - 1, 2):
+        mac = blocks[i].upper()
+        info = blocks[i + 1]
+
+        freq_match = IW_FREQ_PATTERN.search(info)
+        signal_match = IW_SIGNAL_PATTERN.search(info)
+        ssid_match = IW_SSID_PATTERN.search(info)
+        capability_match = IW_CAPABILITY_PATTERN.search(info)
+
+        frequency = float(freq_match.group(1)) if freq_match else None
+        signal = int(round(float(signal_match.group(1)))) if signal_match else None
+
+        # Canal: DS Parameter set (2.4GHz), HT primary channel o derivado de la frecuencia
+        channel_match = IW_DS_CHANNEL_PATTERN.search(info) or IW_PRIMARY_CHANNEL_PATTERN.search(info)
+        if channel_match:
+            channel = int(channel_match.group(1))
+        elif frequency:
+            channel = frequency_to_channel(frequency)
+        else:
+            channel = None
+
+        # Elementos de seguridad con los mismos nombres que usa iwlist
+        ie = []
+        wpa_match = IW_WPA_PATTERN.search(info)
+        if wpa_match:
+            ie.append(f"WPA Version {wpa_match.group(1)}")
+        rsn_match = IW_RSN_PATTERN.search(info)
+        if rsn_match:
+            ie.append(f"IEEE 802.11i/WPA2 Version {rsn_match.group(1)}")
+
+        networks.append({
+            'mac': mac,
+            'essid': ssid_match.group(1) if ssid_match else 'Unknown',
+            'channel': channel,
+            'frequency': frequency / 1000 if frequency else None,
+            'signal': signal,
+            'quality': signal_to_quality(signal) if signal is not None else None,
+            'encrypted': 'Privacy' in capability_match.group(1) if capability_match else None,
+            'ie': ie,
+        })
+
+    return networks
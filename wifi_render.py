@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Capa de renderizado de gráficos para WiFi Analyzer.
+Usa la API orientada a objetos de matplotlib (Figure + FigureCanvasAgg) sin el
+estado global de pyplot, de modo que las figuras guardadas en archivo no se
+acumulan entre ciclos. Ofrece presets de calidad (vista previa o impresión),
+reduce las series largas antes de dibujarlas y reutiliza una plantilla de
+figura/ejes por tipo de gráfico.
+"""
+
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Presets de calidad:
+#   dpi: resolución del PNG
+#   tight: recortar con bbox_inches='tight' (requiere un dibujado extra)
+#   max_points: puntos máximos por serie temporal antes de reducirla
+QUALITY_PRESETS = {
+    "preview": {"dpi": 100, "tight": False, "max_points": 1000},
+    "print": {"dpi": 300, "tight": True, "max_points": 5000},
+}
+DEFAULT_QUALITY = "print"
+
+# Márgenes fijos de las plantillas sin recorte 'tight' (espacio para etiquetas rotadas)
+DEFAULT_MARGINS = {"left": 0.08, "right": 0.97, "top": 0.92, "bottom": 0.2}
+
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+
+def _buckets(y, count):
+    """
+    Reparte una serie en `count` tramos consecutivos como una matriz tramo x punto.
+
+    Returns:
+        tuple: (tamaño del tramo, matriz float64 rellenada con NaN al final)
+    """
+    n = len(y)
+    size = -(-n // count)
+    count = -(-n // size)
+    # El relleno NaN solo cae en el último tramo, que siempre tiene algún valor real
+    values = np.full(count * size, np.nan, dtype=np.float64)
+    values[:n] = y
+    return size, values.reshape(count, size)
+
+
+def downsample(x, y, max_points):
+    """
+    Reduce una serie conservando el mínimo y el máximo de cada tramo.
+
+    Divide la serie en max_points / 2 tramos consecutivos y conserva, en orden,
+    los puntos mínimo y máximo de cada uno, de modo que los picos siguen
+    visibles en el gráfico.
+
+    Args:
+        x (ndarray): Valores del eje X (p. ej. timestamps)
+        y (ndarray): Valores de la serie, sin NaN
+        max_points (int): Puntos máximos a devolver (None o 0 desactiva la reducción)
+
+    Returns:
+        tuple: (x, y) reducidos (o los originales si ya son suficientemente cortos)
+    """
+    if not max_points or len(y) <= max_points:
+        return x, y
+
+    size, values = _buckets(y, max(1, max_points // 2))
+    offsets = np.arange(len(values)) * size
+    lowest = offsets + np.nanargmin(values, axis=1)
+    highest = offsets + np.nanargmax(values, axis=1)
+    index = np.sort(np.stack([lowest, highest], axis=1), axis=1).ravel()
+    return x[index], y[index]
+
+
+def downsample_range(x, lower, upper, max_points):
+    """
+    Reduce una banda (mínimo, máximo) a max_points tramos sin perder sus extremos.
+
+    Args:
+        x (ndarray): Valores del eje X
+        lower (ndarray): Límite inferior de la banda, sin NaN
+        upper (ndarray): Límite superior de la banda, sin NaN
+        max_points (int): Puntos máximos a devolver (None o 0 desactiva la reducción)
+
+    Returns:
+        tuple: (x al inicio de cada tramo, mínimo de lower, máximo de upper)
+    """
+    if not max_points or len(x) <= max_points:
+        return x, lower, upper
+
+    size, lower_values = _buckets(lower, max_points)
+    _, upper_values = _buckets(upper, max_points)
+    return x[::size], np.nanmin(lower_values, axis=1), np.nanmax(upper_values, axis=1)
+
+
+class Renderer:
+    """
+    Renderizador de gráficos con plantillas reutilizables.
+
+    Cada tipo de gráfico (clave) tiene una sola Figure con sus ejes, que se
+    limpia y se vuelve a dibujar en cada ciclo en lugar de crear una figura
+    nueva. Las figuras no se registran en pyplot, por lo que no quedan abiertas.
+    """
+
+    def __init__(self, quality=DEFAULT_QUALITY, max_points=None):
+        """
+        Args:
+            quality (str): Preset de QUALITY_PRESETS ('preview' o 'print')
+            max_points (int, optional): Puntos máximos por serie; por defecto, el del preset
+        """
+        if quality not in QUALITY_PRESETS:
+            raise ValueError(f"Calidad desconocida: {quality} (opciones: {', '.join(QUALITY_PRESETS)})")
+        preset = QUALITY_PRESETS[quality]
+        self.quality = quality
+        self.dpi = preset["dpi"]
+        self.tight = preset["tight"]
+        self.max_points = preset["max_points"] if max_points is None else max_points
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def _template(self, key, figsize, margins):
+        """Devuelve la plantilla (figura, ejes) de `key`, creándola la primera vez."""
+        template = self._templates.get(key)
+        if template is None:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot(1, 1, 1)
+            template = self._templates[key] = (fig, ax)
+        fig, ax = template
+        if tuple(fig.get_size_inches()) != tuple(figsize):
+            fig.set_size_inches(figsize)
+        if not self.tight:
+            fig.subplots_adjust(**dict(DEFAULT_MARGINS, **(margins or {})))
+        return template
+
+    @contextmanager
+    def figure(self, key, figsize, output_file=None, margins=None):
+        """
+        Entrega una figura y sus ejes listos para dibujar; al salir la guarda o la muestra.
+
+        Con output_file se reutiliza la plantilla de `key` y se guarda con el preset
+        de calidad. Sin output_file se crea una figura de pyplot, se muestra en
+        pantalla y se cierra.
+
+        Args:
+            key (str): Tipo de gráfico (identifica la plantilla)
+            figsize (tuple): Tamaño de la figura en pulgadas
+            output_file (str, optional): Ruta del PNG
+            margins (dict, optional): Márgenes para subplots_adjust cuando no se recorta
+
+        Yields:
+            tuple: (Figure, Axes)
+        """
+        if output_file is None:
+            import matplotlib.pyplot as plt
+            fig, ax = plt.subplots(figsize=figsize)
+            try:
+                yield fig, ax
+                fig.tight_layout()
+                plt.show()
+            finally:
+                plt.close(fig)
+            return
+
+        with self._lock:
+            fig, ax = self._template(key, figsize, margins)
+            ax.clear()
+            try:
+                yield fig, ax
+                self.save(fig, output_file)
+            finally:
+                # Liberar los artistas (y sus datos) hasta el próximo ciclo
+                ax.clear()
+
+    def save(self, fig, output_file):
+        """Guarda la figura con la resolución y el recorte del preset."""
+        if self.tight:
+            fig.savefig(output_file, dpi=self.dpi, bbox_inches='tight')
+        else:
+            fig.savefig(output_file, dpi=self.dpi)
+
+    def plot(self, ax, x, y, *args, **kwargs):
+        """ax.plot de una serie temporal, reducida a max_points si es más larga."""
+        x, y = downsample(x, y, self.max_points)
+        return ax.plot(x, y, *args, **kwargs)
+
+    def fill_between(self, ax, x, y1, y2, **kwargs):
+        """ax.fill_between de una banda, reducida a max_points tramos si es más larga."""
+        x, y1, y2 = downsample_range(x, y1, y2, self.max_points)
+        return ax.fill_between(x, y1, y2, **kwargs)
+
+    def close(self):
+        """Libera las plantillas."""
+        with self._lock:
+            for fig, _ in self._templates.values():
+                fig.clear()
+            self._templates.clear()
+
+
+def get_renderer(quality=DEFAULT_QUALITY):
+    """
+    Devuelve el renderizador compartido del preset indicado.
+
+    Args:
+        quality (str): Preset de QUALITY_PRESETS
+
+    Returns:
+        Renderer: Renderizador (se crea una vez por preset)
+    """
+    with _renderers_lock:
+        renderer = _renderers.get(quality)
+        if renderer is None:
+            renderer = _renderers[quality] = Renderer(quality)
+        return renderer
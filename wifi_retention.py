@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Retención y compactación de escaneos para WiFi Analyzer
+Los escaneos completos (wifi_scans y las muestras por BSSID) se conservan
+RAW_RETENTION_DAYS días (si se configura): un índice TTL sobre timestamp los expira y un trabajo
+de compactación periódico los borra por lotes, recorta los rollups por minuto y
+por hora según wifi_rollups.ROLLUP_RETENTION_DAYS y registra el espacio liberado
+en wifi_migrations. Los rollups se actualizan al insertar cada escaneo, así que
+los resúmenes por hora y día de cada BSSID ya existen antes de que expire el
+escaneo; por eso la expiración solo se activa si los rollups cubren todos los
+escaneos, y se suspende si falla la suma de un escaneo (ver suspend_expiry).
+Las consultas de tendencias leen los rollups para la parte del período anterior
+al corte (ver read_ranges), solo si la expiración llegó a activarse.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pymongo
+
+import wifi_rollups
+
+# Días que se conservan los escaneos completos (0, por defecto, para conservarlos siempre;
+# la expiración borra datos y hay que activarla explícitamente)
+RAW_RETENTION_DAYS = int(os.environ.get('MONGO_RAW_RETENTION_DAYS', 0))
+
+# Segundos entre compactaciones programadas
+COMPACTION_INTERVAL = 6 * 3600
+
+# Documento de wifi_migrations con la última compactación y los totales
+RETENTION_STATE_ID = "retention"
+
+# Índice de wifi_scans que lleva la expiración (ver wifi_indexes.SCAN_INDEXES)
+TTL_INDEX = "timestamp_-1"
+
+# Base de tiempo: los escaneos guardan la hora local sin zona (datetime.now()) y el
+# corte de retención se calcula igual, en hora local. El monitor TTL de MongoDB, en
+# cambio, compara las fechas guardadas con la hora UTC, así que expireAfterSeconds
+# se corrige con el desfase local (ver ttl_seconds) para que expiren en el mismo corte.
+
+
+def local_utc_offset(now=None):
+    """Devuelve el desfase de la hora local respecto de UTC en segundos (negativo al oeste)."""
+    return int((now or datetime.now()).astimezone().utcoffset().total_seconds())
+
+
+def ttl_seconds(raw_days, now=None):
+    """
+    Calcula expireAfterSeconds para que el TTL coincida con raw_cutoff.
+
+    Un escaneo guardado a la hora local L se ve en MongoDB como L UTC; con un
+    desfase local d (UTC-3: d = -3 h) el monitor lo borraría cuando tiene
+    raw_days + d de antigüedad real. Restar d compensa esa diferencia.
+
+    Args:
+        raw_days (int): Días que se conservan los escaneos completos
+        now (datetime, optional): Momento actual (el desfase cambia con el horario de verano)
+
+    Returns:
+        int: Segundos de expiración o None si los escaneos se conservan siempre
+    """
+    if raw_days <= 0:
+        return None
+    return max(int(raw_days * 86400) - local_utc_offset(now), 0)
+
+
+def raw_cutoff(raw_days=RAW_RETENTION_DAYS, now=None):
+    """Devuelve el momento antes del cual ya no hay escaneos completos (None si se conservan siempre)."""
+    if raw_days <= 0:
+        return None
+    return (now or datetime.now()) - timedelta(days=raw_days)
+
+
+def split_range(start_time, end_time, raw_days=RAW_RETENTION_DAYS, now=None):
+    """
+    Divide un período entre la parte que solo está en los rollups y la que tiene escaneos completos.
+
+    Args:
+        start_time (datetime): Tiempo de inicio
+        end_time (datetime): Tiempo de fin
+        raw_days (int): Días que se conservan los escaneos completos
+        now (datetime, optional): Momento actual
+
+    Returns:
+        tuple: ((inicio, fin) de los rollups o None, (inicio, fin) de los escaneos o None)
+    """
+    return _split_at(start_time, end_time, raw_cutoff(raw_days, now))
+
+
+def _split_at(start_time, end_time, cutoff):
+    """Divide un período en la parte anterior y la posterior a cutoff (todo posterior si es None)."""
+    if cutoff is None or start_time >= cutoff:
+        return None, (start_time, end_time)
+    if end_time < cutoff:
+        return (start_time, end_time), None
+    return (start_time, cutoff), (cutoff, end_time)
+
+
+def raw_expiry_active(database):
+    """
+    Indica si los escaneos anteriores al corte pueden faltar y hay que leerlos de los rollups.
+
+    Es así desde que la expiración se activó alguna vez ("raw_expiry" en el estado
+    de los rollups), aunque después se haya suspendido: los escaneos ya borrados
+    solo están en los rollups. Si no, los escaneos completos siguen existiendo y
+    son la única fuente fiable.
+
+    Args:
+        database (Database): Base de datos de pymongo
+
+    Returns:
+        bool: True si la parte anterior al corte se lee de los rollups
+    """
+    state = database["wifi_migrations"].find_one({"_id": wifi_rollups.ROLLUPS_STATE_ID}, {"raw_expiry": 1})
+    return bool(state and state.get("raw_expiry"))
+
+
+def read_ranges(database, start_time, end_time, raw_days=RAW_RETENTION_DAYS, now=None):
+    """
+    Divide un período de lectura entre rollups y escaneos completos.
+
+    Igual que split_range, pero sin expiración activa (ver raw_expiry_active)
+    todo el período se lee de los escaneos completos. Durante un rebuild_rollups
+    posterior a la expiración, los rollups solo están completos antes de su
+    "from_time" y el corte se mueve ahí (desde entonces la expiración está
+    suspendida, así que los escaneos siguen existiendo).
+
+    Args:
+        database (Database): Base de datos de pymongo
+        start_time (datetime): Tiempo de inicio
+        end_time (datetime): Tiempo de fin
+        raw_days (int): Días que se conservan los escaneos completos
+        now (datetime, optional): Momento actual
+
+    Returns:
+        tuple: ((inicio, fin) de los rollups o None, (inicio, fin) de los escaneos o None)
+    """
+    if raw_days <= 0:
+        return None, (start_time, end_time)
+    state = database["wifi_migrations"].find_one({"_id": wifi_rollups.ROLLUPS_STATE_ID},
+                                                 {"complete": 1, "raw_expiry": 1, "from_time": 1})
+    if not (state and state.get("raw_expiry")):
+        return None, (start_time, end_time)
+    if not state.get("complete") and state.get("from_time"):
+        return _split_at(start_time, end_time, state["from_time"])
+    return split_range(start_time, end_time, raw_days, now)
+
+
+def ensure_ttl_index(collection, raw_days):
+    """
+    Ajusta la expiración del índice de timestamp de wifi_scans.
+
+    Si el índice ya es TTL se cambia con collMod (sin reconstruirlo); si no lo
+    es, o hay que quitar la expiración, se vuelve a crear. La expiración se
+    corrige con el desfase local (ver ttl_seconds).
+
+    Args:
+        collection (Collection): Colección wifi_scans
+        raw_days (int): Días que se conservan los escaneos (0 quita la expiración)
+
+    Returns:
+        bool: True si se cambió el índice
+    """
+    keys = [("timestamp", pymongo.DESCENDING)]
+    expire = ttl_seconds(raw_days)
+    current = collection.index_information().get(TTL_INDEX, {})
+    current_expire = current.get("expireAfterSeconds")
+    if current and current_expire == expire:
+        return False
+
+    if current_expire is not None and expire is not None:
+        collection.database.command("collMod", collection.name,
+                                    index={"name": TTL_INDEX, "expireAfterSeconds": expire})
+    else:
+        if current:
+            collection.drop_index(TTL_INDEX)
+        options = {"expireAfterSeconds": expire} if expire is not None else {}
+        collection.create_index(keys, name=TTL_INDEX, **options)
+
+    if expire is None:
+        print("Expiración de escaneos desactivada")
+    else:
+        print(f"Los escaneos completos expiran a los {raw_days} días")
+    return True
+
+
+def apply_ttl(database, scans_collection, raw_days=RAW_RETENTION_DAYS):
+    """
+    Activa la expiración de escaneos solo si los rollups los cubren a todos.
+
+    Con rollups incompletos (escaneos anteriores a los rollups) la expiración se
+    desactiva, porque borraría escaneos que no están resumidos.
+
+    Args:
+        database (Database): Base de datos de pymongo
+        scans_collection (Collection): Colección wifi_scans
+        raw_days (int): Días que se conservan los escaneos completos
+
+    Returns:
+        int: Días de expiración aplicados (0 si quedó desactivada)
+    """
+    if raw_days > 0 and not wifi_rollups.rollups_ready(database, scans_collection):
+        print("Los rollups no cubren todos los escaneos: no se activa la expiración de escaneos. "
+              "Ejecute 'wifi_analyzer.py --use-mongodb --rebuild-rollups'.")
+        raw_days = 0
+    if raw_days > 0:
+        # A partir de aquí los rollups son la única copia de los escaneos expirados
+        database["wifi_migrations"].update_one({"_id": wifi_rollups.ROLLUPS_STATE_ID},
+                                               {"$set": {"raw_expiry": True}}, upsert=True)
+    ensure_ttl_index(scans_collection, raw_days)
+    return raw_days
+
+
+def suspend_expiry(database, scans_collection, scan_ids):
+    """
+    Suspende la expiración de escaneos porque no se pudieron sumar a los rollups.
+
+    Marca los rollups como incompletos (ver wifi_rollups.mark_incomplete) y quita
+    la expiración del índice: esos escaneos no deben borrarse sin estar resumidos.
+    apply_ttl y compact la vuelven a activar cuando rebuild_rollups completa los
+    rollups.
+
+    Args:
+        database (Database): Base de datos de pymongo
+        scans_collection (Collection): Colección wifi_scans
+        scan_ids (list): _id de los escaneos que no se sumaron
+    """
+    wifi_rollups.mark_incomplete(database, scan_ids)
+    ensure_ttl_index(scans_collection, 0)
+
+
+def collection_size(database, name):
+    """
+    Devuelve el tamaño de una colección.
+
+    Returns:
+        dict: {"count", "size" (bytes de datos), "storage" (bytes en disco)}; ceros si no existe
+    """
+    try:
+        stats = database.command("collStats", name)
+    except pymongo.errors.OperationFailure:
+        return {"count": 0, "size": 0, "storage": 0}
+    return {"count": stats.get("count", 0), "size": stats.get("size", 0), "storage": stats.get("storageSize", 0)}
+
+
+def _delete_before(collection, query, batch_size):
+    """Borra los documentos de la consulta por lotes de _id (no bloquea la colección con un solo borrado)."""
+    deleted = 0
+    while True:
+        ids = [document["_id"] for document in collection.find(query, {"_id": 1}).limit(batch_size)]
+        if not ids:
+            return deleted
+        deleted += collection.delete_many({"_id": {"$in": ids}}).deleted_count
+
+
+def compact(database, scans_collection, raw_days=RAW_RETENTION_DAYS, samples_name=None,
+            reclaim_storage=False, now=None, batch_size=1000):
+    """
+    Aplica la política de retención y registra el espacio liberado.
+
+    Borra los escaneos completos (y sus muestras) anteriores al corte si los
+    rollups los cubren, y los rollups por minuto y por hora más antiguos que su
+    retención. Con reclaim_storage ejecuta además el comando compact de MongoDB,
+    que devuelve al sistema el espacio libre (bloquea la colección mientras dura).
+
+    Args:
+        database (Database): Base de datos de pymongo
+        scans_collection (Collection): Colección wifi_scans
+        raw_days (int): Días que se conservan los escaneos completos (0 para no borrarlos)
+        samples_name (str, optional): Colección de muestras por BSSID, si se usa
+        reclaim_storage (bool): Si es True, compacta el almacenamiento de las colecciones
+        now (datetime, optional): Momento actual
+        batch_size (int): Documentos por borrado
+
+    Returns:
+        dict: Métricas {"run_at", "seconds", "deleted", "before", "after", "reclaimed_bytes",
+            "reclaimed_storage"}
+    """
+    now = now or datetime.now()
+    started = time.monotonic()
+    names = [scans_collection.name, wifi_rollups.MONGO_ROLLUPS_COLLECTION, wifi_rollups.MONGO_BSSID_ROLLUPS_COLLECTION]
+    if samples_name:
+        names.append(samples_name)
+    before = {name: collection_size(database, name) for name in names}
+    deleted = {}
+
+    cutoff = raw_cutoff(raw_days, now)
+    if cutoff is not None:
+        if wifi_rollups.rollups_ready(database, scans_collection):
+            database["wifi_migrations"].update_one({"_id": wifi_rollups.ROLLUPS_STATE_ID},
+                                                   {"$set": {"raw_expiry": True}}, upsert=True)
+            # El desfase local cambia con el horario de verano: se reajusta el TTL
+            ensure_ttl_index(scans_collection, raw_days)
+            deleted[scans_collection.name] = _delete_before(
+                scans_collection, {"timestamp": {"$lt": cutoff}}, batch_size)
+            if samples_name:
+                try:
+                    deleted[samples_name] = database[samples_name].delete_many(
+                        {"timestamp": {"$lt": cutoff}}).deleted_count
+                except pymongo.errors.OperationFailure as e:
+                    # Colecciones time-series de MongoDB 5.0: solo admiten borrar por metaField
+                    print(f"No se pudieron borrar las muestras antiguas: {e}")
+        else:
+            print("Los rollups no cubren todos los escaneos: no se borran escaneos completos.")
+            ensure_ttl_index(scans_collection, 0)
+
+    # Recortar las granularidades finas de los rollups; los diarios se conservan siempre
+    for granularity, days in wifi_rollups.ROLLUP_RETENTION_DAYS.items():
+        if days <= 0:
+            continue
+        query = {"g": granularity, "t": {"$lt": now - timedelta(days=days)}}
+        for name in (wifi_rollups.MONGO_ROLLUPS_COLLECTION, wifi_rollups.MONGO_BSSID_ROLLUPS_COLLECTION):
+            deleted[f"{name}:{granularity}"] = database[name].delete_many(query).deleted_count
+
+    if reclaim_storage:
+        for name in names:
+            try:
+                database.command("compact", name)
+            except pymongo.errors.OperationFailure as e:
+                print(f"No se pudo compactar {name}: {e}")
+
+    after = {name: collection_size(database, name) for name in names}
+    metrics = {
+        "run_at": now,
+        "seconds": round(time.monotonic() - started, 3),
+        "deleted": deleted,
+        "before": before,
+        "after": after,
+        "reclaimed_bytes": sum(before[name]["size"] - after[name]["size"] for name in names),
+        "reclaimed_storage": sum(before[name]["storage"] - after[name]["storage"] for name in names),
+    }
+
+    database["wifi_migrations"].update_one(
+        {"_id": RETENTION_STATE_ID},
+        {"$set": {"last_run": metrics},
+         "$inc": {"runs": 1, "total_deleted": sum(deleted.values()),
+                  "total_reclaimed_bytes": metrics["reclaimed_bytes"]}},
+        upsert=True
+    )
+
+    print(f"Compactación: {sum(deleted.values())} documentos borrados, "
+          f"{metrics['reclaimed_bytes'] / 1024 / 1024:.1f} MB de datos liberados "
+          f"({metrics['reclaimed_storage'] / 1024 / 1024:.1f} MB en disco) en {metrics['seconds']:.1f} s")
+    return metrics
+
+
+def retention_status(database):
+    """Devuelve la última compactación y los totales acumulados (None si nunca se ejecutó)."""
+    return database["wifi_migrations"].find_one({"_id": RETENTION_STATE_ID}, {"_id": 0})
+
+
+class CompactionScheduler:
+    """
+    Ejecuta la compactación periódicamente en un hilo en segundo plano.
+    """
+
+    def __init__(self, compact_func, interval=COMPACTION_INTERVAL):
+        """
+        Args:
+            compact_func (callable): Función sin argumentos que compacta (p. ej. un lambda sobre compact)
+            interval (float): Segundos entre compactaciones
+        """
+        self.compact_func = compact_func
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Inicia el hilo (la primera compactación es tras un intervalo)."""
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="wifi-compaction", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.compact_func()
+            except Exception as e:
+                print(f"Error en la compactación programada: {e}")
+
+    def stop(self):
+        """Detiene el hilo."""
+        self._stop.set()
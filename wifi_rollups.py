@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Agregados precalculados (rollups) para WiFi Analyzer
+Este módulo mantiene agregados por minuto, hora y día de cada escaneo
+(cantidad de redes por banda, ocupación de canales y señal mínima, media y
+máxima por BSSID). Se actualizan incrementalmente al insertar cada escaneo y
+las funciones de tendencias eligen la granularidad según el período pedido,
+en lugar de leer todos los escaneos completos del período.
+"""
+
+import os
+from datetime import datetime, timedelta
+import pymongo
+from pymongo import UpdateOne
+
+MONGO_ROLLUPS_COLLECTION = os.environ.get('MONGO_ROLLUPS_COLLECTION', 'wifi_rollups')
+MONGO_BSSID_ROLLUPS_COLLECTION = os.environ.get('MONGO_BSSID_ROLLUPS_COLLECTION', 'wifi_bssid_rollups')
+
+# Granularidades disponibles (nombre, segundos por bucket), de la más fina a la más gruesa
+GRANULARITIES = [("minute", 60), ("hour", 3600), ("day", 86400)]
+
+# Número máximo de puntos que se quieren en un gráfico de tendencia
+TARGET_POINTS = 2000
+
+# Documento de wifi_migrations que indica si los rollups cubren todos los escaneos
+ROLLUPS_STATE_ID = "rollups"
+
+# Marca de los escaneos guardados que todavía no se sumaron a los rollups: se
+# inserta con el escaneo y se quita al sumarlo (ver apply_rollups)
+PENDING_FIELD = "rollups_pending"
+
+# Días que se conservan los rollups de cada granularidad (0 para conservarlos siempre);
+# los recorta wifi_retention.compact
+ROLLUP_RETENTION_DAYS = {
+    "minute": int(os.environ.get('MONGO_MINUTE_ROLLUP_DAYS', 30)),
+    "hour": int(os.environ.get('MONGO_HOUR_ROLLUP_DAYS', 400)),
+    "day": 0,
+}
+
+
+def bucket_start(timestamp, granularity):
+    """
+    Trunca un timestamp al inicio de su bucket.
+
+    Args:
+        timestamp (datetime): Momento del escaneo
+        granularity (str): 'minute', 'hour' o 'day'
+
+    Returns:
+        datetime: Inicio del bucket
+    """
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def choose_granularity(start_time, end_time, target_points=TARGET_POINTS, now=None):
+    """
+    Elige la granularidad más fina que no supera target_points en el período
+    y que todavía se conserva al inicio del período (ver ROLLUP_RETENTION_DAYS).
+
+    Args:
+        start_time (datetime): Tiempo de inicio
+        end_time (datetime): Tiempo de fin
+        target_points (int): Número máximo de puntos deseado
+        now (datetime, optional): Momento actual (para la retención)
+
+    Returns:
+        str: 'minute', 'hour' o 'day'
+    """
+    now = now or datetime.now()
+    span = (end_time - start_time).total_seconds()
+    for name, seconds in GRANULARITIES:
+        days = ROLLUP_RETENTION_DAYS.get(name, 0)
+        if days > 0 and start_time < now - timedelta(days=days):
+            continue
+        if span / seconds <= target_points:
+            return name
+    return GRANULARITIES[-1][0]
+
+
+def granularity_seconds(granularity):
+    """Devuelve la duración en segundos de un bucket de la granularidad indicada."""
+    return dict(GRANULARITIES)[granularity]
+
+
+def build_rollup_updates(document):
+    """
+    Construye las actualizaciones incrementales de un escaneo.
+
+    Args:
+        document (dict): Documento de escaneo (con timestamp y networks)
+
+    Returns:
+        tuple: (operaciones para wifi_rollups, operaciones para wifi_bssid_rollups)
+    """
+    networks = document.get("networks", [])
+    timestamp = document["timestamp"]
+
+    increments = {"scans": 1, "networks_sum": len(networks), "count_2g_sum": 0, "count_5g_sum": 0}
+    for network in networks:
+        channel = network.get("channel")
+        if channel:
+            band = "2g" if channel <= 14 else "5g"
+            increments[f"count_{band}_sum"] += 1
+            key = f"channels_{band}.{channel}"
+            increments[key] = increments.get(key, 0) + 1
+
+    scan_ops = []
+    bssid_ops = []
+    for granularity, _ in GRANULARITIES:
+        bucket = bucket_start(timestamp, granularity)
+        scan_ops.append(UpdateOne(
+            {"g": granularity, "t": bucket},
+            {"$inc": increments,
+             "$min": {"networks_min": len(networks)},
+             "$max": {"networks_max": len(networks)}},
+            upsert=True
+        ))
+
+        for network in networks:
+            signal = network.get("signal")
+            if not network.get("mac") or signal is None:
+                continue
+            bssid_ops.append(UpdateOne(
+                {"g": granularity, "bssid": network["mac"], "t": bucket},
+                {"$inc": {"n": 1, "signal_sum": signal},
+                 "$min": {"signal_min": signal},
+                 "$max": {"signal_max": signal},
+                 "$set": {"essid": network.get("essid"), "channel": network.get("channel")}},
+                upsert=True
+            ))
+
+    return scan_ops, bssid_ops
+
+
+def ensure_rollup_collections(database):
+    """
+    Crea los índices de las colecciones de rollups.
+
+    Args:
+        database (Database): Base de datos de pymongo
+    """
+    rollups = database[MONGO_ROLLUPS_COLLECTION]
+    rollups.create_index([("g", pymongo.ASCENDING), ("t", pymongo.ASCENDING)], unique=True)
+
+    bssid_rollups = database[MONGO_BSSID_ROLLUPS_COLLECTION]
+    bssid_rollups.create_index([("g", pymongo.ASCENDING), ("bssid", pymongo.ASCENDING), ("t", pymongo.ASCENDING)],
+                               unique=True)
+    bssid_rollups.create_index([("g", pymongo.ASCENDING), ("essid", pymongo.ASCENDING), ("t", pymongo.ASCENDING)])
+
+
+def update_rollups(database, documents):
+    """
+    Suma los escaneos indicados a los rollups (un bulk_write por colección).
+
+    Args:
+        database (Database): Base de datos de pymongo
+        documents (list): Documentos de escaneo ya insertados
+    """
+    scan_ops = []
+    bssid_ops = []
+    for document in documents:
+        ops, network_ops = build_rollup_updates(document)
+        scan_ops.extend(ops)
+        bssid_ops.extend(network_ops)
+
+    if scan_ops:
+        database[MONGO_ROLLUPS_COLLECTION].bulk_write(scan_ops, ordered=False)
+    if bssid_ops:
+        database[MONGO_BSSID_ROLLUPS_COLLECTION].bulk_write(bssid_ops, ordered=False)
+
+
+def apply_rollups(database, scans_collection, documents):
+    """
+    Suma a los rollups los escaneos marcados como pendientes y les quita la marca.
+
+    Los escaneos sin PENDING_FIELD se ignoran. Al reenviar o reimportar un escaneo
+    que ya estaba guardado hay que pasar el documento leído de wifi_scans (con su
+    marca actual), no el de memoria: así un escaneo ya sumado no se cuenta dos veces.
+
+    Args:
+        database (Database): Base de datos de pymongo
+        scans_collection (Collection): Colección wifi_scans
+        documents (list): Documentos de escaneo guardados (con _id)
+
+    Returns:
+        int: Escaneos sumados
+    """
+    documents = [document for document in documents if document.get(PENDING_FIELD)]
+    if not documents:
+        return 0
+
+    update_rollups(database, documents)
+    scans_collection.update_many({"_id": {"$in": [document["_id"] for document in documents]}},
+                                 {"$unset": {PENDING_FIELD: ""}})
+    for document in documents:
+        document.pop(PENDING_FIELD, None)
+    return len(documents)
+
+
+def mark_incomplete(database, scan_ids):
+    """
+    Marca los rollups como incompletos porque no se pudieron sumar escaneos ya guardados.
+
+    Los escaneos conservan PENDING_FIELD y las tendencias vuelven a leer los
+    escaneos completos hasta que rebuild_rollups los incluya. Si hay un recálculo
+    en curso que empezó antes de esos escaneos, se descarta su avance: al
+    terminar no los cubriría.
+
+    Args:
+        database (Database): Base de datos de pymongo
+        scan_ids (list): _id de los escaneos que no se sumaron
+    """
+    progress = database["wifi_migrations"]
+    progress.update_one({"_id": ROLLUPS_STATE_ID}, {"$set": {"complete": False}}, upsert=True)
+    if scan_ids:
+        progress.update_one({"_id": ROLLUPS_STATE_ID, "upto_scan_id": {"$lt": max(scan_ids)}},
+                            {"$unset": {"upto_scan_id": "", "last_scan_id": ""}})
+
+
+def rollups_ready(database, scans_collection):
+    """
+    Indica si los rollups cubren todos los escaneos guardados.
+
+    Si todavía no hay escaneos, los rollups se marcan como completos: a partir
+    de ahí se mantienen al insertar. Con escaneos anteriores hay que ejecutar
+    rebuild_rollups() una vez.
+
+    Args:
+        database (Database): Base de datos de pymongo
+        scans_collection (Collection): Colección wifi_scans
+
+    Returns:
+        bool: True si las tendencias pueden leer los rollups
+    """
+    progress = database["wifi_migrations"]
+    state = progress.find_one({"_id": ROLLUPS_STATE_ID})
+    if state is not None:
+        return bool(state.get("complete"))
+
+    if scans_collection.find_one({}, {"_id": 1}) is None:
+        progress.update_one({"_id": ROLLUPS_STATE_ID}, {"$set": {"complete": True}}, upsert=True)
+        return True
+    return False
+
+
+def rebuild_rollups(database, scans_collection, batch_size=500):
+    """
+    Recalcula los rollups desde wifi_scans.
+
+    Solo se procesan los escaneos que existían al empezar (hasta "upto_scan_id");
+    los posteriores ya se suman al insertarse. El avance se guarda en
+    wifi_migrations (último _id procesado), de modo que se puede interrumpir y
+    reanudar. Mientras no termina, las tendencias siguen leyendo los escaneos
+    completos. Si durante el recálculo falla la suma de un escaneo posterior (ver
+    mark_incomplete), los rollups no se marcan como completos y hay que volver a
+    ejecutarlo.
+
+    Si los escaneos completos expiran (wifi_retention marca "raw_expiry"), los
+    rollups son la única copia de los días ya borrados: solo se recalculan desde
+    el primer día completo que todavía tiene escaneos ("from_time").
+
+    Args:
+        database (Database): Base de datos de pymongo
+        scans_collection (Collection): Colección wifi_scans
+        batch_size (int): Escaneos por lote
+
+    Returns:
+        int: Número de escaneos procesados
+    """
+    progress = database["wifi_migrations"]
+    state = progress.find_one({"_id": ROLLUPS_STATE_ID}) or {}
+
+    if state.get("upto_scan_id") is None:
+        # Empezar de cero: los rollups parciales se descartan (salvo los de días ya expirados)
+        from_time = None
+        if state.get("raw_expiry"):
+            oldest = scans_collection.find_one({}, {"timestamp": 1}, sort=[("timestamp", pymongo.ASCENDING)])
+            if oldest:
+                from_time = bucket_start(oldest["timestamp"], "day") + timedelta(days=1)
+        discard = {"t": {"$gte": from_time}} if from_time else {}
+        database[MONGO_ROLLUPS_COLLECTION].delete_many(discard)
+        database[MONGO_BSSID_ROLLUPS_COLLECTION].delete_many(discard)
+        latest = scans_collection.find_one({}, {"_id": 1}, sort=[("_id", pymongo.DESCENDING)])
+        state = {"upto_scan_id": latest["_id"] if latest else None, "last_scan_id": None, "from_time": from_time}
+        progress.update_one({"_id": ROLLUPS_STATE_ID},
+                            {"$set": {"complete": False, "upto_scan_id": state["upto_scan_id"],
+                                      "last_scan_id": None, "from_time": from_time}},
+                            upsert=True)
+
+    # Las actualizaciones del estado solo valen mientras mark_incomplete no descarte este recálculo
+    run = {"_id": ROLLUPS_STATE_ID, "upto_scan_id": state["upto_scan_id"]}
+
+    query = {"_id": {"$lte": state["upto_scan_id"]}} if state["upto_scan_id"] else {"_id": None}
+    if state.get("last_scan_id"):
+        query["_id"]["$gt"] = state["last_scan_id"]
+    if state.get("from_time"):
+        query["timestamp"] = {"$gte": state["from_time"]}
+
+    total_scans = scans_collection.count_documents(query)
+    print(f"Recalculando rollups de {total_scans} escaneos...")
+
+    cursor = scans_collection.find(query, {"timestamp": 1, "networks": 1}).sort("_id", pymongo.ASCENDING).batch_size(batch_size)
+    processed = 0
+    pending = []
+
+    def clear_pending(documents):
+        # Los escaneos recalculados ya no están pendientes (ver apply_rollups)
+        scans_collection.update_many({"_id": {"$in": [document["_id"] for document in documents]},
+                                      PENDING_FIELD: True}, {"$unset": {PENDING_FIELD: ""}})
+
+    for document in cursor:
+        pending.append(document)
+        if len(pending) >= batch_size:
+            update_rollups(database, pending)
+            clear_pending(pending)
+            progress.update_one(run, {"$set": {"last_scan_id": pending[-1]["_id"]}})
+            processed += len(pending)
+            pending = []
+            print(f"  {processed}/{total_scans} escaneos procesados")
+
+    if pending:
+        update_rollups(database, pending)
+        clear_pending(pending)
+        processed += len(pending)
+
+    result = progress.update_one(run, {"$set": {"complete": True},
+                                       "$unset": {"last_scan_id": "", "upto_scan_id": "", "from_time": ""}})
+    if not result.matched_count:
+        print(f"Rollups recalculados: {processed} escaneos, pero no se pudieron sumar escaneos guardados "
+              f"durante el recálculo. Vuelva a ejecutar 'wifi_analyzer.py --use-mongodb --rebuild-rollups'.")
+        return processed
+    print(f"Rollups recalculados: {processed} escaneos")
+    return processed
+
+
+def get_band_series(database, start_time, end_time, granularity=None):
+    """
+    Devuelve la serie de redes por banda y ocupación de canales.
+
+    Los valores son promedios por escaneo dentro de cada bucket.
+
+    Args:
+        database (Database): Base de datos de pymongo
+        start_time (datetime): Tiempo de inicio
+        end_time (datetime): Tiempo de fin
+        granularity (str, optional): Si es None, se elige según el período
+
+    Returns:
+        list: [{"timestamp", "scans", "total", "total_min", "total_max", "count_2g",
+               "count_5g", "channels_2g": {canal: media}, "channels_5g": {...}}]
+    """
+    granularity = granularity or choose_granularity(start_time, end_time)
+    query = {"g": granularity, "t": {"$gte": bucket_start(start_time, granularity), "$lte": end_time}}
+
+    series = []
+    for bucket in database[MONGO_ROLLUPS_COLLECTION].find(query).sort("t", pymongo.ASCENDING):
+        scans = bucket["scans"]
+        series.append({
+            "timestamp": bucket["t"],
+            "scans": scans,
+            "total": bucket["networks_sum"] / scans,
+            "total_min": bucket["networks_min"],
+            "total_max": bucket["networks_max"],
+            "count_2g": bucket["count_2g_sum"] / scans,
+            "count_5g": bucket["count_5g_sum"] / scans,
+            "channels_2g": {int(ch): count / scans for ch, count in bucket.get("channels_2g", {}).items()},
+            "channels_5g": {int(ch): count / scans for ch, count in bucket.get("channels_5g", {}).items()},
+        })
+    return series
+
+
+def get_bssid_series(database, start_time, end_time, essid=None, mac=None, granularity=None):
+    """
+    Devuelve la serie de señal de una red (por BSSID) desde los rollups.
+
+    Usa el mismo formato que WiFiDB.get_network_history ({"timestamp", "network"}),
+    con "signal" como media del bucket y además "signal_min", "signal_max" y "samples".
+
+    Args:
+        database (Database): Base de datos de pymongo
+        start_time (datetime): Tiempo de inicio
+        end_time (datetime): Tiempo de fin
+        essid (str, optional): ESSID de la red
+        mac (str, optional): Dirección MAC (BSSID) de la red
+        granularity (str, optional): Si es None, se elige según el período
+
+    Returns:
+        list: Historial de la red ordenado por tiempo
+    """
+    granularity = granularity or choose_granularity(start_time, end_time)
+    query = {"g": granularity, "t": {"$gte": bucket_start(start_time, granularity), "$lte": end_time}}
+    if mac:
+        query["bssid"] = mac
+    if essid:
+        query["essid"] = essid
+
+    history = []
+    for bucket in database[MONGO_BSSID_ROLLUPS_COLLECTION].find(query).sort("t", pymongo.ASCENDING):
+        history.append({
+            "timestamp": bucket["t"],
+            "network": {
+                "mac": bucket["bssid"],
+                "essid": bucket.get("essid"),
+                "channel": bucket.get("channel"),
+                "signal": bucket["signal_sum"] / bucket["n"],
+                "signal_min": bucket["signal_min"],
+                "signal_max": bucket["signal_max"],
+                "samples": bucket["n"],
+            }
+        })
+    return history
+
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Helper persistente de escaneo WiFi para Raspberry Pi
+Este proceso se inicia una sola vez con privilegios (sudo o systemd), es dueño
+de la interfaz WiFi y atiende peticiones de escaneo por un socket Unix. Así
+wifi_scanner, continuous_scan y /api/scan evitan lanzar sudo en cada escaneo.
+
+Protocolo: una línea JSON por petición ({"cmd": "scan" | "test" | "ping"}) y
+una línea JSON por respuesta ({"success": bool, ...}).
+"""
+
+import argparse
+import grp
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+import wifi_backends
+
+
+class ScanRequestHandler(socketserver.StreamRequestHandler):
+    """Atiende una petición JSON por conexión"""
+
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+            command = request.get("cmd")
+        except (ValueError, AttributeError):
+            self._reply({"success": False, "message": "Petición inválida"})
+            return
+
+        if command == "ping":
+            self._reply({"success": True, "backend": self.server.backend.name})
+        elif command == "test":
+            with self.server.scan_lock:
+                ok = self.server.backend.test_scan()
+            self._reply({"success": ok, "backend": self.server.backend.name})
+        elif command == "scan":
+            self._reply(self.server.scan())
+        else:
+            self._reply({"success": False, "message": f"Comando desconocido: {command}"})
+
+    def _reply(self, response):
+        self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+class ScanHelperServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Servidor del helper; serializa el acceso a la radio con un lock"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, backend):
+        """
+        Inicializa el servidor.
+
+        Args:
+            socket_path (str): Ruta del socket Unix
+            backend (ScanBackend): Backend que realiza los escaneos
+        """
+        self.backend = backend
+        self.scan_lock = threading.Lock()
+        self.scan_count = 0
+        super().__init__(socket_path, ScanRequestHandler)
+
+    def scan(self):
+        """
+        Realiza un escaneo con el backend (de a uno por vez).
+
+        Returns:
+            dict: Respuesta con las redes encontradas
+        """
+        with self.scan_lock:
+            start = time.monotonic()
+            try:
+                networks = self.backend.scan()
+            except Exception as e:
+                print(f"Error inesperado en el helper de escaneo: {e}")
+                return {"success": False, "message": str(e)}
+            self.scan_count += 1
+            elapsed = time.monotonic() - start
+
+        print(f"Escaneo #{self.scan_count}: {len(networks)} redes en {elapsed:.2f}s")
+        return {"success": True, "networks": networks, "elapsed": elapsed}
+
+
+def create_backend(name, interface, fixture_files=None):
+    """
+    Crea el backend que usará el helper.
+
+    Args:
+        name (str): Nombre del backend ('iwlist' o 'iw')
+        interface (str): Nombre de la interfaz WiFi
+        fixture_files (list, optional): Si se indica, se usa una interfaz simulada
+            que reproduce estos archivos
+
+    Returns:
+        ScanBackend: Instancia del backend
+    """
+    if fixture_files:
+        return wifi_backends.FixtureBackend(interface, fixture_files)
+
+    # Como root no hace falta sudo; el estado de la interfaz se consulta en sysfs
+    use_sudo = os.geteuid() != 0
+    if name == 'iw':
+        return wifi_backends.IwBackend(interface, use_sudo=use_sudo)
+    return wifi_backends.IwlistBackend(interface, use_sudo=use_sudo, check_link=False)
+
+
+def _handle_sigterm(signum, frame):
+    """Convierte SIGTERM (systemctl stop) en una interrupción ordenada."""
+    raise KeyboardInterrupt
+
+
+def serve(socket_path, backend, group=None):
+    """
+    Crea el socket y atiende peticiones hasta recibir una interrupción.
+
+    Args:
+        socket_path (str): Ruta del socket Unix
+        backend (ScanBackend): Backend que realiza los escaneos
+        group (str, optional): Grupo al que se le da acceso al socket
+    """
+    os.makedirs(os.path.dirname(socket_path) or '.', exist_ok=True)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    server = ScanHelperServer(socket_path, backend)
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+    try:
+        # Solo el dueño y el grupo indicado pueden pedir escaneos
+        if group:
+            os.chown(socket_path, -1, grp.getgrnam(group).gr_gid)
+        os.chmod(socket_path, 0o660)
+
+        print(f"Helper de escaneo ({backend.name}, {backend.interface}) escuchando en {socket_path}")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nHelper de escaneo detenido.")
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Helper persistente de escaneo WiFi')
+
+    parser.add_argument('--socket', type=str, default=wifi_backends.DEFAULT_HELPER_SOCKET,
+                        help='Ruta del socket Unix')
+    parser.add_argument('--backend', type=str, choices=['iwlist', 'iw'], default='iwlist',
+                        help='Backend de escaneo usado por el helper')
+    parser.add_argument('--interface', type=str, default=wifi_backends.DEFAULT_INTERFACE,
+                        help='Interfaz WiFi')
+    parser.add_argument('--group', type=str, help='Grupo con permiso para usar el socket (p. ej. pi)')
+    parser.add_argument('--fake', type=str, nargs='+', metavar='ARCHIVO',
+                        help='Interfaz simulada: reproduce salidas grabadas de iwlist/iw (ver fixtures/)')
+
+    args = parser.parse_args()
+
+    backend = create_backend(args.backend, args.interface, args.fake)
+    serve(args.socket, backend, args.group)
+
+
+if __name__ == "__main__":
+    main()
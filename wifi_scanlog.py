@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Registro binario de escaneos en disco para WiFi Analyzer
+Reemplaza el archivo JSON indentado por escaneo con segmentos de solo anexado.
+Cada segmento tiene dos archivos:
+
+    scans_<fecha>.wsl   Bloques de registros de escaneo (opcionalmente comprimidos)
+    scans_<fecha>.idx   Índice temporal de los bloques y diccionario de redes
+
+Dentro de un segmento, los atributos estables de cada red (MAC, ESSID, canal,
+frecuencia, cifrado, IE) se guardan una sola vez en el diccionario con un ID
+entero; cada escaneo solo guarda, por red, el ID, la señal (int8), la calidad y
+la señal suavizada. Las distancias se recalculan al leer. Los segmentos rotan
+por antigüedad o tamaño y se borran enteros al superar la retención.
+
+Formato de un bloque en el .wsl:
+    cabecera BLOCK_HEADER (primer y último timestamp en µs, escaneos, bytes sin
+    comprimir, bytes guardados) + carga con los registros, cada uno precedido
+    por su longitud (uint32).
+
+Formato del .idx (solo anexado): entradas tipo + longitud + datos:
+    'D' descriptor de red (ID uint16 + JSON de sus atributos estables)
+    'B' bloque (desplazamiento en el .wsl + BLOCK_HEADER)
+"""
+
+import gzip
+import json
+import os
+import struct
+from datetime import datetime, timedelta
+
+import wifi_scanner
+
+# zstd es opcional: comprime mejor y más rápido que gzip, pero no está en la biblioteca estándar
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Directorio predeterminado del registro
+SCANLOG_DIR = os.environ.get('WIFI_SCANLOG_DIR', 'wifi_scanlog')
+
+# Códecs de los bloques
+CODECS = ('none', 'gzip', 'zstd')
+CODEC_IDS = {codec: i for i, codec in enumerate(CODECS)}
+
+# Escaneos por bloque: sin compresión cada escaneo se escribe al llegar; comprimido
+# se acumulan para que el compresor aproveche la repetición entre escaneos
+DEFAULT_BLOCK_SCANS = {'none': 1, 'gzip': 60, 'zstd': 60}
+
+# Rotación y retención de segmentos
+ROTATE_SECONDS = 24 * 3600
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+RETENTION_DAYS = 90
+
+SEGMENT_MAGIC = b'WSL1'
+SEGMENT_PREFIX = 'scans_'
+SEGMENT_TIME_FORMAT = '%Y%m%d_%H%M%S_%f'   # primer escaneo del segmento
+DATA_EXT = '.wsl'
+INDEX_EXT = '.idx'
+
+BLOCK_HEADER = struct.Struct('<qqIII')      # primer ts, último ts, escaneos, bytes crudos, bytes guardados
+INDEX_ENTRY = struct.Struct('<cI')          # tipo, longitud de los datos
+BLOCK_ENTRY = struct.Struct('<Q')           # desplazamiento del bloque en el .wsl
+DESCRIPTOR_ID = struct.Struct('<H')
+RECORD_LENGTH = struct.Struct('<I')
+SCAN_HEADER = struct.Struct('<qHH')         # timestamp en µs, redes, bytes de metadatos
+NETWORK_ENTRY = struct.Struct('<HbHh')      # descriptor, señal, calidad (centésimas de %), suavizada (décimas)
+
+# Campos que cambian en cada escaneo; el resto de la red se guarda en el descriptor
+SCAN_FIELDS = ('signal', 'quality', 'distance', 'signal_smoothed', 'distance_smoothed')
+
+# Valores que marcan un campo ausente
+NO_SIGNAL = -128
+NO_QUALITY = 0xFFFF
+NO_SMOOTHED = -0x8000
+
+# Descriptores a partir de los cuales se rota el segmento (los ID son uint16; el margen
+# deja lugar a las redes nuevas de un bloque en curso)
+MAX_DESCRIPTORS = 0xFFFF - 1024
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_micros(timestamp):
+    """Convierte un datetime sin zona horaria (como se guarda en MongoDB) a µs desde epoch."""
+    return (timestamp - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros):
+    """Convierte µs desde epoch a datetime sin zona horaria."""
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def _compress(codec, payload):
+    """Comprime la carga de un bloque."""
+    if codec == 'gzip':
+        return gzip.compress(payload, compresslevel=6, mtime=0)
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(payload)
+    return payload
+
+
+def _decompress(codec, payload):
+    """Descomprime la carga de un bloque."""
+    if codec == 'gzip':
+        return gzip.decompress(payload)
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return payload
+
+
+def _segment_start(name):
+    """Timestamp del primer escaneo de un segmento, según su nombre."""
+    return datetime.strptime(name[len(SEGMENT_PREFIX):], SEGMENT_TIME_FORMAT)
+
+
+def _clamp(value, lowest, highest):
+    """Limita un valor al rango de su campo binario."""
+    return max(lowest, min(highest, value))
+
+
+def encode_scan(networks, timestamp, metadata, intern):
+    """
+    Codifica un escaneo como registro binario.
+
+    Args:
+        networks (list): Redes del escaneo
+        timestamp (datetime): Momento del escaneo
+        metadata (dict, optional): Metadatos (se guardan como JSON)
+        intern (callable): intern(atributos) devuelve el ID del descriptor de la red
+
+    Returns:
+        bytes: Registro (sin el prefijo de longitud)
+    """
+    meta = json.dumps(metadata, separators=(',', ':'), default=str).encode('utf-8') if metadata else b''
+    parts = [SCAN_HEADER.pack(to_micros(timestamp), len(networks), len(meta)), meta]
+    for network in networks:
+        attributes = {key: value for key, value in network.items() if key not in SCAN_FIELDS}
+        signal = network.get('signal')
+        quality = network.get('quality')
+        smoothed = network.get('signal_smoothed')
+        parts.append(NETWORK_ENTRY.pack(
+            intern(attributes),
+            NO_SIGNAL if signal is None else _clamp(int(round(signal)), -127, 127),
+            NO_QUALITY if quality is None else _clamp(int(round(quality * 100)), 0, NO_QUALITY - 1),
+            NO_SMOOTHED if smoothed is None else _clamp(int(round(smoothed * 10)), -0x7FFF, 0x7FFF),
+        ))
+    return b''.join(parts)
+
+
+def decode_scan(record, descriptors):
+    """
+    Decodifica un registro de encode_scan.
+
+    Args:
+        record (bytes|memoryview): Registro
+        descriptors (dict): ID -> atributos estables de la red
+
+    Returns:
+        dict: {"timestamp", "networks", "total_networks"} y "metadata" si tiene
+    """
+    micros, count, meta_length = SCAN_HEADER.unpack_from(record, 0)
+    offset = SCAN_HEADER.size
+    scan = {"timestamp": from_micros(micros)}
+    if meta_length:
+        scan["metadata"] = json.loads(bytes(record[offset:offset + meta_length]).decode('utf-8'))
+    offset += meta_length
+
+    networks = []
+    for descriptor, signal, quality, smoothed in NETWORK_ENTRY.iter_unpack(
+            record[offset:offset + count * NETWORK_ENTRY.size]):
+        network = dict(descriptors[descriptor])
+        if signal != NO_SIGNAL:
+            network['signal'] = signal
+            network['distance'] = wifi_scanner.calculate_distance(signal)
+        if quality != NO_QUALITY:
+            network['quality'] = quality / 100
+        if smoothed != NO_SMOOTHED:
+            network['signal_smoothed'] = smoothed / 10
+            network['distance_smoothed'] = wifi_scanner.calculate_distance(smoothed / 10)
+        networks.append(network)
+
+    scan["networks"] = networks
+    scan["total_networks"] = count
+    return scan
+
+
+def record_entries(record):
+    """
+    Separa un registro en su timestamp y las entradas por red, sin decodificarlas.
+
+    Args:
+        record (bytes|memoryview): Registro de encode_scan
+
+    Returns:
+        tuple: (µs desde epoch, memoryview con count entradas NETWORK_ENTRY)
+    """
+    micros, count, meta_length = SCAN_HEADER.unpack_from(record, 0)
+    offset = SCAN_HEADER.size + meta_length
+    return micros, record[offset:offset + count * NETWORK_ENTRY.size]
+
+
+class Segment:
+    """
+    Un segmento del registro: su índice de bloques y su diccionario de redes.
+    """
+
+    def __init__(self, base_path):
+        """
+        Args:
+            base_path (str): Ruta sin extensión (directorio/scans_<fecha>)
+        """
+        self.base_path = base_path
+        self.data_path = base_path + DATA_EXT
+        self.index_path = base_path + INDEX_EXT
+        self.codec = 'none'
+        self.descriptors = {}
+        self.blocks = []        # [(desplazamiento, primer ts, último ts, escaneos, crudos, guardados)]
+        self.index_bytes = 0    # bytes válidos del .idx (una entrada a medias se descarta)
+        self._load()
+
+    def _load(self):
+        """
+        Lee la cabecera del .wsl y las entradas completas del .idx.
+
+        Los bloques del índice que terminan después del final del .wsl (su entrada
+        llegó al disco y los datos no, p. ej. por un corte de luz) se descartan
+        junto con lo que les sigue en el índice.
+        """
+        data_size = 0
+        if os.path.exists(self.data_path):
+            data_size = os.path.getsize(self.data_path)
+            with open(self.data_path, 'rb') as f:
+                header = f.read(len(SEGMENT_MAGIC) + 1)
+            if len(header) == len(SEGMENT_MAGIC) + 1 and header.startswith(SEGMENT_MAGIC):
+                self.codec = CODECS[header[-1]]
+
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'rb') as f:
+            index = f.read()
+
+        offset = 0
+        while offset + INDEX_ENTRY.size <= len(index):
+            kind, length = INDEX_ENTRY.unpack_from(index, offset)
+            start = offset + INDEX_ENTRY.size
+            if start + length > len(index):
+                break
+            entry = index[start:start + length]
+            if kind == b'D':
+                (descriptor,) = DESCRIPTOR_ID.unpack_from(entry)
+                self.descriptors[descriptor] = json.loads(entry[DESCRIPTOR_ID.size:].decode('utf-8'))
+            elif kind == b'B':
+                (block_offset,) = BLOCK_ENTRY.unpack_from(entry)
+                block = (block_offset,) + BLOCK_HEADER.unpack_from(entry, BLOCK_ENTRY.size)
+                if block_offset + BLOCK_HEADER.size + block[-1] > data_size:
+                    print(f"Advertencia: {self.data_path} termina antes del bloque en {block_offset}; "
+                          f"se descartan ese bloque y los siguientes")
+                    break
+                self.blocks.append(block)
+            offset = start + length
+        self.index_bytes = offset
+
+    @property
+    def first_timestamp(self):
+        return from_micros(self.blocks[0][1]) if self.blocks else None
+
+    @property
+    def last_timestamp(self):
+        return from_micros(self.blocks[-1][2]) if self.blocks else None
+
+    def data_end(self):
+        """Fin del último bloque indexado (lo que haya después es un bloque sin confirmar)."""
+        if not self.blocks:
+            return len(SEGMENT_MAGIC) + 1
+        offset, _, _, _, _, stored = self.blocks[-1]
+        return offset + BLOCK_HEADER.size + stored
+
+    def iter_records(self, start_us=None, end_us=None):
+        """
+        Recorre los registros crudos del segmento entre dos timestamps (µs, inclusivos).
+
+        Solo se leen los bloques cuyo rango temporal se cruza con el pedido.
+
+        Yields:
+            memoryview: Registro de encode_scan (ver decode_scan y record_entries)
+        """
+        blocks = [block for block in self.blocks
+                  if (start_us is None or block[2] >= start_us) and (end_us is None or block[1] <= end_us)]
+        if not blocks:
+            return
+
+        with open(self.data_path, 'rb') as f:
+            for offset, first, last, count, raw_length, stored in blocks:
+                f.seek(offset + BLOCK_HEADER.size)
+                payload = memoryview(_decompress(self.codec, f.read(stored)))
+                position = 0
+                for _ in range(count):
+                    (length,) = RECORD_LENGTH.unpack_from(payload, position)
+                    position += RECORD_LENGTH.size
+                    record = payload[position:position + length]
+                    position += length
+                    (micros,) = struct.unpack_from('<q', record, 0)
+                    if (start_us is not None and micros < start_us) or (end_us is not None and micros > end_us):
+                        continue
+                    yield record
+
+    def iter_scans(self, start_us=None, end_us=None):
+        """Recorre los escaneos decodificados del segmento entre dos timestamps (µs, inclusivos)."""
+        for record in self.iter_records(start_us, end_us):
+            yield decode_scan(record, self.descriptors)
+
+    def delete(self):
+        """Borra los archivos del segmento."""
+        for path in (self.data_path, self.index_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class ScanLog:
+    """
+    Registro de escaneos segmentado, de solo anexado.
+
+    Un solo proceso escribe (append); cualquier número de procesos puede leer
+    (iter_scans), ya que un bloque solo es visible cuando su entrada del índice
+    está completa.
+    """
+
+    def __init__(self, directory=SCANLOG_DIR, codec='none', block_scans=None, rotate_seconds=ROTATE_SECONDS,
+                 max_segment_bytes=MAX_SEGMENT_BYTES, retention_days=RETENTION_DAYS, fsync=False):
+        """
+        Args:
+            directory (str): Directorio de los segmentos (se crea si no existe)
+            codec (str): 'none', 'gzip' o 'zstd' (requiere el paquete zstandard)
+            block_scans (int, optional): Escaneos por bloque; por defecto, DEFAULT_BLOCK_SCANS[codec]
+            rotate_seconds (float): Antigüedad máxima de un segmento antes de abrir otro
+            max_segment_bytes (int): Tamaño máximo de un segmento antes de abrir otro
+            retention_days (float): Días que se conservan los segmentos (0 los conserva siempre)
+            fsync (bool): Si es True, también sincroniza el índice tras cada bloque (los
+                datos de cada bloque se sincronizan siempre antes de indexarlos)
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Códec desconocido: {codec} (opciones: {', '.join(CODECS)})")
+        if codec == 'zstd' and not ZSTD_AVAILABLE:
+            raise ValueError("El códec zstd requiere el paquete zstandard (pip install zstandard)")
+
+        self.directory = directory
+        self.codec = codec
+        self.block_scans = block_scans or DEFAULT_BLOCK_SCANS[codec]
+        self.rotate_seconds = rotate_seconds
+        self.max_segment_bytes = max_segment_bytes
+        self.retention_days = retention_days
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        self._segment = None
+        self._data = None
+        self._index = None
+        self._interned = {}
+        self._new_descriptors = []
+        self._pending = []
+        self._pending_range = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def segment_names(self):
+        """Nombres (sin extensión) de los segmentos, del más antiguo al más reciente."""
+        return sorted(name[:-len(DATA_EXT)] for name in os.listdir(self.directory)
+                      if name.startswith(SEGMENT_PREFIX) and name.endswith(DATA_EXT))
+
+    def segments(self):
+        """Devuelve los segmentos del directorio (con su índice cargado), del más antiguo al más reciente."""
+        return [Segment(os.path.join(self.directory, name)) for name in self.segment_names()]
+
+    def _open_segment(self, timestamp):
+        """Abre para anexar el último segmento o crea uno nuevo si corresponde rotar."""
+        segments = self.segments()
+        segment = segments[-1] if segments else None
+        if segment is not None and (segment.codec != self.codec
+                                    or self._segment_full(segment, timestamp, segment.data_end())):
+            segment = None
+
+        if segment is None:
+            name = SEGMENT_PREFIX + timestamp.strftime(SEGMENT_TIME_FORMAT)
+            segment = Segment(os.path.join(self.directory, name))
+            with open(segment.data_path, 'wb') as f:
+                f.write(SEGMENT_MAGIC + bytes([CODEC_IDS[self.codec]]))
+            open(segment.index_path, 'wb').close()
+            self.apply_retention(timestamp)
+
+        # Descartar lo que un cierre abrupto dejó sin indexar (solo se acorta: extender
+        # el archivo rellenaría con ceros un bloque que no llegó al disco)
+        self._data = open(segment.data_path, 'r+b')
+        if os.path.getsize(segment.data_path) > segment.data_end():
+            self._data.truncate(segment.data_end())
+        self._data.seek(0, os.SEEK_END)
+        self._index = open(segment.index_path, 'r+b')
+        self._index.truncate(segment.index_bytes)
+        self._index.seek(0, os.SEEK_END)
+
+        self._segment = segment
+        self._interned = {json.dumps(attributes, sort_keys=True, separators=(',', ':')): descriptor
+                          for descriptor, attributes in segment.descriptors.items()}
+
+    def _close_segment(self):
+        for f in (self._data, self._index):
+            if f:
+                f.close()
+        self._segment = self._data = self._index = None
+
+    def _intern(self, attributes):
+        """Devuelve el ID del descriptor de una red, creándolo si es nuevo en el segmento."""
+        key = json.dumps(attributes, sort_keys=True, separators=(',', ':'), default=str)
+        descriptor = self._interned.get(key)
+        if descriptor is None:
+            descriptor = self._interned[key] = len(self._interned)
+            self._segment.descriptors[descriptor] = json.loads(key)
+            self._new_descriptors.append((descriptor, key))
+        return descriptor
+
+    def _segment_full(self, segment, timestamp, size):
+        """Indica si hay que rotar el segmento por antigüedad, tamaño o descriptores."""
+        return bool(segment.blocks) and (
+            (timestamp - segment.first_timestamp).total_seconds() >= self.rotate_seconds
+            or size >= self.max_segment_bytes
+            or len(segment.descriptors) >= MAX_DESCRIPTORS)
+
+    def append(self, networks, timestamp=None, metadata=None):
+        """
+        Añade un escaneo al registro.
+
+        Con un códec de compresión el escaneo queda en memoria hasta completar el
+        bloque (block_scans) o hasta flush()/close().
+
+        Args:
+            networks (list): Redes del escaneo
+            timestamp (datetime, optional): Momento del escaneo. Si es None, se usa el actual.
+            metadata (dict, optional): Metadatos del escaneo
+
+        Returns:
+            datetime: Timestamp del escaneo
+        """
+        if timestamp is None:
+            timestamp = datetime.now()
+
+        if self._segment is None:
+            self._open_segment(timestamp)
+        elif not self._pending and self._segment_full(self._segment, timestamp, self._data.tell()):
+            self._close_segment()
+            self._open_segment(timestamp)
+
+        record = encode_scan(networks, timestamp, metadata, self._intern)
+        self._pending.append(RECORD_LENGTH.pack(len(record)) + record)
+        micros = to_micros(timestamp)
+        if self._pending_range is None:
+            self._pending_range = [micros, micros]
+        else:
+            self._pending_range[0] = min(self._pending_range[0], micros)
+            self._pending_range[1] = max(self._pending_range[1], micros)
+
+        if len(self._pending) >= self.block_scans:
+            self.flush()
+        return timestamp
+
+    def flush(self):
+        """
+        Escribe los escaneos pendientes como un bloque y lo publica en el índice.
+
+        Returns:
+            int: Escaneos escritos
+        """
+        if not self._pending:
+            return 0
+
+        payload = b''.join(self._pending)
+        stored = _compress(self.codec, payload)
+        first, last = self._pending_range
+        header = BLOCK_HEADER.pack(first, last, len(self._pending), len(payload), len(stored))
+        offset = self._data.tell()
+        self._data.write(header + stored)
+        self._data.flush()
+        # Los datos llegan al disco antes que la entrada del índice que los publica:
+        # tras un corte de luz el índice nunca apunta a un bloque sin datos
+        os.fsync(self._data.fileno())
+
+        # Los descriptores nuevos van antes que la entrada del bloque que los usa
+        entries = []
+        for descriptor, key in self._new_descriptors:
+            data = DESCRIPTOR_ID.pack(descriptor) + key.encode('utf-8')
+            entries.append(INDEX_ENTRY.pack(b'D', len(data)) + data)
+        data = BLOCK_ENTRY.pack(offset) + header
+        entries.append(INDEX_ENTRY.pack(b'B', len(data)) + data)
+        self._index.write(b''.join(entries))
+        self._index.flush()
+        if self.fsync:
+            os.fsync(self._index.fileno())
+
+        self._segment.blocks.append((offset, first, last, len(self._pending), len(payload), len(stored)))
+        self._segment.index_bytes = self._index.tell()
+        written = len(self._pending)
+        self._pending = []
+        self._pending_range = None
+        self._new_descriptors = []
+        return written
+
+    def close(self):
+        """Escribe los escaneos pendientes y cierra el segmento abierto."""
+        if self._segment is not None:
+            self.flush()
+        self._close_segment()
+
+    def iter_scans(self, start_time=None, end_time=None):
+        """
+        Recorre los escaneos entre dos fechas en orden cronológico.
+
+        Solo se abren los segmentos y bloques cuyo rango temporal se cruza con el
+        pedido (según el índice). Los escaneos aún en memoria no se incluyen.
+
+        Args:
+            start_time (datetime, optional): Fecha de inicio (inclusiva)
+            end_time (datetime, optional): Fecha de fin (inclusiva)
+
+        Yields:
+            dict: {"timestamp", "networks", "total_networks"} y "metadata" si tiene
+        """
+        start_us = to_micros(start_time) if start_time else None
+        end_us = to_micros(end_time) if end_time else None
+        names = self.segment_names()
+        for i, name in enumerate(names):
+            # El nombre del siguiente segmento es su primer escaneo: si ya es anterior al
+            # inicio pedido, este segmento entero también lo es y no hace falta leer su índice
+            if start_time and i + 1 < len(names) and _segment_start(names[i + 1]) <= start_time:
+                continue
+            segment = Segment(os.path.join(self.directory, name))
+            if not segment.blocks:
+                continue
+            if start_us is not None and segment.blocks[-1][2] < start_us:
+                continue
+            if end_us is not None and segment.blocks[0][1] > end_us:
+                break
+            yield from segment.iter_scans(start_us, end_us)
+
+    def latest_scan(self):
+        """
+        Devuelve el último escaneo escrito (lee solo el último bloque).
+
+        Returns:
+            dict: Escaneo o None si el registro está vacío
+        """
+        for name in reversed(self.segment_names()):
+            segment = Segment(os.path.join(self.directory, name))
+            if segment.blocks:
+                last_us = segment.blocks[-1][2]
+                latest = None
+                for scan in segment.iter_scans(last_us, last_us):
+                    latest = scan
+                return latest
+        return None
+
+    def apply_retention(self, now=None):
+        """
+        Borra los segmentos cuyo último escaneo supera la retención.
+
+        Args:
+            now (datetime, optional): Fecha de referencia; por defecto, la actual
+
+        Returns:
+            int: Segmentos borrados
+        """
+        if not self.retention_days:
+            return 0
+        cutoff = (now or datetime.now()) - timedelta(days=self.retention_days)
+        removed = 0
+        for segment in self.segments():
+            if self._segment is not None and segment.base_path == self._segment.base_path:
+                continue
+            if segment.blocks and segment.last_timestamp < cutoff:
+                segment.delete()
+                removed += 1
+        return removed
+
+    def stats(self):
+        """Devuelve segmentos, bloques, escaneos y bytes del registro."""
+        segments = self.segments()
+        return {
+            "segments": len(segments),
+            "blocks": sum(len(segment.blocks) for segment in segments),
+            "scans": sum(block[3] for segment in segments for block in segment.blocks),
+            "bytes": sum(os.path.getsize(path) for segment in segments
+                         for path in (segment.data_path, segment.index_path) if os.path.exists(path)),
+        }
+
+
+def export_json(scanlog, directory='.', start_time=None, end_time=None):
+    """
+    Exporta escaneos del registro como archivos wifi_scan_<fecha>.json (formato original).
+
+    Args:
+        scanlog (ScanLog): Registro a exportar
+        directory (str): Directorio de salida
+        start_time (datetime, optional): Fecha de inicio
+        end_time (datetime, optional): Fecha de fin
+
+    Returns:
+        int: Archivos escritos
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for scan in scanlog.iter_scans(start_time, end_time):
+        filename = os.path.join(directory, f"wifi_scan_{scan['timestamp'].strftime('%Y%m%d_%H%M%S')}.json")
+        wifi_scanner.save_scan_results(scan["networks"], filename)
+        written += 1
+    return written
@@ -7,13 +7,12 @@ Este script escanea redes WiFi en las bandas de 2.4GHz y 5GHz,
 calcula distancias estimadas basadas en RSSI y genera gráficos.
 """
 
-import subprocess
-import re
 import math
 import json
 import time
 import os
 from datetime import datetime
+import wifi_backends
 
 # Constantes para el cálculo de distancia
 TX_POWER = -40  # dBm (potencia de transmisión típica a 1 metro)
@@ -44,114 +43,34 @@ def calculate_distance(rssi):
         print(f"Error al calcular distancia: {e}")
         return None
 
-def scan_wifi():
+def scan_wifi(backend=None):
     """
-    Escanea redes WiFi usando iwlist y devuelve los resultados procesados.
+    Escanea redes WiFi con el backend indicado y devuelve los resultados procesados.
+
+    Args:
+        backend (str|ScanBackend, optional): Nombre del backend ('iwlist' o 'iw') o
+            instancia. Si es None, se usa wifi_backends.DEFAULT_BACKEND.
 
     Returns:
         list: Lista de diccionarios con información de cada red WiFi
     """
     try:
-        # Verificar el estado de la interfaz antes del escaneo
-        print("Verificando estado de la interfaz wlan0 antes del escaneo...")
-        link_check = subprocess.run(["ip", "link", "show", "wlan0"],
-                                  capture_output=True, text=True, check=True)
-        print(f"Estado de la interfaz:\n{link_check.stdout}")
-
-        # Intentar reiniciar la interfaz si está caída
-        if "state DOWN" in link_check.stdout:
-            print("La interfaz está caída, intentando reiniciarla...")
-            subprocess.run(["sudo", "ip", "link", "set", "wlan0", "down"], check=True)
-            time.sleep(1)
-            subprocess.run(["sudo", "ip", "link", "set", "wlan0", "up"], check=True)
-            time.sleep(3)
-
-        # Ejecutar el comando de escaneo con timeout
-        print("Ejecutando comando de escaneo...")
-        try:
-            result = subprocess.run(["sudo", "iwlist", "wlan0", "scan"],
-                                  capture_output=True, text=True, check=True, timeout=15)
-
-            # Verificar si hay algún mensaje de error en la salida
-            if "Interface doesn't support scanning" in result.stdout:
-                print(f"Error en la salida del escaneo: {result.stdout}")
-                return []
-
-            print("Escaneo completado con éxito.")
-
-            # Procesar la salida
-            scan_output = result.stdout
-            networks = []
-
-            # Patrones para extraer información
-            cell_pattern = r'Cell \d+ - Address: ([0-9A-F:]+)'
-            essid_pattern = r'ESSID:"([^"]*)"'
-            channel_pattern = r'Channel:(\d+)'
-            frequency_pattern = r'Frequency:([\d.]+) GHz'
-            signal_pattern = r'Signal level=(-\d+) dBm'
-            quality_pattern = r'Quality=(\d+)/(\d+)'
-            encryption_pattern = r'Encryption key:(on|off)'
-
-            # Dividir por celdas (cada red WiFi)
-            cells = re.split(cell_pattern, scan_output)[1:]
-
-            if not cells or len(cells) < 2:
-                print(f"No se encontraron celdas en la salida del escaneo. Salida completa:\n{scan_output}")
-                return []
-
-            print(f"Se encontraron {len(cells)//2} redes WiFi.")
-
-            # Procesar cada celda
-            for i in range(0, len(cells), 2):
-                if i+1 < len(cells):
-                    mac = cells[i].strip()
-                    info = cells[i+1]
-
-                    # Extraer información
-                    essid_match = re.search(essid_pattern, info)
-                    channel_match = re.search(channel_pattern, info)
-                    frequency_match = re.search(frequency_pattern, info)
-                    signal_match = re.search(signal_pattern, info)
-                    quality_match = re.search(quality_pattern, info)
-                    encryption_match = re.search(encryption_pattern, info)
-
-                    # Crear diccionario con la información
-                    network = {
-                        'mac': mac,
-                        'essid': essid_match.group(1) if essid_match else 'Unknown',
-                        'channel': int(channel_match.group(1)) if channel_match else None,
-                        'frequency': float(frequency_match.group(1)) if frequency_match else None,
-                        'signal': int(signal_match.group(1)) if signal_match else None,
-                        'quality': int(quality_match.group(1)) / int(quality_match.group(2)) * 100 if quality_match else None,
-                        'encrypted': encryption_match.group(1) == 'on' if encryption_match else None,
-                    }
-
-                    # Calcular distancia estimada
-                    if network['signal']:
-                        network['distance'] = calculate_distance(network['signal'])
-
-                    networks.append(network)
-
-            return networks
-
-        except subprocess.TimeoutExpired:
-            print("El comando de escaneo tardó demasiado tiempo. La interfaz podría estar ocupada.")
+        scan_backend = wifi_backends.get_backend(backend)
+        print(f"Escaneando con el backend '{scan_backend.name}'...")
+        networks = scan_backend.scan()
+
+        if not networks:
             return []
 
-    except subprocess.CalledProcessError as e:
-        print(f"Error al escanear redes WiFi: {e}")
-        print(f"Salida de error: {e.stderr}")
+        print(f"Se encontraron {len(networks)} redes WiFi.")
 
-        # Intentar obtener más información sobre el error
-        try:
-            print("Verificando estado de la interfaz después del error...")
-            subprocess.run(["sudo", "iwconfig", "wlan0"], check=True)
-            print("Verificando si hay procesos bloqueando la interfaz...")
-            subprocess.run(["sudo", "lsof", "/dev/wlan0"], check=False)
-        except:
-            pass
+        # Calcular distancia estimada
+        for network in networks:
+            if network['signal']:
+                network['distance'] = calculate_distance(network['signal'])
+
+        return networks
 
-        return []
     except Exception as e:
         print(f"Error inesperado: {e}")
         import traceback
@@ -199,8 +118,11 @@ def main():
             print(f"   MAC: {network['mac']}")
             print()
 
-        # Guardar resultados
-        save_scan_results(networks)
+        # Guardar resultados en el registro binario (save_scan_results escribe el JSON anterior)
+        import wifi_scanlog
+        with wifi_scanlog.ScanLog() as scanlog:
+            scanlog.append(networks)
+        print(f"Resultados guardados en el registro {scanlog.directory}")
     else:
         print("No se encontraron redes WiFi o hubo un error en el escaneo.")
 
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+WiFi Scheduler para Raspberry Pi
+Este módulo provee un planificador de ticks fijos basado en el reloj monotónico
+y una cola de trabajo acotada para que el almacenamiento y los gráficos no
+retrasen la cadencia de escaneo.
+"""
+
+import queue
+import threading
+import time
+
+
+class TickScheduler:
+    """
+    Planificador de ticks fijos sin deriva.
+
+    Los ticks se calculan como inicio + n * intervalo sobre time.monotonic(),
+    de modo que el tiempo que tarda cada ciclo no se acumula. Si un ciclo se
+    excede, el tick atrasado se ejecuta enseguida; solo se omiten (y se cuentan
+    como perdidos) los ticks de los que ya pasó un intervalo completo.
+    """
+
+    def __init__(self, interval, clock=time.monotonic, sleep=time.sleep):
+        """
+        Inicializa el planificador.
+
+        Args:
+            interval (float): Intervalo entre ticks en segundos
+            clock (callable): Reloj monotónico (inyectable para pruebas)
+            sleep (callable): Función de espera (inyectable para pruebas)
+        """
+        self.interval = interval
+        self.clock = clock
+        self.sleep = sleep
+        self.start = None
+        self.tick = 0
+        self.missed_ticks = 0
+
+    def wait_next(self):
+        """
+        Espera hasta el próximo tick. El primer llamado retorna inmediatamente.
+
+        Returns:
+            int: Número de ticks perdidos desde el llamado anterior
+        """
+        now = self.clock()
+        if self.start is None:
+            self.start = now
+            return 0
+
+        self.tick += 1
+        target = self.start + self.tick * self.interval
+        missed = 0
+
+        if now > target:
+            # El ciclo anterior se excedió: se omiten solo los ticks de los que ya pasó
+            # un intervalo completo; con un retraso menor el tick se ejecuta de inmediato
+            missed = int((now - target) // self.interval)
+            self.tick += missed
+            self.missed_ticks += missed
+            target = self.start + self.tick * self.interval
+
+        self.sleep(max(0.0, target - self.clock()))
+        return missed
+
+    def seconds_until_next(self):
+        """Devuelve los segundos que faltan para el próximo tick."""
+        if self.start is None:
+            return 0.0
+        return max(0.0, self.start + (self.tick + 1) * self.interval - self.clock())
+
+
+class WorkerQueue:
+    """
+    Cola de trabajo acotada atendida por un hilo.
+
+    Los trabajos se ejecutan en orden de llegada. Si la cola está llena el
+    trabajo se descarta (y se cuenta) en lugar de bloquear a quien lo envía.
+    """
+
+    def __init__(self, maxsize=8, name="wifi-worker"):
+        """
+        Inicializa la cola y arranca el hilo de trabajo.
+
+        Args:
+            maxsize (int): Número máximo de trabajos pendientes
+            name (str): Nombre del hilo
+        """
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped_jobs = 0
+        self.completed_jobs = 0
+        self.failed_jobs = 0
+        self.max_depth = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                self.queue.task_done()
+                break
+
+            description, func, args, kwargs = job
+            try:
+                func(*args, **kwargs)
+                self.completed_jobs += 1
+            except Exception as e:
+                self.failed_jobs += 1
+                print(f"Error en trabajo en segundo plano ({description}): {e}")
+            finally:
+                self.queue.task_done()
+
+    def submit(self, description, func, *args, **kwargs):
+        """
+        Encola un trabajo sin bloquear.
+
+        Args:
+            description (str): Descripción del trabajo para los mensajes
+            func (callable): Función a ejecutar
+            *args, **kwargs: Argumentos de la función
+
+        Returns:
+            bool: True si se encoló, False si se descartó por cola llena
+        """
+        try:
+            self.queue.put_nowait((description, func, args, kwargs))
+        except queue.Full:
+            self.dropped_jobs += 1
+            print(f"ADVERTENCIA: Cola de trabajo llena, se descartó: {description}")
+            return False
+
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def depth(self):
+        """Devuelve el número de trabajos pendientes."""
+        return self.queue.qsize()
+
+    def close(self):
+        """Espera a que terminen los trabajos pendientes y detiene el hilo."""
+        self.queue.put(None)
+        self._thread.join()
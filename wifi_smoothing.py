@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Suavizado incremental de la señal (RSSI) por BSSID para WiFi Analyzer
+Cada BSSID tiene un filtro de Kalman escalar (con un EWMA de referencia) cuyo
+estado se actualiza con cada escaneo y se guarda en MongoDB. El valor suavizado
+se guarda en cada red del escaneo ("signal_smoothed" y "distance_smoothed"),
+de modo que los gráficos, las distancias y la API lo leen sin recorrer el
+historial.
+
+Colección de estados:
+    wifi_signal_state {_id: bssid, estimate, variance, ewma, t, n}
+"""
+
+try:
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+except ImportError:
+    # Sin pymongo (despliegue solo con archivos) se puede suavizar, pero no guardar los estados
+    UpdateOne = None
+    BulkWriteError = None
+
+import wifi_scanner
+
+SMOOTHING_COLLECTION = "wifi_signal_state"
+
+# Varianza que gana la señal real por segundo entre escaneos (dB²/s): cuánto puede
+# moverse un punto de acceso o el entorno. Más alta sigue antes los cambios reales.
+KALMAN_PROCESS_NOISE = 0.05
+
+# Varianza del ruido de medición del RSSI (dB²); ~4 dB de desviación típica
+KALMAN_MEASUREMENT_NOISE = 16.0
+
+# Peso de la medición nueva en el EWMA
+EWMA_ALPHA = 0.3
+
+# Segundos sin ver un BSSID tras los que el filtro se reinicia con la medición nueva
+RESET_GAP = 600
+
+
+def update_state(state, signal, timestamp, process_noise=KALMAN_PROCESS_NOISE,
+                 measurement_noise=KALMAN_MEASUREMENT_NOISE, alpha=EWMA_ALPHA, reset_gap=RESET_GAP):
+    """
+    Aplica una medición de RSSI al estado del filtro de un BSSID.
+
+    Args:
+        state (dict): Estado anterior ({"estimate", "variance", "ewma", "t", "n"}) o None
+        signal (float): Medición en dBm
+        timestamp (datetime): Momento de la medición
+        process_noise (float): Varianza de proceso por segundo (dB²/s)
+        measurement_noise (float): Varianza del ruido de medición (dB²)
+        alpha (float): Peso de la medición en el EWMA
+        reset_gap (float): Segundos sin mediciones tras los que se reinicia el filtro
+
+    Returns:
+        dict: Estado nuevo, o None si la medición es anterior al estado (fuera de orden)
+    """
+    if state is not None:
+        elapsed = (timestamp - state["t"]).total_seconds()
+        if elapsed < 0:
+            return None
+        if elapsed <= reset_gap:
+            # Predicción: la incertidumbre crece con el tiempo transcurrido
+            variance = state["variance"] + process_noise * elapsed
+            # Corrección con la medición
+            gain = variance / (variance + measurement_noise)
+            return {
+                "estimate": state["estimate"] + gain * (signal - state["estimate"]),
+                "variance": (1 - gain) * variance,
+                "ewma": alpha * signal + (1 - alpha) * state["ewma"],
+                "t": timestamp,
+                "n": state["n"] + 1,
+            }
+
+    return {"estimate": float(signal), "variance": measurement_noise, "ewma": float(signal),
+            "t": timestamp, "n": 1}
+
+
+def smooth_series(timestamps, signals, **params):
+    """
+    Suaviza una serie completa con el mismo filtro (para datos sin valores guardados).
+
+    Args:
+        timestamps (iterable): datetimes de cada medición, en orden
+        signals (iterable): Mediciones en dBm
+        **params: Parámetros de update_state
+
+    Returns:
+        list: Estimaciones del filtro para cada medición
+    """
+    state = None
+    estimates = []
+    for timestamp, signal in zip(timestamps, signals):
+        state = update_state(state, signal, timestamp, **params) or state
+        estimates.append(state["estimate"])
+    return estimates
+
+
+class SignalSmoother:
+    """
+    Estados de filtro por BSSID en memoria, persistidos en MongoDB.
+
+    Varios procesos (la aplicación web y el escaneo continuo) pueden compartir la
+    colección: antes de cada escaneo se releen los estados de sus BSSID y se usa
+    el más reciente (por "t"), y save() solo reemplaza un estado guardado si el
+    propio es posterior, de modo que un estado viejo nunca pisa uno nuevo. Los
+    modificados se guardan con save() (un bulk_write por lote de escaneos).
+    """
+
+    def __init__(self, collection=None, **params):
+        """
+        Args:
+            collection (Collection, optional): Colección de estados (SMOOTHING_COLLECTION).
+                Si es None, los estados solo viven en memoria.
+            **params: Parámetros de update_state
+        """
+        self.collection = collection
+        self.params = params
+        self.states = {}
+        self._dirty = set()
+
+    def _load(self, macs):
+        """Relee de la colección los estados de los BSSID y conserva el más reciente de cada uno."""
+        if not macs or self.collection is None:
+            return
+        try:
+            for document in self.collection.find({"_id": {"$in": list(macs)}}):
+                mac = document.pop("_id")
+                current = self.states.get(mac)
+                if current is None or document["t"] > current["t"]:
+                    # Otro proceso lo actualizó después: el estado propio quedó viejo
+                    self.states[mac] = document
+                    self._dirty.discard(mac)
+        except Exception as e:
+            print(f"Error al leer los estados de suavizado: {e}")
+
+    def smooth(self, networks, timestamp):
+        """
+        Actualiza los filtros con las redes de un escaneo y anota los valores suavizados.
+
+        Añade a cada red "signal_smoothed" y "distance_smoothed" (salvo si la medición
+        es anterior al último estado del BSSID, p. ej. al importar escaneos antiguos).
+
+        Args:
+            networks (list): Redes del escaneo (se modifican en el lugar)
+            timestamp (datetime): Momento del escaneo
+
+        Returns:
+            list: Las mismas redes
+        """
+        measured = [network for network in networks
+                    if network.get("mac") and network.get("signal") is not None]
+        self._load({network["mac"] for network in measured})
+
+        for network in measured:
+            mac = network["mac"]
+            state = update_state(self.states.get(mac), network["signal"], timestamp, **self.params)
+            if state is None:
+                continue
+            self.states[mac] = state
+            self._dirty.add(mac)
+            smoothed = round(state["estimate"], 1)
+            network["signal_smoothed"] = smoothed
+            network["distance_smoothed"] = wifi_scanner.calculate_distance(smoothed)
+        return networks
+
+    def save(self):
+        """
+        Guarda en la colección los estados modificados desde el último save().
+
+        Returns:
+            int: Estados guardados
+        """
+        if self.collection is None or not self._dirty:
+            self._dirty.clear()
+            return 0
+
+        dirty = list(self._dirty)
+        self._dirty.clear()
+        try:
+            # Solo se reemplaza un estado guardado anterior; si el guardado es posterior
+            # el filtro no coincide y el upsert falla por _id duplicado (se ignora)
+            self.collection.bulk_write(
+                [UpdateOne({"_id": mac, "t": {"$lt": self.states[mac]["t"]}}, {"$set": self.states[mac]},
+                           upsert=True) for mac in dirty],
+                ordered=False
+            )
+            return len(dirty)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if all(error.get("code") == 11000 for error in errors):
+                return len(dirty) - len(errors)
+            self._dirty.update(dirty)
+            print(f"Error al guardar los estados de suavizado: {e}")
+            return 0
+        except Exception as e:
+            # Reintentar en el próximo save()
+            self._dirty.update(dirty)
+            print(f"Error al guardar los estados de suavizado: {e}")
+            return 0
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Transmisión de escaneos en vivo para WiFi Analyzer
+Este módulo implementa un difusor compartido de eventos Server-Sent Events
+(SSE): un único hilo detecta los escaneos nuevos, calcula el delta respecto
+del anterior una sola vez y envía el mismo mensaje a todos los clientes.
+"""
+
+import json
+import queue
+import threading
+import wifi_db
+
+# Diferencia mínima de señal (dBm) para informar un cambio
+SIGNAL_CHANGE_THRESHOLD = 1
+
+
+def format_sse(event, data, event_id=None):
+    """
+    Da formato a un mensaje Server-Sent Events.
+
+    Args:
+        event (str): Nombre del evento
+        data (dict): Datos serializables a JSON
+        event_id (str, optional): Identificador del evento
+
+    Returns:
+        str: Mensaje listo para escribir en la respuesta
+    """
+    message = f"event: {event}\n"
+    if event_id:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def build_scan_state(scan):
+    """
+    Construye el estado compacto de un escaneo (histograma y top-N por señal).
+
+    Args:
+        scan (dict): Documento de escaneo (con _id, timestamp y networks)
+
+    Returns:
+        dict: Estado serializable a JSON
+    """
+    summary = wifi_db.build_scan_summary(scan)
+    timestamp = summary["timestamp"]
+    return {
+        "scan_id": str(summary["scan_id"]),
+        "timestamp": timestamp.isoformat() if hasattr(timestamp, "isoformat") else timestamp,
+        "total_networks": summary["total_networks"],
+        "channels_2g": summary["channels_2g"],
+        "channels_5g": summary["channels_5g"],
+        "top_networks": summary["top_networks"],
+    }
+
+
+def build_scan_delta(previous, current, threshold=SIGNAL_CHANGE_THRESHOLD):
+    """
+    Calcula las diferencias entre dos escaneos.
+
+    Args:
+        previous (dict): Escaneo anterior (o None)
+        current (dict): Escaneo nuevo
+        threshold (int): Diferencia mínima de señal para informar un cambio
+
+    Returns:
+        dict: Estado del escaneo nuevo más las claves "new", "lost" y "changed"
+    """
+    before = {n.get("mac"): n for n in (previous or {}).get("networks", [])}
+    after = {n.get("mac"): n for n in current.get("networks", [])}
+
+    new = [
+        {"mac": mac, "essid": n.get("essid"), "channel": n.get("channel"), "signal": n.get("signal")}
+        for mac, n in after.items() if mac not in before
+    ]
+    lost = [mac for mac in before if mac not in after]
+    changed = {}
+    for mac, n in after.items():
+        old = before.get(mac)
+        if old and n.get("signal") is not None and old.get("signal") is not None:
+            if abs(n["signal"] - old["signal"]) >= threshold:
+                changed[mac] = n["signal"]
+
+    delta = build_scan_state(current)
+    delta.update({"new": new, "lost": lost, "changed": changed})
+    return delta
+
+
+class ScanBroadcaster:
+    """
+    Difusor compartido de escaneos nuevos.
+
+    Mientras haya clientes suscritos, un hilo consulta el _id del último
+    escaneo (consulta cubierta por el índice _id). Cuando cambia, carga ese
+    escaneo, calcula el delta y lo encola ya formateado para cada cliente.
+    notify() despierta al hilo de inmediato (p. ej. tras /api/scan); los
+    escaneos de otros procesos (continuous_scan) se detectan por sondeo.
+    """
+
+    def __init__(self, latest_id, load_scan, poll_interval=2.0, client_queue_size=16):
+        """
+        Inicializa el difusor.
+
+        Args:
+            latest_id (callable): Devuelve el _id del último escaneo o None
+            load_scan (callable): Recibe un _id y devuelve el documento del escaneo
+            poll_interval (float): Segundos entre consultas del último _id
+            client_queue_size (int): Mensajes pendientes por cliente antes de desconectarlo
+        """
+        self.latest_id = latest_id
+        self.load_scan = load_scan
+        self.poll_interval = poll_interval
+        self.client_queue_size = client_queue_size
+
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._last_scan = None
+        self._snapshot = None
+
+    def subscribe(self):
+        """
+        Registra un cliente y arranca el hilo si hace falta.
+
+        Returns:
+            queue.Queue: Cola de mensajes del cliente (None indica desconexión)
+        """
+        client = queue.Queue(maxsize=self.client_queue_size)
+        with self._lock:
+            self._clients.add(client)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="scan-broadcaster", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return client
+
+    def unsubscribe(self, client):
+        """Elimina un cliente."""
+        with self._lock:
+            self._clients.discard(client)
+
+    def notify(self):
+        """Indica que hay un escaneo nuevo para no esperar al próximo sondeo."""
+        self._wakeup.set()
+
+    def snapshot(self):
+        """Devuelve el mensaje SSE con el estado del último escaneo (o None)."""
+        return self._snapshot
+
+    def _publish(self, message):
+        with self._lock:
+            clients = list(self._clients)
+
+        for client in clients:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                # Cliente lento: se desconecta; EventSource reconectará y recibirá el estado
+                self.unsubscribe(client)
+                try:
+                    while True:
+                        client.get_nowait()
+                except queue.Empty:
+                    pass
+                client.put_nowait(None)
+
+    def _check(self):
+        scan_id = self.latest_id()
+        if scan_id is None or (self._last_scan and self._last_scan.get("_id") == scan_id):
+            return
+
+        scan = self.load_scan(scan_id)
+        if not scan:
+            return
+
+        previous = self._last_scan
+        self._last_scan = scan
+        state = build_scan_state(scan)
+        self._snapshot = format_sse("snapshot", state, state["scan_id"])
+
+        if previous is None:
+            # Primer escaneo conocido: no hay delta, se envía el estado completo
+            self._publish(self._snapshot)
+        else:
+            delta = build_scan_delta(previous, scan)
+            self._publish(format_sse("scan", delta, delta["scan_id"]))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._clients:
+                    self._thread = None
+                    return
+
+            try:
+                self._check()
+            except Exception as e:
+                print(f"Error en el difusor de escaneos: {e}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
@@ -4,112 +4,273 @@
 """
 WiFi Trends para Raspberry Pi
 Este módulo genera visualizaciones de tendencias a lo largo del tiempo
-basadas en datos almacenados en MongoDB.
+basadas en datos almacenados en MongoDB o, si MongoDB no está disponible, en el
+archivo columnar de escaneos (wifi_archive).
 """
 
 import os
-import matplotlib.pyplot as plt
+import shutil
+import tempfile
 import numpy as np
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 import matplotlib.dates as mdates
 from matplotlib.colors import LinearSegmentedColormap
-import wifi_db
+import wifi_archive
+import wifi_cache
+import wifi_frames
+import wifi_render
+import wifi_scanlog
+import wifi_smoothing
 
-def generate_signal_strength_trend(db, network_name=None, mac=None, days=1, output_file=None):
+# MongoDB es opcional: sin pymongo las tendencias se leen del archivo columnar
+try:
+    import wifi_db
+    import wifi_rollups
+    DB_AVAILABLE = True
+except ImportError:
+    DB_AVAILABLE = False
+
+# Procesos para renderizar gráficos en paralelo (uno por núcleo)
+RENDER_WORKERS = os.cpu_count() or 1
+
+# Directorio en memoria (tmpfs) para los arreglos compartidos con los procesos de render
+SHARED_DIR = '/dev/shm'
+
+BAND_LABELS = {'2g': '2.4GHz', '5g': '5GHz'}
+
+def load_trend_frame(db, days=1):
     """
-    Genera un gráfico de tendencia de intensidad de señal para una red específica.
-    
+    Carga una sola vez los datos de tendencias que comparten todos los gráficos.
+
+    Si los rollups cubren los escaneos se usan sus buckets (sin matriz de señal;
+    el gráfico de señal lee los rollups por BSSID). Si no, se recorre el cursor
+    de escaneos una sola vez con la proyección mínima.
+
     Args:
         db (WiFiDB): Instancia de WiFiDB
+        days (int): Número de días a analizar
+
+    Returns:
+        TrendFrame: Datos columnares o None si no hay conexión
+    """
+    if not db.is_connected():
+        print("No hay conexión a MongoDB.")
+        return None
+
+    end_time = datetime.now()
+    start_time = end_time - timedelta(days=days)
+
+    series = db.get_band_series(start_time, end_time)
+    if series is not None:
+        return wifi_frames.frame_from_band_series(series)
+
+    scans = db.iter_scans(start_time, end_time, fields=wifi_frames.FRAME_FIELDS)
+    return wifi_frames.load_scan_frame(scans, capacity=db.count_scans(start_time, end_time))
+
+def load_archive_frame(archive, days=1, network_name=None, mac=None):
+    """
+    Carga los datos de tendencias desde el archivo columnar (sin MongoDB).
+
+    Solo se leen del disco los escaneos del período. Con una red, la matriz de
+    señal tiene solo sus BSSID y no se calculan los conteos por canal.
+
+    Args:
+        archive (ScanArchive): Archivo columnar de escaneos
+        days (int): Número de días a analizar
         network_name (str, optional): Nombre de la red (ESSID)
         mac (str, optional): Dirección MAC de la red
-        days (int): Número de días a analizar
-        output_file (str, optional): Ruta para guardar el gráfico
-        
+
     Returns:
-        str: Ruta del archivo guardado o None si hay un error
+        TrendFrame: Datos columnares (un punto por escaneo)
+    """
+    end_time = datetime.now()
+    start_time = end_time - timedelta(days=days)
+    specific = bool(network_name or mac)
+    return archive.load_frame(start_time, end_time, essid=network_name, mac=mac, channels=not specific)
+
+def sync_archive(archive, scanlog_dir=None, json_dir=None):
+    """
+    Actualiza el archivo columnar con los segmentos del registro binario y los archivos JSON.
+
+    Args:
+        archive (ScanArchive): Archivo columnar de escaneos
+        scanlog_dir (str, optional): Directorio del registro binario (wifi_scanlog)
+        json_dir (str, optional): Directorio de los archivos wifi_scan_*.json
+
+    Returns:
+        int: Partes escritas
     """
+    written = 0
+    if scanlog_dir and os.path.isdir(scanlog_dir):
+        written += archive.sync_scanlog(wifi_scanlog.ScanLog(scanlog_dir, retention_days=0))
+    if json_dir and os.path.isdir(json_dir):
+        written += archive.sync_json_files(json_dir)
+    return written
+
+def _load_band_frame(db, days):
+    """Carga los conteos por banda y canal (rollups o agregación en MongoDB) como TrendFrame."""
     if not db.is_connected():
         print("No hay conexión a MongoDB.")
         return None
-    
-    if not network_name and not mac:
-        print("Debe especificar al menos un nombre de red o dirección MAC.")
+
+    end_time = datetime.now()
+    start_time = end_time - timedelta(days=days)
+
+    # Usar los rollups (granularidad según el período) si cubren los escaneos; si no,
+    # MongoDB calcula el histograma y solo se transfieren los conteos
+    series = db.get_band_series(start_time, end_time)
+    if series is None:
+        bucket = wifi_rollups.granularity_seconds(wifi_rollups.choose_granularity(start_time, end_time))
+        series = db.channel_histogram(start_time, end_time, bucket)
+
+    return wifi_frames.frame_from_band_series(series)
+
+def _load_history_frame(db, network_name, mac, days):
+    """Carga el historial de una red como TrendFrame (rollups por BSSID o cursor de escaneos)."""
+    if not db.is_connected():
+        print("No hay conexión a MongoDB.")
         return None
     
     # Definir período de tiempo
     end_time = datetime.now()
     start_time = end_time - timedelta(days=days)
     
-    # Obtener historial de la red
-    network_history = db.get_network_history(
-        essid=network_name, 
-        mac=mac, 
-        start_time=start_time, 
-        end_time=end_time
-    )
+    # Obtener historial de la red: desde los rollups si cubren los escaneos; si no,
+    # se recorre el cursor y se vuelca directamente en la matriz BSSID x tiempo
+    network_history = db.get_network_rollup(network_name, mac, start_time, end_time)
+    if network_history is None:
+        network_history = db.iter_network_history(
+            essid=network_name, 
+            mac=mac, 
+            start_time=start_time, 
+            end_time=end_time
+        )
+    return wifi_frames.frame_from_history(network_history)
+
+def _style_time_axes(ax, title, ylabel):
+    """Aplica título, etiquetas, rejilla y formato de fechas comunes a los gráficos de tendencias."""
+    ax.set_title(title, fontsize=16)
+    ax.set_xlabel('Tiempo', fontsize=12)
+    ax.set_ylabel(ylabel, fontsize=12)
+    ax.grid(True, linestyle='--', alpha=0.7)
     
-    if not network_history:
-        print(f"No se encontraron datos para la red {network_name or mac} en el período especificado.")
-        return None
+    # Formatear eje X para mostrar fechas/horas
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d %H:%M'))
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+    ax.tick_params(axis='x', labelrotation=45)
+
+def _plot_channel_counts(renderer, key, times, channels, counts, title, output_file):
+    """Dibuja una línea por canal (filas de la matriz canal x tiempo) de una banda."""
+    # La leyenda va fuera de los ejes: reservar margen derecho cuando no se recorta
+    with renderer.figure(key, (12, 8), output_file, margins={"right": 0.85}) as (fig, ax):
+        _style_time_axes(ax, title, 'Número de Redes')
+        
+        for channel, row in zip(channels, counts):
+            renderer.plot(ax, times, row, '-', label=f'Canal {channel}')
+        
+        ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
+
+def _smoothed_signal(frame, row, times, present):
+    """
+    Devuelve la señal suavizada de una fila de frame.signal.
     
-    # Convertir a DataFrame para facilitar el análisis
-    data = []
-    for entry in network_history:
-        data.append({
-            'timestamp': entry['timestamp'],
-            'signal': entry['network']['signal'],
-            'channel': entry['network']['channel'],
-            'essid': entry['network']['essid']
-        })
+    Returns:
+        tuple: (tiempos, valores) de los puntos con señal suavizada guardada o, si no
+            hay ninguno, la serie medida pasada por wifi_smoothing.smooth_series
+    """
+    if frame.signal_smoothed is not None:
+        stored = frame.signal_smoothed[row].astype(np.float32)
+        stored_present = ~np.isnan(stored)
+        if stored_present.any():
+            return times[stored_present], stored[stored_present]
+    
+    signal = frame.signal[row][present].astype(np.float32)
+    estimates = wifi_smoothing.smooth_series(times[present].astype(object), signal.tolist())
+    return times[present], np.array(estimates, dtype=np.float32)
+
+def generate_signal_strength_trend(db, network_name=None, mac=None, days=1, output_file=None, frame=None, renderer=None):
+    """
+    Genera un gráfico de tendencia de intensidad de señal para una red específica.
     
-    df = pd.DataFrame(data)
+    Args:
+        db (WiFiDB): Instancia de WiFiDB
+        network_name (str, optional): Nombre de la red (ESSID)
+        mac (str, optional): Dirección MAC de la red
+        days (int): Número de días a analizar
+        output_file (str, optional): Ruta para guardar el gráfico
+        frame (TrendFrame, optional): Datos ya cargados (ver load_trend_frame). Si no
+            tienen la red, se lee su historial.
+        renderer (Renderer, optional): Renderizador a usar (por defecto, el de calidad de impresión)
+        
+    Returns:
+        str: Ruta del archivo guardado o None si hay un error
+    """
+    if not network_name and not mac:
+        print("Debe especificar al menos un nombre de red o dirección MAC.")
+        return None
     
-    # Generar gráfico
-    plt.figure(figsize=(12, 6))
-    plt.title(f"Tendencia de Intensidad de Señal: {network_name or mac}", fontsize=16)
-    plt.xlabel('Tiempo', fontsize=12)
-    plt.ylabel('Intensidad de Señal (dBm)', fontsize=12)
-    plt.grid(True, linestyle='--', alpha=0.7)
+    renderer = renderer or wifi_render.get_renderer()
     
-    # Configurar ejes
-    plt.ylim(-90, -20)
+    rows = frame.rows_for(network_name, mac) if frame is not None else []
+    if not rows:
+        frame = _load_history_frame(db, network_name, mac, days)
+        if frame is None:
+            return None
+        rows = frame.rows_for(network_name, mac)
     
-    # Formatear eje X para mostrar fechas/horas
-    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d %H:%M'))
-    plt.gca().xaxis.set_major_locator(mdates.AutoDateLocator())
+    if not rows:
+        print(f"No se encontraron datos para la red {network_name or mac} en el período especificado.")
+        return None
     
-    # Dibujar línea de tendencia
-    plt.plot(df['timestamp'], df['signal'], 'o-', color='blue', alpha=0.7, label='Intensidad de Señal')
+    times = frame.times()
     
-    # Añadir línea de tendencia suavizada si hay suficientes puntos
-    if len(df) > 5:
-        try:
-            from scipy.signal import savgol_filter
-            window_size = min(15, len(df) - (len(df) % 2) - 1)  # Debe ser impar y menor que len(df)
-            if window_size > 2:
-                smoothed = savgol_filter(df['signal'], window_size, 3)
-                plt.plot(df['timestamp'], smoothed, '-', color='red', alpha=0.8, label='Tendencia Suavizada')
-        except ImportError:
-            print("scipy no está instalado. No se generará la línea de tendencia suavizada.")
-        except Exception as e:
-            print(f"Error al generar línea de tendencia suavizada: {e}")
+    # Generar gráfico
+    with renderer.figure('signal_trend', (12, 6), output_file) as (fig, ax):
+        _style_time_axes(ax, f"Tendencia de Intensidad de Señal: {network_name or mac}",
+                         'Intensidad de Señal (dBm)')
+        
+        # Configurar ejes
+        ax.set_ylim(-90, -20)
+        
+        # Una línea por BSSID (un mismo ESSID puede tener varios puntos de acceso)
+        for row in rows:
+            signal = frame.signal[row].astype(np.float32)
+            present = ~np.isnan(signal)
+            label = 'Intensidad de Señal' if len(rows) == 1 else f'{frame.bssids[row]}'
+            color = 'blue' if len(rows) == 1 else None
+            
+            # Dibujar línea de tendencia
+            line, = renderer.plot(ax, times[present], signal[present], 'o-', color=color, alpha=0.7, label=label)
+            
+            # Con rollups, sombrear el rango mínimo-máximo de cada bucket
+            if frame.signal_min is not None:
+                renderer.fill_between(ax, times[present], frame.signal_min[row][present].astype(np.float32),
+                                      frame.signal_max[row][present].astype(np.float32),
+                                      color=line.get_color(), alpha=0.15,
+                                      label='Rango (mín-máx)' if len(rows) == 1 else None)
+            
+            # Señal suavizada: la guardada con cada escaneo (filtro por BSSID de wifi_smoothing)
+            # o, para datos sin ella (escaneos antiguos, rollups), el mismo filtro sobre la serie
+            smoothed_times, smoothed = _smoothed_signal(frame, row, times, present)
+            if len(smoothed) > 1:
+                renderer.plot(ax, smoothed_times, smoothed, '-',
+                              color='red' if len(rows) == 1 else line.get_color(),
+                              alpha=0.8, label='Señal Suavizada' if len(rows) == 1 else None)
+        
+        ax.legend()
     
-    plt.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
+    # Estadísticas calculadas sobre la misma matriz
+    for stats in frame.signal_stats(rows):
+        print(f"{stats['essid']} ({stats['mac']}): {stats['samples']} muestras, "
+              f"mín {stats['min']:.0f} / media {stats['mean']:.1f} / máx {stats['max']:.0f} dBm")
     
-    # Guardar o mostrar el gráfico
     if output_file:
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
         print(f"Gráfico de tendencia guardado en {output_file}")
-        return output_file
-    else:
-        plt.show()
-        return None
+    return output_file
 
-def generate_channel_occupancy_trend(db, days=1, output_file=None):
+def generate_channel_occupancy_trend(db, days=1, output_file=None, frame=None, renderer=None):
     """
     Genera un gráfico de tendencia de ocupación de canales a lo largo del tiempo.
     
@@ -117,126 +278,61 @@ def generate_channel_occupancy_trend(db, days=1, output_file=None):
         db (WiFiDB): Instancia de WiFiDB
         days (int): Número de días a analizar
         output_file (str, optional): Ruta para guardar el gráfico
+        frame (TrendFrame, optional): Datos ya cargados (ver load_trend_frame)
+        renderer (Renderer, optional): Renderizador a usar (por defecto, el de calidad de impresión)
         
     Returns:
         str: Ruta del archivo guardado o None si hay un error
     """
-    if not db.is_connected():
-        print("No hay conexión a MongoDB.")
-        return None
-    
-    # Definir período de tiempo
-    end_time = datetime.now()
-    start_time = end_time - timedelta(days=days)
+    renderer = renderer or wifi_render.get_renderer()
     
-    # Obtener escaneos en el período
-    scans = db.get_scans_in_timeframe(start_time, end_time)
+    if frame is None:
+        frame = _load_band_frame(db, days)
     
-    if not scans:
+    if frame is None or len(frame) == 0:
         print(f"No se encontraron datos en el período especificado.")
         return None
     
-    # Preparar datos para el análisis
-    timestamps = []
-    channel_counts_2g = []
-    channel_counts_5g = []
-    
-    for scan in scans:
-        timestamp = scan['timestamp']
-        networks = scan['networks']
-        
-        # Contar redes por canal
-        channels_2g = {i: 0 for i in range(1, 15)}
-        channels_5g = {}
-        
-        for network in networks:
-            channel = network.get('channel')
-            if channel:
-                if channel <= 14:
-                    channels_2g[channel] = channels_2g.get(channel, 0) + 1
-                else:
-                    channels_5g[channel] = channels_5g.get(channel, 0) + 1
-        
-        timestamps.append(timestamp)
-        channel_counts_2g.append(channels_2g)
-        channel_counts_5g.append(channels_5g)
+    # Generar un gráfico para 2.4GHz y, si hay datos de 5GHz, otro para 5GHz
+    generate_band_occupancy_trend(frame, '2g', days, output_file, renderer)
+    generate_band_occupancy_trend(frame, '5g', days, _band_output_file(output_file, '5g'), renderer)
     
-    # Convertir a DataFrame para 2.4GHz
-    df_2g = pd.DataFrame(channel_counts_2g, index=timestamps)
-    
-    # Generar gráfico para 2.4GHz
-    plt.figure(figsize=(12, 8))
-    plt.title(f"Tendencia de Ocupación de Canales 2.4GHz (Últimos {days} días)", fontsize=16)
-    plt.xlabel('Tiempo', fontsize=12)
-    plt.ylabel('Número de Redes', fontsize=12)
-    plt.grid(True, linestyle='--', alpha=0.7)
-    
-    # Formatear eje X para mostrar fechas/horas
-    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d %H:%M'))
-    plt.gca().xaxis.set_major_locator(mdates.AutoDateLocator())
+    return output_file
+
+def _band_output_file(output_file, band):
+    """Ruta del gráfico de ocupación de una banda (el de 5GHz lleva el sufijo _5GHz)."""
+    if output_file and band == '5g':
+        return output_file.replace('.png', '_5GHz.png')
+    return output_file
+
+def generate_band_occupancy_trend(frame, band, days=1, output_file=None, renderer=None):
+    """
+    Genera el gráfico de ocupación de canales de una banda a partir de un TrendFrame.
     
-    # Dibujar líneas para cada canal
-    for channel in range(1, 15):
-        if channel in df_2g.columns:
-            plt.plot(df_2g.index, df_2g[channel], '-', label=f'Canal {channel}')
+    Args:
+        frame (TrendFrame): Datos de tendencias
+        band (str): '2g' o '5g'
+        days (int): Número de días analizados (para el título)
+        output_file (str, optional): Ruta para guardar el gráfico
+        renderer (Renderer, optional): Renderizador a usar (por defecto, el de calidad de impresión)
+        
+    Returns:
+        str: Ruta del archivo guardado o None si la banda no tiene canales
+    """
+    renderer = renderer or wifi_render.get_renderer()
     
-    plt.legend(loc='upper left', bbox_to_anchor=(1, 1))
-    plt.xticks(rotation=45)
-    plt.tight_layout()
+    channels, counts = frame.band_channels(band)
+    if not len(channels):
+        return None
     
-    # Guardar o mostrar el gráfico
+    label = BAND_LABELS[band]
+    _plot_channel_counts(renderer, f'channel_trend_{band}', frame.times(), channels, counts,
+                         f"Tendencia de Ocupación de Canales {label} (Últimos {days} días)", output_file)
     if output_file:
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        print(f"Gráfico de ocupación de canales 2.4GHz guardado en {output_file}")
-        return output_file
-    else:
-        plt.show()
-    
-    # Si hay datos de 5GHz, generar otro gráfico
-    if any(bool(counts) for counts in channel_counts_5g):
-        # Encontrar todos los canales 5GHz
-        all_5g_channels = set()
-        for counts in channel_counts_5g:
-            all_5g_channels.update(counts.keys())
-        
-        # Convertir a DataFrame para 5GHz
-        df_5g_data = []
-        for counts in channel_counts_5g:
-            row = {channel: counts.get(channel, 0) for channel in all_5g_channels}
-            df_5g_data.append(row)
-        
-        df_5g = pd.DataFrame(df_5g_data, index=timestamps)
-        
-        # Generar gráfico para 5GHz
-        plt.figure(figsize=(12, 8))
-        plt.title(f"Tendencia de Ocupación de Canales 5GHz (Últimos {days} días)", fontsize=16)
-        plt.xlabel('Tiempo', fontsize=12)
-        plt.ylabel('Número de Redes', fontsize=12)
-        plt.grid(True, linestyle='--', alpha=0.7)
-        
-        # Formatear eje X para mostrar fechas/horas
-        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d %H:%M'))
-        plt.gca().xaxis.set_major_locator(mdates.AutoDateLocator())
-        
-        # Dibujar líneas para cada canal
-        for channel in sorted(all_5g_channels):
-            plt.plot(df_5g.index, df_5g[channel], '-', label=f'Canal {channel}')
-        
-        plt.legend(loc='upper left', bbox_to_anchor=(1, 1))
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        # Guardar o mostrar el gráfico
-        if output_file:
-            output_file_5g = output_file.replace('.png', '_5GHz.png')
-            plt.savefig(output_file_5g, dpi=300, bbox_inches='tight')
-            print(f"Gráfico de ocupación de canales 5GHz guardado en {output_file_5g}")
-        else:
-            plt.show()
-    
+        print(f"Gráfico de ocupación de canales {label} guardado en {output_file}")
     return output_file
 
-def generate_network_count_trend(db, days=1, output_file=None):
+def generate_network_count_trend(db, days=1, output_file=None, frame=None, renderer=None):
     """
     Genera un gráfico de tendencia del número de redes detectadas a lo largo del tiempo.
     
@@ -244,72 +340,280 @@ def generate_network_count_trend(db, days=1, output_file=None):
         db (WiFiDB): Instancia de WiFiDB
         days (int): Número de días a analizar
         output_file (str, optional): Ruta para guardar el gráfico
+        frame (TrendFrame, optional): Datos ya cargados (ver load_trend_frame)
+        renderer (Renderer, optional): Renderizador a usar (por defecto, el de calidad de impresión)
         
     Returns:
         str: Ruta del archivo guardado o None si hay un error
     """
-    if not db.is_connected():
-        print("No hay conexión a MongoDB.")
+    renderer = renderer or wifi_render.get_renderer()
+    
+    if frame is None:
+        if not db.is_connected():
+            print("No hay conexión a MongoDB.")
+            return None
+        
+        # Definir período de tiempo
+        end_time = datetime.now()
+        start_time = end_time - timedelta(days=days)
+        
+        # Usar los rollups (granularidad según el período) si cubren los escaneos; si no,
+        # MongoDB cuenta las redes por banda y solo se transfieren los conteos
+        series = db.get_band_series(start_time, end_time)
+        if series is None:
+            bucket = wifi_rollups.granularity_seconds(wifi_rollups.choose_granularity(start_time, end_time))
+            series = db.band_counts(start_time, end_time, bucket)
+        frame = wifi_frames.frame_from_band_series(series)
+    
+    if len(frame) == 0:
+        print(f"No se encontraron datos en el período especificado.")
         return None
     
-    # Definir período de tiempo
-    end_time = datetime.now()
-    start_time = end_time - timedelta(days=days)
+    times = frame.times()
     
-    # Obtener escaneos en el período
-    scans = db.get_scans_in_timeframe(start_time, end_time)
+    # Generar gráfico
+    with renderer.figure('network_count_trend', (12, 6), output_file) as (fig, ax):
+        _style_time_axes(ax, f"Tendencia de Número de Redes WiFi (Últimos {days} días)", 'Número de Redes')
+        
+        # Dibujar líneas
+        renderer.plot(ax, times, frame.total, 'o-', color='blue', label='Total')
+        renderer.plot(ax, times, frame.count_2g, 'o-', color='green', label='2.4GHz')
+        renderer.plot(ax, times, frame.count_5g, 'o-', color='red', label='5GHz')
+        
+        ax.legend()
     
-    if not scans:
+    if output_file:
+        print(f"Gráfico de tendencia de número de redes guardado en {output_file}")
+    return output_file
+
+def channel_occupancy_jobs(frame, days, output_file):
+    """
+    Arma los trabajos de render de ocupación de canales (uno por banda con datos).
+    
+    Args:
+        frame (TrendFrame): Datos de tendencias (ver load_trend_frame)
+        days (int): Número de días analizados
+        output_file (str, optional): Ruta del gráfico de 2.4GHz
+        
+    Returns:
+        list: Trabajos (gráfico, frame, argumentos) para render_trend_jobs
+    """
+    if frame is None or len(frame) == 0:
+        print(f"No se encontraron datos en el período especificado.")
+        return []
+    
+    return [("band_occupancy", frame, {"band": band, "days": days,
+                                       "output_file": _band_output_file(output_file, band)})
+            for band in BAND_LABELS if len(frame.band_channels(band)[0])]
+
+def network_count_job(frame, days, output_file):
+    """Arma el trabajo de render del número de redes (None si no hay datos)."""
+    if frame is None or len(frame) == 0:
         print(f"No se encontraron datos en el período especificado.")
         return None
     
-    # Preparar datos para el análisis
-    timestamps = []
-    total_counts = []
-    counts_2g = []
-    counts_5g = []
+    return ("network_count", frame, {"days": days, "output_file": output_file})
+
+def signal_strength_job(db, frame, network_name, mac, days, output_file):
+    """
+    Arma el trabajo de render de intensidad de señal de una red. Si el frame
+    compartido no tiene la red, se carga su historial de MongoDB antes de repartir
+    el trabajo (sin db, el frame del archivo columnar ya tiene todas las redes).
+    
+    Returns:
+        tuple: Trabajo (gráfico, frame, argumentos) o None si no hay datos
+    """
+    if not network_name and not mac:
+        print("Debe especificar al menos un nombre de red o dirección MAC.")
+        return None
+    
+    if (frame is None or not frame.rows_for(network_name, mac)) and db is not None:
+        frame = _load_history_frame(db, network_name, mac, days)
+    if frame is None or not frame.rows_for(network_name, mac):
+        print(f"No se encontraron datos para la red {network_name or mac} en el período especificado.")
+        return None
     
-    for scan in scans:
-        timestamp = scan['timestamp']
-        networks = scan['networks']
+    return ("signal_strength", frame, {"network_name": network_name, "mac": mac, "days": days,
+                                       "output_file": output_file})
+
+def _run_chart(chart, frame, renderer, kwargs):
+    """Ejecuta un trabajo de render sobre un frame ya cargado."""
+    if chart == "band_occupancy":
+        return generate_band_occupancy_trend(frame, kwargs["band"], kwargs["days"], kwargs["output_file"], renderer)
+    if chart == "network_count":
+        return generate_network_count_trend(None, kwargs["days"], kwargs["output_file"], frame, renderer)
+    if chart == "signal_strength":
+        return generate_signal_strength_trend(None, kwargs["network_name"], kwargs["mac"], kwargs["days"],
+                                              kwargs["output_file"], frame, renderer)
+    raise ValueError(f"Gráfico desconocido: {chart}")
+
+def _render_job(chart, spec, kwargs, quality):
+    """Punto de entrada de los procesos de render: abre el frame compartido y dibuja."""
+    return _run_chart(chart, wifi_frames.open_frame(spec), wifi_render.get_renderer(quality), kwargs)
+
+def trend_cache_key(cache, chart, kwargs, quality, version):
+    """Clave de caché de un gráfico: tipo, argumentos (sin la ruta de salida), calidad y versión de los datos."""
+    params = {name: value for name, value in kwargs.items() if name != "output_file"}
+    params["quality"] = quality
+    return cache.key(chart, params, version)
+
+def _publish(cached_file, output_file):
+    """Copia una imagen de la caché a la ruta pedida (si es otra) y devuelve esa ruta."""
+    if os.path.abspath(cached_file) != os.path.abspath(output_file):
+        shutil.copyfile(cached_file, output_file)
+    return output_file
+
+def _render_cached_jobs(jobs, quality, workers, cache, version):
+    """Resuelve los trabajos contra la caché y renderiza (en paralelo) solo los que faltan."""
+    results = [None] * len(jobs)
+    misses = []
+    render_jobs = []
+    for i, (chart, frame, kwargs) in enumerate(jobs):
+        output_file = kwargs.get("output_file")
+        if not output_file:
+            # Los gráficos en pantalla no pasan por la caché
+            misses.append((i, None, None))
+            render_jobs.append(jobs[i])
+            continue
         
-        # Contar redes por banda
-        count_2g = sum(1 for n in networks if n.get('channel') and n.get('channel') <= 14)
-        count_5g = sum(1 for n in networks if n.get('channel') and n.get('channel') > 14)
+        key = trend_cache_key(cache, chart, kwargs, quality, version)
+        cached = cache.get(key)
+        if cached:
+            results[i] = _publish(cached, output_file)
+            print(f"Gráfico sin datos nuevos, reutilizado de la caché: {output_file}")
+            continue
         
-        timestamps.append(timestamp)
-        total_counts.append(len(networks))
-        counts_2g.append(count_2g)
-        counts_5g.append(count_5g)
+        # Renderizar en un temporal de la caché y publicarlo al terminar
+        temp_path = cache.temp_path(key)
+        misses.append((i, key, temp_path))
+        render_jobs.append((chart, frame, dict(kwargs, output_file=temp_path)))
+    
+    rendered = render_trend_jobs(render_jobs, quality, workers) if render_jobs else []
+    for (i, key, temp_path), result in zip(misses, rendered):
+        if key is None:
+            results[i] = result
+            continue
+        try:
+            if result and os.path.exists(temp_path):
+                results[i] = _publish(cache.commit(key, temp_path), jobs[i][2]["output_file"])
+        finally:
+            cache.discard(temp_path)
+    return results
+
+def render_cached_trend(db, cache, chart, days=1, band=None, network_name=None, mac=None,
+                        quality=wifi_render.DEFAULT_QUALITY):
+    """
+    Devuelve la imagen de un gráfico de tendencias desde la caché, renderizándola
+    solo si llegaron escaneos nuevos desde el último render.
     
-    # Generar gráfico
-    plt.figure(figsize=(12, 6))
-    plt.title(f"Tendencia de Número de Redes WiFi (Últimos {days} días)", fontsize=16)
-    plt.xlabel('Tiempo', fontsize=12)
-    plt.ylabel('Número de Redes', fontsize=12)
-    plt.grid(True, linestyle='--', alpha=0.7)
+    Args:
+        db (WiFiDB): Instancia de WiFiDB
+        cache (RenderCache): Caché de imágenes
+        chart (str): 'band_occupancy', 'network_count' o 'signal_strength'
+        days (int): Número de días a analizar
+        band (str, optional): '2g' o '5g' (solo band_occupancy)
+        network_name (str, optional): ESSID (solo signal_strength)
+        mac (str, optional): Dirección MAC (solo signal_strength)
+        quality (str): Preset de calidad de wifi_render
+        
+    Returns:
+        str: Ruta de la imagen en la caché o None si no hay datos
+    """
+    if chart == "band_occupancy":
+        kwargs = {"band": band, "days": days}
+    elif chart == "network_count":
+        kwargs = {"days": days}
+    elif chart == "signal_strength":
+        kwargs = {"network_name": network_name, "mac": mac, "days": days}
+    else:
+        raise ValueError(f"Gráfico desconocido: {chart}")
     
-    # Formatear eje X para mostrar fechas/horas
-    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d %H:%M'))
-    plt.gca().xaxis.set_major_locator(mdates.AutoDateLocator())
+    # La versión de los datos es el _id del último escaneo
+    version = db.get_latest_scan_id()
+    if version is None:
+        return None
     
-    # Dibujar líneas
-    plt.plot(timestamps, total_counts, 'o-', color='blue', label='Total')
-    plt.plot(timestamps, counts_2g, 'o-', color='green', label='2.4GHz')
-    plt.plot(timestamps, counts_5g, 'o-', color='red', label='5GHz')
+    def render(output_file):
+        if chart == "signal_strength":
+            job = signal_strength_job(db, None, network_name, mac, days, output_file)
+        elif chart == "network_count":
+            job = network_count_job(load_trend_frame(db, days), days, output_file)
+        else:
+            jobs = channel_occupancy_jobs(load_trend_frame(db, days), days, output_file)
+            job = next((job for job in jobs if job[2]["band"] == band), None)
+        if job is None:
+            return None
+        chart_name, frame, job_kwargs = job
+        return _run_chart(chart_name, frame, wifi_render.get_renderer(quality), dict(job_kwargs, output_file=output_file))
+    
+    return cache.render(trend_cache_key(cache, chart, kwargs, quality, version), render)
+
+def render_trend_jobs(jobs, quality=wifi_render.DEFAULT_QUALITY, workers=RENDER_WORKERS, cache=None, version=None):
+    """
+    Renderiza gráficos de tendencias independientes, en paralelo si es posible.
     
-    plt.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
+    Cada frame se escribe una sola vez en archivos .npy (en /dev/shm si existe) que
+    los procesos de render abren con memmap, de modo que los arreglos no se copian
+    ni se serializan por trabajo. Si solo hay un trabajo o un proceso, algún gráfico
+    se muestra en pantalla, o el pool falla, los gráficos se renderizan en serie.
     
-    # Guardar o mostrar el gráfico
-    if output_file:
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        print(f"Gráfico de tendencia de número de redes guardado en {output_file}")
-        return output_file
-    else:
-        plt.show()
-        return None
+    Args:
+        jobs (list): Trabajos (gráfico, frame, argumentos) de channel_occupancy_jobs,
+            network_count_job y signal_strength_job (se ignoran los None)
+        quality (str): Preset de calidad de wifi_render
+        workers (int): Procesos de render (1 o menos fuerza el modo serie)
+        cache (RenderCache, optional): Caché de imágenes; los gráficos cuya clave ya
+            está en la caché se copian sin renderizar
+        version (optional): Versión de los datos para la caché (el _id del último escaneo)
+        
+    Returns:
+        list: Rutas de los gráficos generados, en el orden de los trabajos
+    """
+    jobs = [job for job in jobs if job]
+    if cache is not None and version is not None:
+        return _render_cached_jobs(jobs, quality, workers, cache, version)
+    
+    results = [None] * len(jobs)
+    pending = list(range(len(jobs)))
+    
+    parallel = (workers > 1 and len(jobs) > 1
+                and all(kwargs.get("output_file") for _, _, kwargs in jobs))
+    if parallel:
+        directory = tempfile.mkdtemp(prefix='wifi_trends_', dir=SHARED_DIR if os.path.isdir(SHARED_DIR) else None)
+        try:
+            # Compartir cada frame una sola vez aunque lo usen varios trabajos
+            specs = {}
+            for _, frame, _ in jobs:
+                if id(frame) not in specs:
+                    specs[id(frame)] = wifi_frames.save_frame(frame, os.path.join(directory, str(len(specs))))
+            
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                futures = {pool.submit(_render_job, chart, specs[id(frame)], kwargs, quality): i
+                           for i, (chart, frame, kwargs) in enumerate(jobs)}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        results[i] = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        print(f"Error al generar el gráfico {jobs[i][0]}: {e}")
+                    pending.remove(i)
+        except (OSError, BrokenProcessPool) as e:
+            print(f"No se pudo renderizar en paralelo ({e}); se continúa en serie.")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    
+    # Modo serie (o los trabajos que quedaron pendientes si el pool falló)
+    renderer = wifi_render.get_renderer(quality)
+    for i in pending:
+        chart, frame, kwargs = jobs[i]
+        try:
+            results[i] = _run_chart(chart, frame, renderer, kwargs)
+        except Exception as e:
+            print(f"Error al generar el gráfico {chart}: {e}")
+    
+    return results
 
 def main():
     """Función principal"""
@@ -324,24 +628,58 @@ def main():
     parser.add_argument('--network', type=str, help='Nombre de la red para análisis específico')
     parser.add_argument('--mac', type=str, help='Dirección MAC para análisis específico')
     parser.add_argument('--output-dir', type=str, help='Directorio para guardar los gráficos')
+    parser.add_argument('--quality', type=str, choices=sorted(wifi_render.QUALITY_PRESETS),
+                        default=wifi_render.DEFAULT_QUALITY,
+                        help='Calidad de los PNG: preview (100 dpi, rápido) o print (300 dpi)')
+    parser.add_argument('--workers', type=int, default=RENDER_WORKERS,
+                        help='Procesos para renderizar los gráficos en paralelo (1 para renderizar en serie)')
+    parser.add_argument('--cache-dir', type=str, default=wifi_cache.CACHE_DIR,
+                        help='Directorio de la caché de gráficos renderizados')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='No usar la caché: renderizar siempre y nombrar los archivos con la fecha y hora')
+    parser.add_argument('--archive-dir', type=str, default=wifi_archive.ARCHIVE_DIR,
+                        help='Archivo columnar de escaneos a usar si MongoDB no está disponible')
+    parser.add_argument('--scanlog-dir', type=str, default=wifi_scanlog.SCANLOG_DIR,
+                        help='Registro binario con el que se actualiza el archivo columnar')
+    parser.add_argument('--json-dir', type=str, default='.',
+                        help='Directorio de los archivos wifi_scan_*.json con los que se actualiza el archivo columnar')
     
     args = parser.parse_args()
     
-    # Conectar a MongoDB
-    db = wifi_db.WiFiDB(host=args.mongo_host, port=args.mongo_port, db_name=args.mongo_db)
-    
-    if not db.is_connected():
-        print("No se pudo conectar a MongoDB. Verifique que el servicio esté en ejecución.")
-        return
+    # Conectar a MongoDB; si no está disponible, usar el archivo columnar
+    db = wifi_db.WiFiDB(host=args.mongo_host, port=args.mongo_port, db_name=args.mongo_db) if DB_AVAILABLE else None
+    archive = None
+    if db is None or not db.is_connected():
+        print("MongoDB no está disponible. Se usará el archivo columnar de escaneos.")
+        db = None
+        archive = wifi_archive.ScanArchive(args.archive_dir)
+        written = sync_archive(archive, args.scanlog_dir, args.json_dir)
+        if written:
+            print(f"Archivo columnar actualizado: {written} partes nuevas")
     
     # Crear directorio de salida si no existe
     if args.output_dir:
         os.makedirs(args.output_dir, exist_ok=True)
     
-    # Generar timestamp para los archivos
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Con caché los archivos tienen nombres estables (se sobrescriben si cambian los datos);
+    # sin caché se nombran con la fecha y hora
+    cache = None if args.no_cache else wifi_cache.RenderCache(args.cache_dir)
+    if cache is None:
+        version = None
+    else:
+        version = archive.version() if archive else db.get_latest_scan_id()
+    timestamp = f"{args.days}d" if cache else datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    # Cargar una sola vez los datos que comparten todos los gráficos
+    if archive:
+        frame = load_archive_frame(archive, args.days, args.network, args.mac)
+    else:
+        frame = load_trend_frame(db, args.days)
+    if frame is not None:
+        print(f"Datos de tendencias: {len(frame)} puntos, {frame.nbytes() / 1024:.0f} KB")
     
-    # Generar gráficos
+    # Armar los trabajos de render
+    jobs = []
     if args.network or args.mac:
         # Análisis específico de una red
         output_file = None
@@ -349,25 +687,29 @@ def main():
             network_name = args.network or args.mac
             output_file = os.path.join(args.output_dir, f"wifi_signal_trend_{network_name}_{timestamp}.png")
         
-        generate_signal_strength_trend(db, args.network, args.mac, args.days, output_file)
+        jobs.append(signal_strength_job(db, frame, args.network, args.mac, args.days, output_file))
     else:
         # Análisis general
         
-        # Gráfico de ocupación de canales
+        # Gráficos de ocupación de canales
         output_file = None
         if args.output_dir:
             output_file = os.path.join(args.output_dir, f"wifi_channel_trend_{timestamp}.png")
         
-        generate_channel_occupancy_trend(db, args.days, output_file)
+        jobs.extend(channel_occupancy_jobs(frame, args.days, output_file))
         
         # Gráfico de número de redes
         output_file = None
         if args.output_dir:
             output_file = os.path.join(args.output_dir, f"wifi_network_count_trend_{timestamp}.png")
         
-        generate_network_count_trend(db, args.days, output_file)
+        jobs.append(network_count_job(frame, args.days, output_file))
+    
+    # Renderizar los gráficos independientes en paralelo (o en serie si no es posible)
+    render_trend_jobs(jobs, args.quality, args.workers, cache, version)
     
-    db.close()
+    if db:
+        db.close()
 
 if __name__ == "__main__":
     main()
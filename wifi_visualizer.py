@@ -6,13 +6,16 @@ WiFi Visualizer para Raspberry Pi
 Este script genera gráficos de redes WiFi basados en los datos escaneados.
 """
 
+import html
 import json
 import os
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.collections import PolyCollection
 from matplotlib.colors import LinearSegmentedColormap
 import matplotlib.patches as mpatches
 from datetime import datetime
+import wifi_render
+import wifi_scanlog
 
 # Constantes para los gráficos
 CHANNEL_COLORS_2G = {
@@ -60,6 +63,23 @@ CHANNEL_COLORS_5G = {
     165: '#CC33AA',
 }
 
+# Ancho de un canal de 20MHz en números de canal (4 canales de 5MHz), a cada lado del centro
+CHANNEL_HALF_WIDTH = 2
+
+# Etiquetas por canal en el gráfico de canales (las redes más fuertes); con cientos
+# de redes el resto se superpondría y no se podría leer
+MAX_LABELS_PER_CHANNEL = 3
+
+# Filas por página en la lista de redes PNG
+NETWORKS_PER_PAGE = 30
+
+# Colores de fondo de la celda SSID según la intensidad de señal
+SIGNAL_CELL_COLORS = {
+    'strong': (0.8, 1, 0.8),  # Verde claro (> -50 dBm)
+    'medium': (1, 0.9, 0.7),  # Naranja claro (> -70 dBm)
+    'weak': (1, 0.8, 0.8),  # Rojo claro
+}
+
 def load_scan_results(filename):
     """
     Carga los resultados de un escaneo desde un archivo JSON.
@@ -77,85 +97,124 @@ def load_scan_results(filename):
         print(f"Error al cargar el archivo {filename}: {e}")
         return []
 
-def plot_channel_graph(networks, output_file=None):
+def _signal_level(signal):
+    """Clasifica una señal en 'strong', 'medium' o 'weak' (None si no hay dato)."""
+    if not isinstance(signal, (int, float)):
+        return None
+    if signal > -50:
+        return 'strong'
+    if signal > -70:
+        return 'medium'
+    return 'weak'
+
+def _band_output_file(output_file, band):
+    """Ruta del gráfico de una banda (el de 5GHz lleva el sufijo _5GHz)."""
+    if output_file and band == '5g':
+        root, ext = os.path.splitext(output_file)
+        return f"{root}_5GHz{ext}"
+    return output_file
+
+def _draw_channel_spans(ax, networks, colors, channel_range=None):
     """
-    Genera un gráfico de canales WiFi mostrando la intensidad de señal.
+    Dibuja el ancho de canal de todas las redes de una banda con una sola PolyCollection.
     
     Args:
-        networks (list): Lista de redes WiFi
-        output_file (str, optional): Ruta para guardar el gráfico. Si es None, se muestra en pantalla.
+        ax (Axes): Ejes donde dibujar
+        networks (list): Redes de la banda con canal y señal
+        colors (dict): Color por canal
+        channel_range (tuple, optional): (mínimo, máximo) para recortar los anchos (2.4GHz)
     """
-    # Separar redes por banda
-    networks_2g = [n for n in networks if n.get('channel') and n.get('channel') <= 14]
-    networks_5g = [n for n in networks if n.get('channel') and n.get('channel') > 14]
+    channels = np.array([n['channel'] for n in networks], dtype=np.float32)
+    signals = np.array([n['signal'] for n in networks], dtype=np.float32)
     
-    # Configurar el gráfico
-    plt.figure(figsize=(12, 8))
-    plt.title('Gráfico de Canal WiFi', fontsize=16)
-    plt.xlabel('Canales WiFi', fontsize=12)
-    plt.ylabel('Intensidad de Señal (dBm)', fontsize=12)
-    plt.grid(True, linestyle='--', alpha=0.7)
+    # Rectángulos (inicio, -90) -> (inicio, señal) -> (fin, señal) -> (fin, -90)
+    start = channels - CHANNEL_HALF_WIDTH
+    end = channels + CHANNEL_HALF_WIDTH
+    if channel_range:
+        start = np.maximum(start, channel_range[0])
+        end = np.minimum(end, channel_range[1])
+    bottom = np.full_like(signals, -90)
+    verts = np.stack([
+        np.stack([start, bottom], axis=1),
+        np.stack([start, signals], axis=1),
+        np.stack([end, signals], axis=1),
+        np.stack([end, bottom], axis=1),
+    ], axis=1)
+    facecolors = [colors.get(n['channel'], '#AAAAAA') for n in networks]
+    ax.add_collection(PolyCollection(verts, facecolors=facecolors, edgecolors='none', alpha=0.6))
     
-    # Configurar ejes
-    plt.ylim(-90, -20)
-    
-    # Dibujar redes 2.4GHz
-    if networks_2g:
-        channels_2g = range(1, 15)
-        plt.xticks(list(channels_2g))
-        
-        for network in networks_2g:
-            channel = network.get('channel')
-            signal = network.get('signal')
-            essid = network.get('essid')
-            
-            if channel and signal:
-                # Calcular ancho de banda (típicamente 20MHz = 4 canales)
-                width = 4
-                start_channel = max(1, channel - width//2)
-                end_channel = min(14, channel + width//2)
-                
-                # Crear polígono para representar la señal
-                x = np.linspace(start_channel, end_channel, 100)
-                y_top = np.ones(100) * signal
-                y_bottom = np.ones(100) * -90
-                
-                # Dibujar polígono
-                color = CHANNEL_COLORS_2G.get(channel, '#AAAAAA')
-                plt.fill_between(x, y_bottom, y_top, alpha=0.6, color=color)
-                
-                # Añadir etiqueta
-                plt.text(channel, signal + 2, essid, fontsize=8, 
-                         ha='center', va='bottom', color=color)
-    
-    # Guardar o mostrar el gráfico
-    if output_file:
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        print(f"Gráfico guardado en {output_file}")
-    else:
-        plt.tight_layout()
-        plt.show()
+    # Etiquetas: solo las redes más fuertes de cada canal
+    labeled = {}
+    for network in sorted(networks, key=lambda n: n['signal'], reverse=True):
+        channel = network['channel']
+        if labeled.get(channel, 0) >= MAX_LABELS_PER_CHANNEL:
+            continue
+        labeled[channel] = labeled.get(channel, 0) + 1
+        ax.text(channel, network['signal'] + 2, network.get('essid'), fontsize=8,
+                ha='center', va='bottom', color=colors.get(channel, '#AAAAAA'))
 
-def plot_network_list(networks, output_file=None):
+def plot_channel_graph(networks, output_file=None, renderer=None):
     """
-    Genera una visualización de lista de redes WiFi con sus detalles.
+    Genera un gráfico de canales WiFi mostrando la intensidad de señal.
+    
+    Las redes de 2.4GHz se dibujan en output_file y, si hay redes de 5GHz, se
+    genera un segundo gráfico con el sufijo _5GHz.
     
     Args:
         networks (list): Lista de redes WiFi
         output_file (str, optional): Ruta para guardar el gráfico. Si es None, se muestra en pantalla.
+        renderer (Renderer, optional): Renderizador a usar (por defecto, el de calidad de impresión)
+        
+    Returns:
+        list: Rutas de los gráficos guardados
     """
-    # Ordenar redes por intensidad de señal
-    networks = sorted(networks, key=lambda x: x.get('signal', -100), reverse=True)
+    renderer = renderer or wifi_render.get_renderer()
+    
+    # Separar redes por banda (solo las que tienen canal y señal)
+    networks = [n for n in networks if n.get('channel') and n.get('signal')]
+    networks_2g = [n for n in networks if n['channel'] <= 14]
+    networks_5g = [n for n in networks if n['channel'] > 14]
     
-    # Configurar el gráfico
-    fig, ax = plt.subplots(figsize=(10, len(networks) * 0.4 + 2))
-    plt.title('Puntos de Acceso WiFi', fontsize=16)
+    bands = [('2g', 'Gráfico de Canal WiFi', networks_2g)]
+    if networks_5g:
+        bands.append(('5g', 'Gráfico de Canal WiFi 5GHz', networks_5g))
     
-    # Ocultar ejes
-    ax.axis('off')
+    saved = []
+    for band, title, band_networks in bands:
+        band_file = _band_output_file(output_file, band)
+        with renderer.figure(f'channel_graph_{band}', (12, 8), band_file) as (fig, ax):
+            ax.set_title(title, fontsize=16)
+            ax.set_xlabel('Canales WiFi', fontsize=12)
+            ax.set_ylabel('Intensidad de Señal (dBm)', fontsize=12)
+            ax.grid(True, linestyle='--', alpha=0.7)
+            
+            # Configurar ejes
+            ax.set_ylim(-90, -20)
+            
+            if band == '2g':
+                ax.set_xlim(0.5, 14.5)
+                ax.set_xticks(list(range(1, 15)))
+                if band_networks:
+                    _draw_channel_spans(ax, band_networks, CHANNEL_COLORS_2G, channel_range=(1, 14))
+            else:
+                channels = sorted({n['channel'] for n in band_networks})
+                ax.set_xlim(channels[0] - 2 * CHANNEL_HALF_WIDTH, channels[-1] + 2 * CHANNEL_HALF_WIDTH)
+                ax.set_xticks(channels)
+                ax.tick_params(axis='x', labelrotation=90)
+                _draw_channel_spans(ax, band_networks, CHANNEL_COLORS_5G)
+        
+        if band_file:
+            print(f"Gráfico guardado en {band_file}")
+            saved.append(band_file)
     
-    # Crear tabla
-    cell_text = []
+    return saved
+
+def _network_rows(networks):
+    """Filas de la lista de redes: (celdas, nivel de señal) ordenadas por intensidad."""
+    # Ordenar redes por intensidad de señal
+    networks = sorted(networks, key=lambda x: x.get('signal', -100), reverse=True)
+    
+    rows = []
     for network in networks:
         essid = network.get('essid', 'Unknown')
         channel = network.get('channel', 'N/A')
@@ -165,80 +224,159 @@ def plot_network_list(networks, output_file=None):
         mac = network.get('mac', 'N/A')
         
         # Determinar banda
-        band = '2.4GHz' if channel and channel <= 14 else '5GHz'
-        
-        # Determinar color basado en la intensidad de señal
-        if signal != 'N/A':
-            if signal > -50:
-                signal_color = 'green'
-            elif signal > -70:
-                signal_color = 'orange'
-            else:
-                signal_color = 'red'
-        else:
-            signal_color = 'black'
+        band = '2.4GHz' if channel and channel != 'N/A' and channel <= 14 else '5GHz'
         
-        # Añadir fila a la tabla
-        cell_text.append([
+        rows.append(([
             f"{essid} ({mac})",
             f"{signal} dBm",
             f"CH {channel} ({frequency} GHz)",
             f"{distance} m",
             band
-        ])
+        ], _signal_level(network.get('signal'))))
+    return rows
+
+NETWORK_LIST_COLUMNS = ['SSID (MAC)', 'Señal', 'Canal (Frecuencia)', 'Distancia', 'Banda']
+
+def write_network_list_html(networks, output_file):
+    """
+    Escribe la lista de redes como una tabla HTML (sin matplotlib).
     
-    # Crear tabla
-    table = ax.table(
-        cellText=cell_text,
-        colLabels=['SSID (MAC)', 'Señal', 'Canal (Frecuencia)', 'Distancia', 'Banda'],
-        loc='center',
-        cellLoc='left'
-    )
+    Args:
+        networks (list): Lista de redes WiFi
+        output_file (str): Ruta del archivo .html
     
-    # Ajustar estilo de la tabla
-    table.auto_set_font_size(False)
-    table.set_fontsize(9)
-    table.scale(1, 1.5)
+    Returns:
+        str: Ruta del archivo escrito
+    """
+    css = {level: 'rgb({:.0f},{:.0f},{:.0f})'.format(*(255 * c for c in color))
+           for level, color in SIGNAL_CELL_COLORS.items()}
+    lines = [
+        '<!DOCTYPE html>',
+        '<html lang="es"><head><meta charset="utf-8"><title>Puntos de Acceso WiFi</title>',
+        '<style>body{font-family:sans-serif}table{border-collapse:collapse}'
+        'th,td{border:1px solid #ccc;padding:4px 8px;text-align:left}th{background:#eee}</style>',
+        '</head><body><h1>Puntos de Acceso WiFi</h1><table>',
+        '<tr>' + ''.join(f'<th>{html.escape(column)}</th>' for column in NETWORK_LIST_COLUMNS) + '</tr>',
+    ]
+    for cells, level in _network_rows(networks):
+        style = f' style="background:{css[level]}"' if level else ''
+        first = f'<td{style}>{html.escape(cells[0])}</td>'
+        lines.append('<tr>' + first + ''.join(f'<td>{html.escape(cell)}</td>' for cell in cells[1:]) + '</tr>')
+    lines.append('</table></body></html>')
     
-    # Colorear celdas según la intensidad de señal
-    for i, network in enumerate(networks):
-        signal = network.get('signal', 'N/A')
-        if signal != 'N/A':
-            if signal > -50:
-                color = (0.8, 1, 0.8)  # Verde claro
-            elif signal > -70:
-                color = (1, 0.9, 0.7)  # Naranja claro
-            else:
-                color = (1, 0.8, 0.8)  # Rojo claro
-            
-            table[(i+1, 0)].set_facecolor(color)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+    return output_file
+
+def _page_output_file(output_file, page):
+    """Ruta de una página de la lista (la primera conserva el nombre original)."""
+    if output_file and page > 1:
+        root, ext = os.path.splitext(output_file)
+        return f"{root}_p{page}{ext}"
+    return output_file
+
+def plot_network_list(networks, output_file=None, renderer=None):
+    """
+    Genera una visualización de lista de redes WiFi con sus detalles.
     
-    # Guardar o mostrar el gráfico
-    if output_file:
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    Con una ruta .html se escribe una tabla HTML. En PNG la lista se divide en
+    páginas de NETWORKS_PER_PAGE redes; las páginas siguientes a la primera
+    llevan el sufijo _p2, _p3, ...
+    
+    Args:
+        networks (list): Lista de redes WiFi
+        output_file (str, optional): Ruta para guardar el gráfico (.png o .html). Si es None, se muestra en pantalla.
+        renderer (Renderer, optional): Renderizador a usar (por defecto, el de calidad de impresión)
+        
+    Returns:
+        list: Rutas de los archivos guardados
+    """
+    if output_file and output_file.lower().endswith('.html'):
+        write_network_list_html(networks, output_file)
         print(f"Lista de redes guardada en {output_file}")
-    else:
-        plt.tight_layout()
-        plt.show()
+        return [output_file]
+    
+    renderer = renderer or wifi_render.get_renderer()
+    rows = _network_rows(networks)
+    pages = max(1, -(-len(rows) // NETWORKS_PER_PAGE))
+    
+    saved = []
+    for page in range(1, pages + 1):
+        page_rows = rows[(page - 1) * NETWORKS_PER_PAGE:page * NETWORKS_PER_PAGE]
+        page_file = _page_output_file(output_file, page)
+        title = 'Puntos de Acceso WiFi' if pages == 1 else f'Puntos de Acceso WiFi ({page}/{pages})'
+        
+        # Configurar el gráfico (la altura depende de las redes de la página)
+        figsize = (10, len(page_rows) * 0.4 + 2)
+        margins = {"left": 0.02, "right": 0.98, "top": 0.92, "bottom": 0.02}
+        with renderer.figure('network_list', figsize, page_file, margins) as (fig, ax):
+            ax.set_title(title, fontsize=16)
+            
+            # Ocultar ejes
+            ax.axis('off')
+            
+            if not page_rows:
+                continue
+            
+            # Crear tabla
+            table = ax.table(
+                cellText=[cells for cells, _ in page_rows],
+                colLabels=NETWORK_LIST_COLUMNS,
+                loc='center',
+                cellLoc='left'
+            )
+            
+            # Ajustar estilo de la tabla
+            table.auto_set_font_size(False)
+            table.set_fontsize(9)
+            table.scale(1, 1.5)
+            
+            # Colorear celdas según la intensidad de señal
+            for i, (_, level) in enumerate(page_rows):
+                if level:
+                    table[(i+1, 0)].set_facecolor(SIGNAL_CELL_COLORS[level])
+        
+        if page_file:
+            saved.append(page_file)
+    
+    if saved:
+        print(f"Lista de redes guardada en {', '.join(saved)}")
+    return saved
 
-def main():
-    """Función principal"""
+def load_latest_scan(scanlog_dir=wifi_scanlog.SCANLOG_DIR):
+    """
+    Carga las redes del último escaneo: del registro binario si tiene escaneos
+    (solo se lee su último bloque) o, si no, del archivo wifi_scan_*.json más reciente.
+    
+    Args:
+        scanlog_dir (str): Directorio del registro binario
+        
+    Returns:
+        list: Lista de redes WiFi (vacía si no hay escaneos)
+    """
+    if os.path.isdir(scanlog_dir):
+        scan = wifi_scanlog.ScanLog(scanlog_dir, retention_days=0).latest_scan()
+        if scan:
+            print(f"Usando el escaneo del {scan['timestamp']} del registro {scanlog_dir}")
+            return scan['networks']
+    
     # Buscar el archivo JSON más reciente
     json_files = [f for f in os.listdir('.') if f.startswith('wifi_scan_') and f.endswith('.json')]
     
     if not json_files:
-        print("No se encontraron archivos de escaneo. Ejecute wifi_scanner.py primero.")
-        return
+        return []
     
     # Ordenar por fecha (el más reciente primero)
     latest_file = sorted(json_files)[-1]
     print(f"Usando archivo de escaneo: {latest_file}")
-    
-    # Cargar datos
-    networks = load_scan_results(latest_file)
+    return load_scan_results(latest_file)
+
+def main(scanlog_dir=wifi_scanlog.SCANLOG_DIR):
+    """Función principal"""
+    networks = load_latest_scan(scanlog_dir)
     
     if not networks:
-        print("No hay datos de redes WiFi para visualizar.")
+        print("No se encontraron escaneos. Ejecute wifi_scanner.py primero.")
         return
     
     # Generar gráficos